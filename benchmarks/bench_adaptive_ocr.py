@@ -0,0 +1,97 @@
+"""
+Checks for line-level escalation of page-size images (adaptive_ocr.run_lines).
+
+Draws synthetic pages whose lines are filled boxes, each with its own gray
+level, and replaces Tesseract with a stand-in: image_to_lines reports the
+layout (in Tesseract's reading order, column by column), and the escalated
+reading of a crop is the list of lines whose gray level is visible in it. A
+page passes when every line's text appears exactly once, low-confidence lines
+as their escalated reading, and no crop reached into another column.
+
+Layouts: one column, two columns (reading order jumps from the bottom of
+the left column to the top of the right one) and two columns under a
+full-width heading.
+
+    python benchmarks/bench_adaptive_ocr.py
+"""
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scraper import adaptive_ocr, ocr_engine  # noqa: E402
+
+PAGE = (2000, 1400)  # height, width: above PAGE_AREA
+LINE_HEIGHT = 28
+LINE_STEP = 40
+LOW, HIGH = 20.0, 90.0
+
+
+def column(name, x1, x2, top, count, low):
+    """count lines of a column; those whose number is in low are low-confidence."""
+    return [(f"{name}{i + 1}", LOW if i + 1 in low else HIGH,
+             (x1, top + i * LINE_STEP, x2, top + i * LINE_STEP + LINE_HEIGHT)) for i in range(count)]
+
+
+LAYOUTS = {
+    "one column": column("A", 50, 1300, 100, 20, {2, 3, 4, 9, 20}),
+    "two columns": (column("A", 50, 650, 100, 20, {1, 2, 15, 16, 20})
+                    + column("B", 750, 1350, 100, 20, {1, 2, 3, 16, 17})),
+    "two columns under a heading": ([("H1", LOW, (50, 40, 1350, 40 + LINE_HEIGHT))]
+                                    + column("A", 50, 650, 100, 10, {1, 2, 10})
+                                    + column("B", 750, 1350, 100, 10, {1, 5, 6})),
+}
+
+
+def draw(layout):
+    page = np.full(PAGE, 255, dtype=np.uint8)
+    for idx, (_, _, (x1, y1, x2, y2)) in enumerate(layout):
+        page[y1:y2, x1:x2] = 10 + idx
+    return page
+
+
+def stand_in_run(layout, crops):
+    def run(region, lang="eng", config="", threshold=adaptive_ocr.CONFIDENCE_THRESHOLD, stages=()):
+        visible = sorted({int(v) - 10 for v in np.unique(region) if 10 <= v < 10 + len(layout)})
+        crops.append(visible)
+        text = "\n".join(f"{layout[idx][0]}*" for idx in visible)
+        return text, {"stages": [("otsu", 0.0)], "accepted": "otsu", "confidence": 95.0}
+    return run
+
+
+def check(name, layout):
+    crops = []
+    ocr_engine.image_to_lines = lambda image, lang="eng", config="": list(layout)
+    adaptive_ocr.run = stand_in_run(layout, crops)
+    text, reports = adaptive_ocr.run_lines(draw(layout))
+    words = text.split()
+
+    problems = []
+    for line, conf, _ in layout:
+        expected = f"{line}*" if conf < adaptive_ocr.CONFIDENCE_THRESHOLD else line
+        if words.count(expected) != 1:
+            problems.append(f"{expected} appears {words.count(expected)} times")
+        if words.count(line) + words.count(f"{line}*") != 1:
+            problems.append(f"{line} read {words.count(line) + words.count(line + '*')} times")
+    for visible in crops:
+        if any(layout[idx][1] >= adaptive_ocr.CONFIDENCE_THRESHOLD for idx in visible):
+            problems.append(f"crop re-read high-confidence lines: {[layout[idx][0] for idx in visible]}")
+        if len({layout[idx][0][0] for idx in visible} - {"H"}) > 1:
+            problems.append(f"crop spans columns: {[layout[idx][0] for idx in visible]}")
+    print(f"{'PASS' if not problems else 'FAIL'}  {name}: {len(crops)} escalated regions "
+          f"{[[layout[idx][0] for idx in visible] for visible in crops]}")
+    for problem in problems:
+        print(f"      {problem}")
+    return not problems
+
+
+def main():
+    results = [check(name, layout) for name, layout in LAYOUTS.items()]
+    print(f"{sum(results)}/{len(results)} checks passed")
+    sys.exit(0 if all(results) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Benchmark for data_clean.categorize_data.
+
+Builds a synthetic scrape result (valid and invalid phones, emails and
+addresses in French and Arabic, missing values, numbers instead of strings)
+and categorizes it with the row-by-row validators, as categorize_data did
+before, and with the vectorized masks. Checks that both give identical
+flags and views.
+
+    python benchmarks/bench_categorize.py --rows 1000000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scraper.data_clean.cleaner import (  # noqa: E402
+    categorize_data, has_valid_address, has_valid_email, has_valid_phone, validity_masks
+)
+
+PHONES = ["+216 71 123 456", "71123456", "22 333 444", "1234", "", None, np.nan, 21671123456,
+          71123456.0, "tel: ٧١٢٣٤٥٦٧", "N/A", "(+216) 98-765-432", "0"]
+EMAILS = ["contact@asso.tn", "Jean.Dupont@gmail.com", "ahmed.benali@topnet.tn", "info@example.com",
+          "user@site.com", "a..b@mail.tn", "123456@gmail.com", "ab12345@orange.tn", "x@tempmail.org",
+          "  Salma.K@Planet.TN  ", "not an email", "", None, np.nan, "noreply@asso.org",
+          "président@asso.tn", "club_sportif@yahoo.fr", "a@b.c", "ok.name@sub.domain.tn"]
+ADDRESSES = ["12 Rue de Marseille, Tunis 1000", "Avenue Habib Bourguiba", "Cité El Khadra", "Sfax",
+             "Résidence les Jasmins, Bloc B, étage 3, Ariana", "BP 123 Sousse", "cp 4000 sousse",
+             "Route de Gabès km 4, Sfax 3003", "Hay Ennasr", "Zone industrielle, Ben Arous 2013",
+             "nahj 5 Tunis", "Lot 12", "abcd", "", None, np.nan, 12345, "Place Pasteur n° 7",
+             "نهج الحرية تونس", "Centre Urbain Nord", "Borj Cedria", "Tunisia", "rue x",
+             "Immeuble Carthage Center, Rue du Lac Windermere, Les Berges du Lac"]
+
+
+STREETS = ["Rue", "Avenue", "Av.", "Boulevard", "Route de", "Cité", "Résidence", "Impasse", "Nahj", "نهج"]
+STREET_NAMES = ["de Marseille", "Habib Bourguiba", "de la Liberté", "Ibn Khaldoun", "El Amal", "des Jasmins",
+                "Farhat Hached", "de Carthage", "Ennasr", "Mongi Slim", "الحرية", "Taieb Mhiri"]
+CITIES = ["Tunis", "Sfax", "Sousse", "Ariana", "Nabeul", "Bizerte", "Gabès", "Monastir", "La Marsa", "Djerba", ""]
+DOMAINS = ["gmail.com", "yahoo.fr", "topnet.tn", "planet.tn", "asso.tn", "orange.tn", "example.com", "mail.com"]
+FIRST = ["ahmed", "salma", "jean", "amine", "ines", "info", "contact", "noreply", "club", "asso"]
+
+
+def make_frame(rows, rng, edge_share=0.2):
+    """Mostly distinct generated values, with edge_share of rows from the fixed edge-case lists."""
+    pick = lambda values, n: [values[i] for i in rng.integers(0, len(values), n)]  # noqa: E731
+    numbers = rng.integers(0, 10**8, rows)
+    phones = [f"+216 {n // 10**6:02d} {n // 1000 % 1000:03d} {n % 1000:03d}" if n % 3 else f"{n % 10**6}"
+              for n in numbers]
+    emails = [f"{first}{'.' if n % 2 else '_'}{n % 100000}@{domain}" if n % 5 else f"{first}{n % 7}@{domain}"
+              for first, n, domain in zip(pick(FIRST, rows), numbers, pick(DOMAINS, rows))]
+    addresses = [f"{n % 200} {street} {name}, {city} {1000 + n % 9000 if n % 4 else ''}".strip(" ,")
+                 for n, street, name, city in zip(numbers, pick(STREETS, rows), pick(STREET_NAMES, rows),
+                                                  pick(CITIES, rows))]
+    edge = rng.random(rows) < edge_share
+    for column, values in [(phones, PHONES), (emails, EMAILS), (addresses, ADDRESSES)]:
+        replacements = pick(values, int(edge.sum()))
+        for i, value in zip(np.flatnonzero(edge), replacements):
+            column[i] = value
+    return pd.DataFrame({
+        "name": [f"Association {i}" for i in range(rows)],
+        "phone": phones,
+        "email": emails,
+        "address": addresses,
+        "domain": "asso.tn",
+        "poste": "",
+    }, index=rng.permutation(rows))
+
+
+def legacy_categorize(df):
+    """categorize_data as it was: three copies and per-row .apply."""
+    raw_df, contact_df, location_df = df.copy(), df.copy(), df.copy()
+    contact_df['has_valid_phone'] = contact_df['phone'].apply(has_valid_phone)
+    contact_df['has_valid_email'] = contact_df['email'].apply(has_valid_email)
+    location_df['has_valid_phone'] = location_df['phone'].apply(has_valid_phone)
+    location_df['has_valid_address'] = location_df['address'].apply(has_valid_address)
+    flags = {
+        "phone": location_df['has_valid_phone'],
+        "email": contact_df['has_valid_email'],
+        "address": location_df['has_valid_address'],
+    }
+    contact_df = contact_df[contact_df['has_valid_phone'] | contact_df['has_valid_email']].drop(
+        ['has_valid_phone', 'has_valid_email'], axis=1).reset_index(drop=True)
+    location_df = location_df[location_df['has_valid_phone'] & location_df['has_valid_address']].drop(
+        ['has_valid_phone', 'has_valid_address'], axis=1).reset_index(drop=True)
+    return (raw_df, contact_df, location_df), flags
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    df = make_frame(args.rows, np.random.default_rng(args.seed))
+
+    start = time.perf_counter()
+    legacy_views, legacy_flags = legacy_categorize(df)
+    legacy_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    masks = validity_masks(df)
+    mask_time = time.perf_counter() - start
+    start = time.perf_counter()
+    views = categorize_data(df)
+    categorize_time = time.perf_counter() - start
+
+    flags_equal = all(masks[name].equals(legacy_flags[name].astype(bool)) for name in masks)
+    views_equal = all(view.equals(legacy) for view, legacy in zip(views, legacy_views))
+    distinct = {column: df[column].astype(str).nunique() for column in ("phone", "email", "address")}
+    print(f"{args.rows} rows: {len(views[1])} contact, {len(views[2])} location; distinct values {distinct}")
+    print(f"Row by row:   {legacy_time:.2f}s")
+    print(f"Vectorized:   {categorize_time:.2f}s (masks alone {mask_time:.2f}s), "
+          f"{legacy_time / categorize_time:.1f}x")
+    print(f"Identical flags: {flags_equal}, identical views: {views_equal}")
+
+
+if __name__ == "__main__":
+    main()
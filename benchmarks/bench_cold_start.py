@@ -0,0 +1,58 @@
+"""
+Cold-start benchmark: today's loaders vs. the model snapshot.
+
+Each measurement runs in a fresh interpreter so nothing is cached in-process;
+the OS page cache is left warm, which is the case for worker processes
+started next to an already running server.
+
+    python -m scraper.snapshot                # build the snapshot first
+    python benchmarks/bench_cold_start.py --runs 3 --models qa spacy_fr
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = """
+import json, sys, time
+start = time.perf_counter()
+from scraper.models import registry
+from scraper import qa_model, crawler
+registry.get(sys.argv[1])
+stats = registry.stats()[sys.argv[1]]
+print(json.dumps({"seconds": time.perf_counter() - start, "rss_delta_mb": stats.get("rss_delta_mb")}))
+"""
+
+
+def measure(model, snapshot_dir):
+    env = dict(os.environ, EZER_SNAPSHOT_DIR=snapshot_dir)
+    out = subprocess.run(
+        [sys.executable, "-c", CHILD, model],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--models", nargs="*", default=["qa", "spacy_en", "spacy_fr", "spacy_xx"])
+    parser.add_argument("--snapshot-dir", default="model_snapshot")
+    args = parser.parse_args()
+
+    print(f"{'model':<10} {'path':<9} {'median s':>9} {'min s':>7} {'rss MB':>8}")
+    for model in args.models:
+        for label, snapshot_dir in (("loader", ""), ("snapshot", args.snapshot_dir)):
+            runs = [measure(model, snapshot_dir) for _ in range(args.runs)]
+            seconds = [r["seconds"] for r in runs]
+            rss = runs[-1]["rss_delta_mb"]
+            print(f"{model:<10} {label:<9} {statistics.median(seconds):>9.2f} {min(seconds):>7.2f} "
+                  f"{rss if rss is not None else '-':>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Microbenchmark for FieldMapper.map_field / understand_context.
+
+Compares the compiled per-language matcher with the previous loop over every
+field and synonym, on a question corpus and an enlarged vocabulary, and checks
+that both give the same field for every question.
+
+    python benchmarks/bench_field_mapper.py --questions 20000 --extra-synonyms 5000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scraper.field_mapper import FieldMapper  # noqa: E402
+
+TEMPLATES = [
+    "What is the {} of this association?",
+    "Quel est le {} de l'organisation ?",
+    "ما هو {} الجمعية؟",
+    "Where can I find the {}?",
+    "{}",
+]
+
+
+def legacy_map_field(mapper, text, language):
+    text = text.lower().strip()
+    mappings = mapper.get_field_mappings(language)
+    for field, synonyms in mappings.items():
+        if text in synonyms:
+            return field
+        for synonym in synonyms:
+            if synonym in text or text in synonym:
+                return field
+    return None
+
+
+def synthetic_vocabulary(size, rng):
+    alphabet = "abcdefghijklmnopqrstuvwxyzéèàç" + "ابتثجحخدذرزسشصضطظعغفقكلمنهوي"
+    fields = ["name", "phone", "email", "address", "domain", "website", "poste"]
+    vocabulary = {field: set() for field in fields}
+    for _ in range(size):
+        word = "".join(rng.choice(alphabet) for _ in range(rng.randint(6, 14)))
+        vocabulary[rng.choice(fields)].add(word)
+    return vocabulary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--questions", type=int, default=20000)
+    parser.add_argument("--extra-synonyms", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    mapper = FieldMapper()
+    languages = list(mapper.field_mappings)
+    start = time.perf_counter()
+    for language in languages:
+        mapper.add_synonyms(language, synthetic_vocabulary(args.extra_synonyms, rng))
+    build = time.perf_counter() - start
+
+    words = [syn for lang in languages for syns in mapper.field_mappings[lang].values() for syn in syns]
+    words += ["quelque chose", "something", "شيء", "xyz"]
+    corpus = [(rng.choice(TEMPLATES).format(rng.choice(words)), rng.choice(languages)) for _ in range(args.questions)]
+
+    start = time.perf_counter()
+    legacy = [legacy_map_field(mapper, text, lang) for text, lang in corpus]
+    legacy_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    compiled = [mapper.map_field(text, lang) for text, lang in corpus]
+    compiled_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for text, lang in corpus:
+        mapper.understand_context(text, lang)
+    context_time = time.perf_counter() - start
+
+    mismatches = sum(1 for a, b in zip(legacy, compiled) if a != b)
+    n = len(corpus)
+    print(f"vocabulary: {sum(len(s) for lang in languages for s in mapper.field_mappings[lang].values())} synonyms "
+          f"over {len(languages)} languages, matchers built in {build:.2f}s")
+    print(f"map_field legacy:   {legacy_time:.3f}s ({legacy_time / n * 1e6:.1f} us/question)")
+    print(f"map_field compiled: {compiled_time:.3f}s ({compiled_time / n * 1e6:.1f} us/question)")
+    print(f"understand_context: {context_time:.3f}s ({context_time / n * 1e6:.1f} us/question)")
+    print(f"mismatches: {mismatches}/{n}")
+
+
+if __name__ == "__main__":
+    main()
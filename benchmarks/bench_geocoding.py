@@ -0,0 +1,200 @@
+"""
+Benchmark for concurrent multi-provider geocoding.
+
+Starts local stand-in geocoders (Nominatim, Photon and ArcGIS HTTP APIs)
+with configurable latency and hit rates, points geopy at them and geocodes
+the same addresses with one worker and concurrently, with and without hedging.
+Checks that every address gets the stand-ins' coordinates and that no
+provider ever received two requests closer than its rate budget allows.
+Finally checks that a provider answering 503 or timing out is not cached
+as a negative result, while a clean "not found" is.
+
+    python benchmarks/bench_geocoding.py --addresses 60 --workers 8 --hedge-after 0.3
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from geopy.geocoders import ArcGIS, Nominatim, Photon  # noqa: E402
+
+from scraper.geocode_cache import MISS, GeocodeCache  # noqa: E402
+from scraper.geocoder import LocationGeocoder, Provider, RateBudget  # noqa: E402
+
+# name: (min delay between requests, response latency, share of addresses found)
+STAND_INS = {
+    "Nominatim": (0.15, 0.05, 0.7),
+    "Photon": (0.1, 0.08, 0.8),
+    "ArcGIS": (0.1, 0.4, 1.0),
+}
+
+
+def coords_for(query):
+    """Deterministic coordinates inside Tunisia for a query string."""
+    h = zlib.crc32(query.split(",")[0].strip().lower().encode())
+    return 33.0 + (h % 4000) / 1000, 8.5 + (h // 4000 % 2500) / 1000
+
+
+def found_by(name, query):
+    share = STAND_INS[name][2]
+    return zlib.crc32((name + query).encode()) % 1000 < share * 1000
+
+
+class StandInServer(ThreadingHTTPServer):
+    request_queue_size = 128
+    daemon_threads = True
+
+
+def make_handler(name, latency, requests_log):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            requests_log.append(time.monotonic())
+            params = parse_qs(urlparse(self.path).query)
+            query = (params.get("q") or params.get("singleLine") or [""])[0]
+            time.sleep(latency)
+            lat, lon = coords_for(query)
+            hit = found_by(name, query)
+            if name == "Nominatim":
+                body = [{"lat": str(lat), "lon": str(lon), "display_name": query}] if hit else []
+            elif name == "Photon":
+                features = [{"type": "Feature", "geometry": {"type": "Point", "coordinates": [lon, lat]},
+                             "properties": {"name": query}}] if hit else []
+                body = {"type": "FeatureCollection", "features": features}
+            else:
+                body = {"candidates": [{"address": query, "location": {"x": lon, "y": lat}}] if hit else []}
+            payload = json.dumps(body).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+    return Handler
+
+
+def make_failing_handler(mode):
+    """Nominatim stand-in that answers 503 ("unavailable"), too late ("timeout") or [] ("empty")."""
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            if mode == "timeout":
+                time.sleep(1.5)
+            status, payload = (503, b"unavailable") if mode == "unavailable" else (200, b"[]")
+            try:
+                self.send_response(status)
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+            except OSError:
+                pass  # the client gave up
+
+    return Handler
+
+
+def check_negative_caching(cache_dir):
+    """Only a clean "not found" may be stored as a negative result."""
+    results = {}
+    for mode in ("unavailable", "timeout", "empty"):
+        server = StandInServer(("127.0.0.1", 0), make_failing_handler(mode))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        geocoder_fn = Nominatim(user_agent="ezerScraper-bench", domain=f"127.0.0.1:{server.server_address[1]}",
+                                scheme="http", timeout=0.5).geocode
+        cache = GeocodeCache(os.path.join(cache_dir, f"negative_{mode}.sqlite3"))
+        geocoder = LocationGeocoder(cache=cache, providers=[Provider("Nominatim", geocoder_fn, RateBudget(0))])
+        address = f"1 Rue {mode}, Tunis"
+        coords = geocoder.geocode_address(address, max_retries=1)
+        cached = cache.get(address)
+        results[mode] = "not cached" if cached is MISS else f"cached {cached['coords']}"
+        server.shutdown()
+        assert coords is None
+    ok = results["unavailable"] == results["timeout"] == "not cached" and results["empty"] == "cached None"
+    print(f"Negative caching: {results} -> {'OK' if ok else 'WRONG'}")
+    return ok
+
+
+def start_stand_ins():
+    servers, logs = {}, {}
+    for name, (_, latency, _) in STAND_INS.items():
+        logs[name] = []
+        server = StandInServer(("127.0.0.1", 0), make_handler(name, latency, logs[name]))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers[name] = server
+    return servers, logs
+
+
+def make_providers(servers):
+    domain = {name: f"127.0.0.1:{server.server_address[1]}" for name, server in servers.items()}
+    return [
+        Provider("Nominatim", Nominatim(user_agent="ezerScraper-bench", domain=domain["Nominatim"],
+                                        scheme="http").geocode, RateBudget(STAND_INS["Nominatim"][0])),
+        Provider("Photon", Photon(domain=domain["Photon"], scheme="http").geocode,
+                 RateBudget(STAND_INS["Photon"][0])),
+        Provider("ArcGIS", ArcGIS(domain=domain["ArcGIS"], scheme="http").geocode,
+                 RateBudget(STAND_INS["ArcGIS"][0])),
+    ]
+
+
+def run(servers, logs, addresses, workers, hedge_after, cache_dir):
+    for log in logs.values():
+        log.clear()
+    cache = GeocodeCache(os.path.join(cache_dir, f"geocode_{workers}_{hedge_after}.sqlite3"))
+    geocoder = LocationGeocoder(cache=cache, providers=make_providers(servers),
+                                max_workers=workers, hedge_after=hedge_after)
+    locations = [{"name": f"Place {i}", "address": address} for i, address in enumerate(addresses)]
+    start = time.perf_counter()
+    result = geocoder.geocode_locations(locations)
+    elapsed = time.perf_counter() - start
+
+    wrong = sum(
+        1 for location in result
+        if "latitude" in location
+        and max(abs(a - b) for a, b in zip((location["latitude"], location["longitude"]),
+                                           coords_for(location["address"]))) > 1e-6
+    )
+    found = sum("latitude" in location for location in result)
+    violations = {}
+    for name, log in logs.items():
+        gaps = [b - a for a, b in zip(sorted(log), sorted(log)[1:])]
+        # Gaps are measured on arrival, so allow for connection and scheduling jitter
+        violations[name] = sum(gap < STAND_INS[name][0] - 0.03 for gap in gaps)
+    requests = {name: len(log) for name, log in logs.items()}
+    return elapsed, found, wrong, requests, violations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--addresses", type=int, default=60)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--hedge-after", type=float, default=0.3)
+    args = parser.parse_args()
+
+    addresses = [f"{n} Rue de la Liberté, Tunis" for n in range(1, args.addresses + 1)]
+    servers, logs = start_stand_ins()
+    with tempfile.TemporaryDirectory() as cache_dir:
+        for label, workers, hedge in [("sequential", 1, None),
+                                      ("concurrent", args.workers, None),
+                                      ("concurrent+hedge", args.workers, args.hedge_after)]:
+            elapsed, found, wrong, requests, violations = run(servers, logs, addresses, workers, hedge, cache_dir)
+            print(f"{label:17s} {elapsed:6.2f}s  found {found}/{len(addresses)}  wrong {wrong}  "
+                  f"requests {requests}  budget violations {violations}")
+        ok = check_negative_caching(cache_dir)
+    for server in servers.values():
+        server.shutdown()
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Benchmark for CV/legacy name validation.
+
+Builds synthetic directory names (French, English and Arabic association
+names), a CV-side list made of OCR-like noisy copies, and validates every
+legacy name against the CV names with NameIndex. The previous pairwise
+SequenceMatcher loop is timed on a sample of legacy names and extrapolated,
+and both decisions (ratio > threshold) are compared on that sample.
+
+The equivalence check then compares every keep/drop decision with the
+pairwise loop (over the same normalized names) on short names, acronyms
+and OCR-noisy variants, where n-gram blocking finds the fewest shared keys.
+Any disagreement is a bug.
+
+    python benchmarks/bench_name_matching.py --names 10000 --sample 100
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from difflib import SequenceMatcher
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scraper.name_index import NameIndex, normalize_name  # noqa: E402
+
+THRESHOLD = 0.6
+PREFIXES = ["Association", "Club", "Société", "Centre", "Fondation", "Union", "جمعية", "نادي"]
+WORDS = ["sportive", "culturelle", "des jeunes", "de Tunis", "de Sfax", "El Amal", "Ennour",
+         "pour le développement", "Green", "Solidarité", "Avenir", "الأمل", "التنمية", "الشباب",
+         "Méditerranée", "Carthage", "Sahel", "Djerba", "Bizerte", "Kairouan"]
+OCR_CONFUSIONS = {"o": "0", "l": "1", "e": "é", "i": "l", "a": "à", "s": "5", "ا": "أ", "ه": "ة"}
+SYLLABLES = ["ba", "ra", "ki", "mo", "nou", "sal", "ha", "zi", "fer", "lem", "tar", "dou", "sen", "ja"]
+
+
+def make_names(count, rng):
+    names = set()
+    while len(names) < count:
+        coined = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).capitalize()
+        parts = [rng.choice(PREFIXES), coined] + rng.sample(WORDS, rng.randint(0, 2))
+        names.add(" ".join(parts))
+    return sorted(names)
+
+
+def ocr_noise(name, rng):
+    chars = list(name)
+    for i, ch in enumerate(chars):
+        if ch in OCR_CONFUSIONS and rng.random() < 0.1:
+            chars[i] = OCR_CONFUSIONS[ch]
+    if rng.random() < 0.3:
+        chars.insert(rng.randrange(len(chars) + 1), " ")
+    return "".join(chars).upper() if rng.random() < 0.2 else "".join(chars)
+
+
+def pairwise_best(legacy_name, cv_names):
+    best = 0
+    for cv_name in cv_names:
+        ratio = SequenceMatcher(None, legacy_name.lower(), cv_name).ratio()
+        if ratio > best:
+            best = ratio
+    return best
+
+
+def normalized_pairwise_best(name, normalized_names):
+    """The pairwise loop on normalized names, as NameIndex scores them."""
+    query = normalize_name(name)
+    if query in normalized_names:
+        return 1.0
+    return max((SequenceMatcher(None, query, other).ratio() for other in normalized_names), default=0.0)
+
+
+def make_short_names(count, rng):
+    """Acronyms (ATB, A.T.B, S.T.E.G), short words and one-letter OCR slips."""
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    names = []
+    for _ in range(count):
+        word = "".join(rng.choice(letters) for _ in range(rng.randint(2, 6)))
+        kind = rng.random()
+        if kind < 0.3:
+            word = word.upper()
+        elif kind < 0.5:
+            word = ".".join(word.upper()) + rng.choice(["", "."])
+        elif kind < 0.6:
+            word = f"{word} {rng.choice(letters)}{rng.choice(letters)}"
+        names.append(word)
+    return names
+
+
+def check_equivalence(rng, index_size=1000, queries=3000):
+    """Keep/drop decisions of NameIndex and the pairwise loop on short names."""
+    indexed = make_short_names(index_size, rng)
+    names = make_short_names(queries // 2, rng)
+    # Half the queries are noisy copies of indexed names: one letter changed or dotted
+    for name in rng.choices(indexed, k=queries - len(names)):
+        chars = list(name)
+        i = rng.randrange(len(chars))
+        chars[i] = rng.choice("abcdefghijklmnopqrstuvwxyz.") if chars[i].isalpha() else chars[i]
+        names.append("".join(chars))
+    index = NameIndex(indexed)
+    normalized = {normalize_name(name) for name in indexed} - {""}
+    mismatches = [name for name in names
+                  if (index.best_match(name, THRESHOLD)[0] > THRESHOLD)
+                  != (normalized_pairwise_best(name, normalized) > THRESHOLD)]
+    return len(names), mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--names", type=int, default=10000)
+    parser.add_argument("--sample", type=int, default=100, help="legacy names timed with the pairwise loop")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    legacy = make_names(args.names, rng)
+    # Most legacy names were seen by CV (noisily); the rest are unrelated
+    cv = [ocr_noise(name, rng) for name in legacy if rng.random() < 0.8]
+    cv += make_names(args.names - len(cv), random.Random(args.seed + 1))
+
+    start = time.perf_counter()
+    index = NameIndex(cv)
+    build = time.perf_counter() - start
+
+    start = time.perf_counter()
+    indexed = [index.best_match(name, THRESHOLD)[0] for name in legacy]
+    query = time.perf_counter() - start
+    kept = sum(ratio > THRESHOLD for ratio in indexed)
+
+    sample = rng.sample(range(len(legacy)), min(args.sample, len(legacy)))
+    cv_lower = {name.strip().lower() for name in cv}
+    start = time.perf_counter()
+    pairwise = {i: pairwise_best(legacy[i], cv_lower) for i in sample}
+    pairwise_time = (time.perf_counter() - start) / len(sample) * len(legacy)
+    agree = sum((pairwise[i] > THRESHOLD) == (indexed[i] > THRESHOLD) for i in sample)
+
+    print(f"{len(legacy)} legacy x {len(cv)} CV names")
+    print(f"NameIndex:  build {build:.2f}s, query {query:.2f}s "
+          f"({query / len(legacy) * 1e6:.0f} us/name), kept {kept}")
+    print(f"Pairwise:   ~{pairwise_time:.1f}s extrapolated from {len(sample)} names")
+    print(f"Decisions agree on {agree}/{len(sample)} sampled names")
+
+    checked, mismatches = check_equivalence(rng)
+    print(f"Short-name equivalence with the pairwise loop: {checked - len(mismatches)}/{checked} decisions agree"
+          + (f", differing on e.g. {mismatches[:5]}" if mismatches else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Per-call OCR latency: pytesseract subprocess vs. the pooled engine.
+
+Uses the given image (or a synthetic card with contact text) and runs the
+same call repeatedly through both paths. The pooled path's first call, which
+initializes the engine, is reported separately.
+
+    python benchmarks/bench_ocr_engine.py --runs 20 --lang ara+fra+eng [image.png]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import cv2
+import numpy as np
+import pytesseract
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scraper import ocr_engine  # noqa: E402
+
+CONFIG = "--oem 3 --psm 6"
+
+
+def synthetic_card():
+    img = np.full((220, 900, 3), 255, dtype=np.uint8)
+    lines = ["Association Tunisienne de Recherche", "Tel: 71 123 456  Email: contact@atr.org.tn",
+             "12 Rue de Marseille, 1000 Tunis"]
+    for i, line in enumerate(lines):
+        cv2.putText(img, line, (20, 60 + i * 60), cv2.FONT_HERSHEY_SIMPLEX, 1.0, (0, 0, 0), 2)
+    return img
+
+
+def timed(fn, runs):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("image", nargs="?")
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--lang", default="ara+fra+eng")
+    args = parser.parse_args()
+
+    img = cv2.imread(args.image) if args.image else synthetic_card()
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+
+    subprocess_ms = timed(lambda: pytesseract.image_to_string(gray, lang=args.lang, config=CONFIG), args.runs)
+    first_ms = timed(lambda: ocr_engine.image_to_string(gray, lang=args.lang, config=CONFIG), 1)[0]
+    pooled_ms = timed(lambda: ocr_engine.image_to_string(gray, lang=args.lang, config=CONFIG), args.runs)
+
+    print(f"image {gray.shape[1]}x{gray.shape[0]}, lang={args.lang}, pooled backend: {ocr_engine.backend()}")
+    print(f"pytesseract subprocess: median {statistics.median(subprocess_ms):.1f} ms, min {min(subprocess_ms):.1f} ms")
+    print(f"pooled engine (init):   {first_ms:.1f} ms")
+    print(f"pooled engine:          median {statistics.median(pooled_ms):.1f} ms, min {min(pooled_ms):.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Checks for prompt compilation against a local stand-in LLM.
+
+Starts a local HTTP server answering like Ollama's /api/generate, points
+prompt_compiler at it and checks that:
+
+    - keyword prompts are compiled locally, without any HTTP call
+    - a prompt without keywords is sent to the LLM once; the same prompt again
+      (differently cased or spaced, or from a new PlanCache on the same file)
+      is a plan cache hit
+    - a hanging LLM is given up on after LLM_TIMEOUT and the default plan is used
+    - an LLM that is down or failing gives the default plan, which is not cached
+
+    python benchmarks/bench_prompt_compiler.py
+"""
+import argparse
+import json
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scraper import prompt_compiler  # noqa: E402
+from scraper.prompt_compiler import LLM_TIMEOUT, PlanCache, compile_prompt  # noqa: E402
+
+KEYWORD_PROMPT = "Get the name, phone and email of every association"
+LLM_PROMPT = "Qui dirige ces organisations ?"
+LLM_ANSWER = 'Sure: {"name": true, "phone": true, "email": false, "address": true, "domain": false, "poste": true}'
+
+
+class StandInServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+
+def make_handler(mode, requests_log):
+    """mode["value"]: "ok" answers LLM_ANSWER, "hang" never answers in time, "error" returns 500."""
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            requests_log.append(body.get("prompt", ""))
+            if mode["value"] == "hang":
+                time.sleep(LLM_TIMEOUT + 5)
+            status = 500 if mode["value"] == "error" else 200
+            payload = json.dumps({"model": body.get("model"), "response": LLM_ANSWER, "done": True}).encode()
+            try:
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+            except OSError:
+                pass  # the client gave up
+
+    return Handler
+
+
+def unused_url():
+    """URL of a local port nothing listens on."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    return f"http://127.0.0.1:{port}/api/generate"
+
+
+def check(results, name, ok, detail=""):
+    results.append(ok)
+    print(f"{'PASS' if ok else 'FAIL'}  {name}" + (f"  ({detail})" if detail else ""))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--skip-hang", action="store_true", help=f"skip the {LLM_TIMEOUT}s timeout check")
+    args = parser.parse_args()
+
+    mode, requests_log = {"value": "ok"}, []
+    server = StandInServer(("127.0.0.1", 0), make_handler(mode, requests_log))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    prompt_compiler.LLM_URL = f"http://127.0.0.1:{server.server_address[1]}/api/generate"
+    results = []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache_path = os.path.join(tmp, "prompt_plans.json")
+        cache = PlanCache(cache_path)
+
+        plan = compile_prompt(KEYWORD_PROMPT, cache=cache)
+        check(results, "keyword prompt compiled without calling the LLM",
+              plan["source"] == "keywords" and not requests_log, f"{plan['fields']}, {len(requests_log)} calls")
+
+        plan = compile_prompt(LLM_PROMPT, cache=cache)
+        check(results, "prompt without keywords sent to the LLM once",
+              plan["source"] == "llm" and plan["fields"] == ["name", "phone", "address", "poste"]
+              and len(requests_log) == 1, f"{plan['fields']}, {len(requests_log)} calls")
+
+        start = time.perf_counter()
+        again = compile_prompt(f"  {LLM_PROMPT.upper()} ", cache=cache)
+        hit_time = time.perf_counter() - start
+        check(results, "same prompt again is a plan cache hit",
+              again == plan and len(requests_log) == 1, f"{hit_time * 1000:.2f} ms")
+
+        persisted = compile_prompt(LLM_PROMPT, cache=PlanCache(cache_path))
+        check(results, "plan persisted for a new cache on the same file",
+              persisted == plan and len(requests_log) == 1)
+
+        mode["value"] = "error"
+        plan = compile_prompt("Montrez-moi les responsables", cache=cache)
+        check(results, "failing LLM falls back to the default plan",
+              plan["source"] == "default" and plan["fields"] == ["name"] and len(requests_log) == 2)
+
+        prompt_compiler.LLM_URL = unused_url()
+        start = time.perf_counter()
+        plan = compile_prompt("Montrez-moi les responsables", cache=cache)
+        down_time = time.perf_counter() - start
+        check(results, "LLM down falls back to the default plan",
+              plan["source"] == "default" and len(requests_log) == 2, f"{down_time:.2f}s")
+
+        if not args.skip_hang:
+            mode["value"] = "hang"
+            prompt_compiler.LLM_URL = f"http://127.0.0.1:{server.server_address[1]}/api/generate"
+            start = time.perf_counter()
+            plan = compile_prompt("Montrez-moi les responsables", cache=cache)
+            hang_time = time.perf_counter() - start
+            # The default plan was not cached, so the prompt reaches the LLM again
+            check(results, f"hanging LLM given up on after LLM_TIMEOUT ({LLM_TIMEOUT}s)",
+                  plan["source"] == "default" and len(requests_log) == 3
+                  and LLM_TIMEOUT <= hang_time < LLM_TIMEOUT + 2,
+                  f"{hang_time:.2f}s")
+
+    server.shutdown()
+    print(f"{sum(results)}/{len(results)} checks passed")
+    sys.exit(0 if all(results) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,23 @@
 #!/usr/bin/env python
 import argparse
 import json
-import torch
 import logging
-import pandas as pd
 import requests
 import threading
 from flask import Flask, render_template, request, Response, stream_with_context, jsonify, send_file
-from scraper import qa_model, crawler
-from scraper.data_clean import categorize_data, save_categorized_data
+from scraper import crawler, inference_server
+from scraper.data_clean import StreamingCategorizer, write_records
+from scraper.data_clean import columnar
 from scraper.utils import save_results
-from scraper.geocoder import geocode_locations_data
+from scraper.geocoder import dedup_stats
+from scraper.gazetteer import PRECISIONS
+from scraper.enrichment import start_enrichment
+from scraper.geocode_cache import geocode_cache
 from scraper.cv_scraper import cv_crawl_site
+from scraper.models import registry
+from scraper import adaptive_ocr, ocr_engine
+from scraper.ocr_cache import ocr_cache
+from scraper.detector import card_detector
 import sys
 import os
 
@@ -25,42 +31,29 @@ app = Flask(__name__)
 raw_data = []
 contact_data = []
 location_data = []
-geocoded_location_data = []
+location_job = None  # Background geocoding of location_data (see enrich_locations)
 
 def update_global_data(result, workflow_id):
     """Update the global data variables with new scraped data"""
-    global raw_data, contact_data, location_data, geocoded_location_data
+    global raw_data, contact_data, location_data
     
-    # Convert result to DataFrame
-    df = pd.DataFrame(result)
-    
-    # Categorize the data
-    raw_df, contact_df, location_df = categorize_data(df)
-    
-    # Update global variables
-    raw_data = raw_df.to_dict(orient='records')
-    contact_data = contact_df.to_dict(orient='records')
-    location_data = location_df.to_dict(orient='records')
-    
-    # Geocode the location data
-    geocoded_location_data = geocode_locations_data(location_data)
-    
-    # Save to workflow-specific CSV files
+    # Categorize the data in chunks, appending each chunk to the
+    # workflow-specific CSV files as it is categorized
     output_dir = os.path.join("output", f"workflow_{workflow_id}")
-    os.makedirs(output_dir, exist_ok=True)
-    
-    raw_file = os.path.join(output_dir, "raw_data.csv")
-    contact_file = os.path.join(output_dir, "contact_data.csv")
-    location_file = os.path.join(output_dir, "location_data.csv")
+    columns = list(dict.fromkeys(key for record in result for key in record))
+    with StreamingCategorizer(output_dir, columns=columns, keep_records=True) as categorizer:
+        categorizer.add(result)
     
-    raw_df.to_csv(raw_file, index=False)
-    contact_df.to_csv(contact_file, index=False)
-    location_df.to_csv(location_file, index=False)
+    # Update global variables
+    raw_data = categorizer.raw_records
+    contact_data = categorizer.contact_records
+    location_data = categorizer.location_records
     
+    raw_file = categorizer.path("raw")
     logger.info(f"Saved data to {output_dir}/")
-    logger.info(f"- raw_data.csv: {len(raw_df)} rows")
-    logger.info(f"- contact_data.csv: {len(contact_df)} rows")
-    logger.info(f"- location_data.csv: {len(location_df)} rows")
+    logger.info(f"- raw_data.csv: {categorizer.counts['raw']} rows")
+    logger.info(f"- contact_data.csv: {categorizer.counts['contact']} rows")
+    logger.info(f"- location_data.csv: {categorizer.counts['location']} rows")
     
     return raw_file
 
@@ -81,7 +74,7 @@ def send_webhook(workflow_id, status, data=None, error=None):
         }
         
         # Add number of rows and CSV file path if data exists
-        if data and isinstance(data, dict):
+        if data and isinstance(data, dict) and "raw_results" in data:
             webhook_data["data"]["extracted_rows"] = len(data.get("raw_results", []))
             webhook_data["data"]["output_file"] = os.path.join("output", f"workflow_{workflow_id}", "raw_data.csv")
             
@@ -102,13 +95,41 @@ def send_webhook(workflow_id, status, data=None, error=None):
         logger.error(f"Error type: {type(e)}")
         logger.error(f"Error details: {e.__dict__ if hasattr(e, '__dict__') else 'No details available'}")
 
-def process_scraping(start_url, prompt, qa_pipe, crawl_detail, workflow_id, scraping_method='legacy'):
+def enrich_locations(workflow_id, geocode_precision=None):
+    """Geocode location_data in the background; LOCATION_ENRICHED is sent when done"""
+    global location_job
+
+    def on_complete(job):
+        # Rewrite the columnar location output with the coordinates
+        records = job.snapshot()
+        columns = list(dict.fromkeys([key for record in records for key in record] + columnar.LOCATION_COLUMNS))
+        try:
+            write_records(records, os.path.join("output", f"workflow_{workflow_id}", "location_data"), columns)
+        except Exception as e:
+            logger.error(f"Error writing enriched location data for workflow {workflow_id}: {e}")
+        send_webhook(
+            workflow_id=workflow_id,
+            status="LOCATION_ENRICHED",
+            data={
+                "location_results": job.snapshot(),
+                "enrichment": job.progress()
+            },
+            error=job.error
+        )
+
+    location_job = start_enrichment(workflow_id, location_data, precision=geocode_precision,
+                                    on_complete=on_complete)
+
+def process_scraping(start_url, prompt, qa_pipe, crawl_detail, workflow_id, scraping_method='legacy',
+                     cv_gated=False, geocode_precision=None):
     """Process scraping in a separate thread"""
     logger.info(f"Starting scraping process for workflow {workflow_id}", {
         "url": start_url,
         "prompt": prompt,
         "crawl_detail": crawl_detail,
-        "method": scraping_method
+        "method": scraping_method,
+        "cv_gated": cv_gated,
+        "geocode_precision": geocode_precision
     })
     
     try:
@@ -119,7 +140,8 @@ def process_scraping(start_url, prompt, qa_pipe, crawl_detail, workflow_id, scra
                 start_url=start_url,
                 prompt=prompt,
                 qa_pipe=qa_pipe,
-                crawl_detail=crawl_detail
+                crawl_detail=crawl_detail,
+                gated=cv_gated
             )
         else:
             # Legacy scraping method
@@ -155,7 +177,8 @@ def process_scraping(start_url, prompt, qa_pipe, crawl_detail, workflow_id, scra
         logger.info(f"Updating global data for workflow {workflow_id}")
         update_global_data(result, workflow_id)
         
-        # Send success webhook
+        # Send success webhook; locations are geocoded afterwards
+        # and sent with LOCATION_ENRICHED
         logger.info(f"Sending success webhook for workflow {workflow_id}")
         send_webhook(
             workflow_id=workflow_id,
@@ -163,10 +186,12 @@ def process_scraping(start_url, prompt, qa_pipe, crawl_detail, workflow_id, scra
             data={
                 "raw_results": raw_data,
                 "contact_results": contact_data,
-                "location_results": geocoded_location_data
+                "location_results": location_data
             }
         )
         
+        enrich_locations(workflow_id, geocode_precision)
+        
     except Exception as e:
         logger.error(f"Error during scraping for workflow {workflow_id}: {str(e)}")
         logger.error(f"Error type: {type(e)}")
@@ -201,10 +226,17 @@ def scrape():
         "method": scraping_method
     })
     
+    # Enrichment runs after COMPLETED is sent, so reject a bad precision up front
+    geocode_precision = data.get('geocode_precision')
+    if geocode_precision and geocode_precision not in PRECISIONS:
+        return jsonify({
+            "error": f"Invalid geocode_precision {geocode_precision!r}, expected one of {list(PRECISIONS)}"
+        }), 400
+    
     try:
-        # Load QA model
-        logger.info(f"Loading QA model for workflow {workflow_id}")
-        qa_pipe = qa_model.load_model()
+        # Use the shared inference worker so concurrent workflows batch together
+        logger.info(f"Connecting to inference worker for workflow {workflow_id}")
+        qa_pipe = get_inference_client()
         
         # Start scraping in a separate thread
         thread = threading.Thread(
@@ -215,7 +247,9 @@ def scrape():
                 qa_pipe,
                 data.get('crawl_detail', False),
                 workflow_id,
-                scraping_method
+                scraping_method,
+                data.get('cv_gated', False),
+                geocode_precision
             )
         )
         thread.start()
@@ -263,6 +297,30 @@ def get_raw_data_csv(workflow_id):
         logger.error(f"Error downloading CSV file: {e}")
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/data/<any(raw, contact, location):kind>/<any(parquet, arrow):fmt>/<workflow_id>', methods=['GET'])
+def export_columnar_data(kind, fmt, workflow_id):
+    """Download a workflow's data as Parquet or Arrow IPC, served from a memory map of the file"""
+    try:
+        extension, mimetype = columnar.FORMATS[fmt]
+        path = os.path.join("output", f"workflow_{workflow_id}", f"{kind}_data{extension}")
+        if not os.path.exists(path):
+            return jsonify({"error": f"{fmt} file not found"}), 404
+            
+        # Map the file before answering: enrichment may replace it meanwhile,
+        # and the length must be that of the bytes actually sent
+        mapped = columnar.open_mapped(path)
+        return Response(
+            columnar.iter_mapped(mapped),
+            mimetype=mimetype,
+            headers={
+                "Content-Length": str(len(mapped)),
+                "Content-Disposition": f"attachment; filename={kind}_data_workflow_{workflow_id}{extension}"
+            }
+        )
+    except Exception as e:
+        logger.error(f"Error exporting {fmt} file: {e}")
+        return jsonify({"error": str(e)}), 500
+
 @app.route('/api/data/contact', methods=['GET'])
 def get_contact_data():
     """Get data with valid contact information"""
@@ -274,9 +332,9 @@ def get_contact_data():
 
 @app.route('/api/data/location', methods=['GET'])
 def get_location_data():
-    """Get data with valid location information"""
+    """Get data with valid location information, with the coordinates geocoded so far"""
     try:
-        return jsonify(geocoded_location_data)
+        return jsonify(location_job.snapshot() if location_job else location_data)
     except Exception as e:
         logger.error(f"Error getting location data: {e}")
         return jsonify({"error": str(e)}), 500
@@ -288,27 +346,98 @@ def get_data_stats():
         stats = {
             "raw": len(raw_data),
             "contact": len(contact_data),
-            "location": len(location_data)
+            "location": len(location_data),
+            "location_enrichment": location_job.progress() if location_job else None
         }
         return jsonify(stats)
     except Exception as e:
         logger.error(f"Error getting data stats: {e}")
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/ocr/stats', methods=['GET'])
+def get_ocr_stats():
+    """Report OCR engine latency, adaptive preprocessing stage timings and cache hit rates"""
+    try:
+        return jsonify({
+            "engine": ocr_engine.latency_stats(),
+            "preprocessing": adaptive_ocr.stats(),
+            "cache": ocr_cache.stats()
+        })
+    except Exception as e:
+        logger.error(f"Error getting OCR stats: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/detector/stats', methods=['GET'])
+def get_detector_stats():
+    """Report card detector batch sizes and per-batch latency"""
+    try:
+        return jsonify(card_detector.stats())
+    except Exception as e:
+        logger.error(f"Error getting detector stats: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/geocode/stats', methods=['GET'])
+def get_geocode_stats():
+    """Report persistent geocode cache hits, negative hits and misses, and the batch dedup ratio"""
+    try:
+        stats = geocode_cache.stats()
+        stats["dedup"] = dedup_stats()
+        return jsonify(stats)
+    except Exception as e:
+        logger.error(f"Error getting geocode stats: {e}")
+        return jsonify({"error": str(e)}), 500
+
+def get_inference_client():
+    return inference_server.get_client(
+        max_batch_size=app.config.get('INFERENCE_BATCH_SIZE', inference_server.DEFAULT_MAX_BATCH_SIZE),
+        max_latency=app.config.get('INFERENCE_MAX_LATENCY', inference_server.DEFAULT_MAX_LATENCY)
+    )
+
+@app.route('/api/warmup', methods=['POST'])
+def warmup_models():
+    """Load models ahead of the first workflow and report their load stats"""
+    try:
+        data = request.get_json(silent=True) or {}
+        requested = data.get('models') or (list(inference_server.WORKER_MODELS) + registry.names())
+        worker_models = [m for m in requested if m in inference_server.WORKER_MODELS]
+        local_models = [m for m in requested if m not in inference_server.WORKER_MODELS]
+        
+        stats = {"worker": {}, "local": {}}
+        if worker_models:
+            stats["worker"] = get_inference_client().warmup(worker_models)
+        if local_models:
+            stats["local"] = registry.warmup(local_models)
+        return jsonify(stats)
+    except Exception as e:
+        logger.error(f"Error warming up models: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/models', methods=['GET'])
+def get_model_stats():
+    """Report which models are loaded, how long they took and their memory cost"""
+    try:
+        stats = {"local": registry.stats(), "worker": {}}
+        client = inference_server.get_running_client()
+        if client is not None:
+            stats["worker"] = client.model_stats()
+        return jsonify(stats)
+    except Exception as e:
+        logger.error(f"Error getting model stats: {e}")
+        return jsonify({"error": str(e)}), 500
+
 def main():
-    # Check CUDA availability
-    if torch.cuda.is_available():
-        logger.info(f"CUDA is available. Using GPU: {torch.cuda.get_device_name(0)}")
-        logger.info(f"CUDA version: {torch.version.cuda}")
-        logger.info(f"GPU Memory: {torch.cuda.get_device_properties(0).total_memory / 1024**3:.2f} GB")
-    else:
-        logger.warning("CUDA is not available. Using CPU.")
-    
     parser = argparse.ArgumentParser(description="Prompt-Guided Multimodal Web Scraper")
     parser.add_argument("--host", default="127.0.0.1", help="Host to run the server on")
     parser.add_argument("--port", type=int, default=8080, help="Port to run the server on")
+    parser.add_argument("--inference-batch-size", type=int, default=inference_server.DEFAULT_MAX_BATCH_SIZE,
+                        help="Largest micro-batch the inference worker runs")
+    parser.add_argument("--inference-max-latency-ms", type=float, default=inference_server.DEFAULT_MAX_LATENCY * 1000,
+                        help="How long a request may wait for batch-mates, in milliseconds")
     args = parser.parse_args()
 
+    app.config['INFERENCE_BATCH_SIZE'] = args.inference_batch_size
+    app.config['INFERENCE_MAX_LATENCY'] = args.inference_max_latency_ms / 1000
+
     try:
         app.run(host=args.host, port=args.port, debug=True)
     except OSError as e:
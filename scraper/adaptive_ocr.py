@@ -0,0 +1,245 @@
+"""
+Confidence-driven OCR preprocessing.
+
+Every region starts with the cheapest pipeline (plain grayscale). The word
+confidences Tesseract reports decide whether to escalate: a region whose
+mean confidence is below the threshold is retried with the next, heavier
+stage, and the best-scoring reading wins.
+
+    gray     grayscale only
+    otsu     Otsu binarization
+    denoise  CLAHE + non-local-means denoising
+    upscale  2x cubic upscale of the denoised image
+    sparse   denoised image with PSM 11 (sparse text) instead of the given PSM
+
+Page-size inputs (full screenshots and their bands, larger than PAGE_AREA)
+are not escalated as a whole: images and backgrounds produce junk words that
+keep a page's mean confidence low. They are read once in grayscale, line by
+line. Only groups of adjacent lines below the threshold, within one column,
+are cropped and escalated as their own regions (without the sparse stage,
+which is meant for whole pages of scattered text). Other lines reaching into
+a crop are painted over first, so each line is read exactly once.
+
+Time spent per stage and the escalation rate are aggregated by record() and
+reported by stats().
+"""
+import logging
+import re
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from . import ocr_engine
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+STAGES = ("gray", "otsu", "denoise", "upscale", "sparse")
+CONFIDENCE_THRESHOLD = 60.0
+BLANK_STDDEV = 4.0  # flat regions have no text worth escalating for
+PAGE_AREA = 1200 * 1200  # pixels; larger inputs are escalated line by line
+LINE_STAGES = ("otsu", "denoise", "upscale")
+LINE_PADDING = 4
+MAX_REGION_HEIGHT = 300  # pixels; runs of low-confidence lines are split past this
+LINE_GAP = 12  # pixels; lines further apart are escalated as separate regions
+
+_stats_lock = threading.Lock()
+_stats = {"regions": 0, "escalated": 0, "stages": {}, "accepted": {}}
+
+
+def _denoised(gray, cache):
+    if "denoise" not in cache:
+        clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
+        cache["denoise"] = cv2.fastNlMeansDenoising(clahe.apply(gray))
+    return cache["denoise"]
+
+
+def _prepare(stage, gray, config, cache):
+    """Return (image, config) for a stage."""
+    if stage == "gray":
+        return gray, config
+    if stage == "otsu":
+        return cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)[1], config
+    if stage == "denoise":
+        return _denoised(gray, cache), config
+    if stage == "upscale":
+        return cv2.resize(_denoised(gray, cache), None, fx=2, fy=2, interpolation=cv2.INTER_CUBIC), config
+    if stage == "sparse":
+        sparse_config = re.sub(r"--psm\s+\d+", "", config) + " --psm 11"
+        return _denoised(gray, cache), sparse_config.strip()
+    raise ValueError(f"Unknown OCR stage: {stage}")
+
+
+def run(image, lang: str = "eng", config: str = "", threshold: float = CONFIDENCE_THRESHOLD,
+        stages=STAGES) -> Tuple[str, Dict]:
+    """
+    OCR an image, escalating through the stages until the mean word
+    confidence reaches threshold.
+
+    Returns:
+        tuple: (text of the best reading, report for record())
+    """
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+    report = {"stages": [], "accepted": None, "confidence": 0.0}
+    best_text, best_conf = "", -1.0
+    cache = {}
+
+    for idx, stage in enumerate(stages):
+        start = time.perf_counter()
+        prepared, stage_config = _prepare(stage, gray, config, cache)
+        text, confidences = ocr_engine.image_to_data(prepared, lang=lang, config=stage_config)
+        mean_conf = sum(confidences) / len(confidences) if confidences else 0.0
+        report["stages"].append((stage, time.perf_counter() - start))
+
+        if mean_conf > best_conf:
+            best_text, best_conf = text, mean_conf
+            report["accepted"] = stage
+        if best_conf >= threshold:
+            break
+        if idx == 0 and not confidences and float(gray.std()) < BLANK_STDDEV:
+            break
+
+    report["confidence"] = round(best_conf, 1)
+    return best_text, report
+
+
+def _beside(box, other):
+    """Whether two (x1, y1, x2, y2) boxes share rows but no columns."""
+    return box[1] < other[3] and other[1] < box[3] and (box[2] <= other[0] or other[2] <= box[0])
+
+
+def _low_regions(lines, threshold, shape):
+    """
+    Group low-confidence lines into padded (y1, y2, x1, x2, line indices) regions.
+
+    Lines are grouped by position, not reading order: a line joins a region it
+    is vertically adjacent to (within LINE_GAP) and shares most of its width
+    with, unless it sits beside one of the region's lines, which means another
+    column. Regions stay under MAX_REGION_HEIGHT.
+    """
+    low = sorted((idx for idx, line in enumerate(lines) if line[1] < threshold), key=lambda idx: lines[idx][2][1])
+    regions = []  # [y1, y2, x1, x2, [indices]]
+    for idx in low:
+        x1, y1, x2, y2 = lines[idx][2]
+        for region in reversed(regions):
+            overlap = min(x2, region[3]) - max(x1, region[2])
+            if (y1 <= region[1] + LINE_GAP
+                    and overlap >= 0.5 * min(x2 - x1, region[3] - region[2])
+                    and max(region[1], y2) - min(region[0], y1) <= MAX_REGION_HEIGHT
+                    and not any(_beside(lines[member][2], (x1, y1, x2, y2)) for member in region[4])):
+                region[0], region[1] = min(region[0], y1), max(region[1], y2)
+                region[2], region[3] = min(region[2], x1), max(region[3], x2)
+                region[4].append(idx)
+                break
+        else:
+            regions.append([y1, y2, x1, x2, [idx]])
+    height, width = shape[:2]
+    return [(max(0, y1 - LINE_PADDING), min(height, y2 + LINE_PADDING),
+             max(0, x1 - LINE_PADDING), min(width, x2 + LINE_PADDING), sorted(indices))
+            for y1, y2, x1, x2, indices in regions]
+
+
+def _region_image(gray, lines, y1, y2, x1, x2, indices):
+    """
+    The region's crop with every other line that reaches into it painted over
+    with the background, so the escalated reading holds only the region's lines.
+    """
+    region = gray[y1:y2, x1:x2]
+    members = set(indices)
+    others = [box for idx, (_, _, box) in enumerate(lines)
+              if idx not in members and box[0] < x2 and x1 < box[2] and box[1] < y2 and y1 < box[3]]
+    if not others:
+        return region
+    region = region.copy()
+    background = int(np.median(region))
+    for bx1, by1, bx2, by2 in others:
+        region[max(0, by1 - y1):max(0, by2 - y1), max(0, bx1 - x1):max(0, bx2 - x1)] = background
+    return region
+
+
+def run_lines(image, lang: str = "eng", config: str = "", threshold: float = CONFIDENCE_THRESHOLD,
+              stages=LINE_STAGES) -> Tuple[str, List[Dict]]:
+    """
+    OCR a page-size image in grayscale, escalating only low-confidence lines.
+
+    Returns:
+        tuple: (text, one report per region for record(): the page, then each
+            escalated region)
+    """
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+    start = time.perf_counter()
+    lines = ocr_engine.image_to_lines(gray, lang=lang, config=config)
+    confidences = [conf for _, conf, _ in lines]
+    page_report = {
+        "stages": [("gray", time.perf_counter() - start)],
+        "accepted": "gray",
+        "confidence": round(sum(confidences) / len(confidences), 1) if confidences else 0.0
+    }
+    texts = [text for text, _, _ in lines]
+    reports = [page_report]
+
+    for y1, y2, x1, x2, indices in _low_regions(lines, threshold, gray.shape):
+        region = _region_image(gray, lines, y1, y2, x1, x2, indices)
+        if region.size == 0 or float(region.std()) < BLANK_STDDEV:
+            continue
+        text, report = run(region, lang, config, threshold, stages)
+        report["escalated"] = True  # its first stage is already an escalation
+        reports.append(report)
+        if report["confidence"] > max(lines[idx][1] for idx in indices) and text.strip():
+            # The reading covers exactly the region's lines: it takes the
+            # place of the first of them in reading order
+            texts[indices[0]] = text.strip()
+            for idx in indices[1:]:
+                texts[idx] = ""
+    return "\n".join(text for text in texts if text), reports
+
+
+def record(report: Optional[Dict]):
+    """Aggregate one region's report into the module statistics."""
+    if not report:
+        return
+    with _stats_lock:
+        _stats["regions"] += 1
+        if report.get("escalated", len(report["stages"]) > 1):
+            _stats["escalated"] += 1
+        for stage, seconds in report["stages"]:
+            entry = _stats["stages"].setdefault(stage, {"runs": 0, "seconds": 0.0})
+            entry["runs"] += 1
+            entry["seconds"] += seconds
+        if report["accepted"]:
+            _stats["accepted"][report["accepted"]] = _stats["accepted"].get(report["accepted"], 0) + 1
+
+
+def ocr(image, lang: str = "eng", config: str = "", threshold: float = CONFIDENCE_THRESHOLD) -> str:
+    """run() (run_lines() for page-size images) + record() for callers in this process."""
+    if image.shape[0] * image.shape[1] > PAGE_AREA:
+        text, reports = run_lines(image, lang, config, threshold)
+    else:
+        text, report = run(image, lang, config, threshold)
+        reports = [report]
+    for report in reports:
+        record(report)
+    return text
+
+
+def stats() -> Dict:
+    """Per-stage time, accepted-stage counts and escalation rate."""
+    with _stats_lock:
+        regions = _stats["regions"]
+        return {
+            "regions": regions,
+            "escalation_rate": round(_stats["escalated"] / regions, 3) if regions else 0.0,
+            "stages": {
+                stage: {
+                    "runs": entry["runs"],
+                    "total_seconds": round(entry["seconds"], 3),
+                    "mean_ms": round(entry["seconds"] / entry["runs"] * 1000, 1)
+                }
+                for stage, entry in _stats["stages"].items()
+            },
+            "accepted": dict(_stats["accepted"])
+        }
@@ -32,46 +32,107 @@ def init_driver():
     })
     return driver
 
+# Viewport-relative rects (CSS px) of visible text nodes and image-like
+# elements, collected in one script call at screenshot time
+LAYOUT_SCRIPT = """
+const vw = window.innerWidth, vh = window.innerHeight;
+const visible = r => r.width > 0 && r.height > 0 && r.bottom > 0 && r.right > 0 && r.top < vh && r.left < vw;
+const box = r => [r.left, r.top, r.right, r.bottom];
+const textRects = [];
+let textChars = 0;
+const walker = document.createTreeWalker(document.body, NodeFilter.SHOW_TEXT);
+const range = document.createRange();
+while (walker.nextNode()) {
+    const node = walker.currentNode;
+    const content = node.textContent.trim();
+    if (!content) continue;
+    const parent = node.parentElement;
+    if (parent && ['SCRIPT', 'STYLE', 'NOSCRIPT'].includes(parent.tagName)) continue;
+    range.selectNodeContents(node);
+    const r = range.getBoundingClientRect();
+    if (!visible(r)) continue;
+    textChars += content.length;
+    textRects.push(box(r));
+}
+const mediaRects = [];
+for (const el of document.body.querySelectorAll('*')) {
+    const tag = el.tagName.toLowerCase();
+    const isMedia = ['img', 'canvas', 'svg', 'video', 'picture', 'object', 'embed'].includes(tag)
+        || (tag === 'input' && el.type === 'image')
+        || getComputedStyle(el).backgroundImage.startsWith('url(');
+    if (!isMedia) continue;
+    const r = el.getBoundingClientRect();
+    if (visible(r)) mediaRects.push({tag: tag, rect: box(r)});
+}
+return {viewport: [vw, vh], dpr: window.devicePixelRatio || 1,
+        text_chars: textChars, text_rects: textRects, media_rects: mediaRects};
+"""
+
+def collect_layout(driver):
+    """Return the current viewport's text and media rects, or None on failure."""
+    try:
+        return driver.execute_script(LAYOUT_SCRIPT)
+    except Exception as e:
+        logger.warning(f"Could not collect page layout: {e}")
+        return None
+
+def load_page(driver, url, timeout=60):
+    """
+    Load url in driver, wait for dynamic content and return (html, visible_text).
+    Raises the Selenium exceptions for the caller to handle.
+    """
+    driver.set_page_load_timeout(timeout)
+    
+    logger.info(f"Loading page: {url}")
+    driver.get(url)
+    
+    # Wait for the page to be interactive
+    WebDriverWait(driver, timeout).until(
+        lambda d: d.execute_script('return document.readyState') == 'complete'
+    )
+    
+    # Wait for body to be present and visible
+    WebDriverWait(driver, timeout).until(
+        EC.visibility_of_element_located((By.TAG_NAME, "body"))
+    )
+    
+    # Additional wait for dynamic content
+    time.sleep(3)
+    
+    # Scroll to load dynamic content
+    driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+    time.sleep(2)
+    
+    # Get page source and visible text
+    html = driver.page_source
+    try:
+        visible_text = driver.find_element(By.TAG_NAME, "body").text
+    except NoSuchElementException:
+        logger.warning("Could not find body element, using page source as text")
+        visible_text = html
+    return html, visible_text
+
 def render_page(url, timeout=60):
     """
     Renders a webpage using Selenium and returns a tuple:
     (html, visible_text, screenshot_path)
     """
+    html, visible_text, screenshot_path, _ = render_page_with_layout(url, timeout)
+    return html, visible_text, screenshot_path
+
+def render_page_with_layout(url, timeout=60):
+    """
+    Like render_page, plus the layout of the screenshotted viewport
+    (see collect_layout): (html, visible_text, screenshot_path, layout)
+    """
     driver = None
     try:
         driver = init_driver()
-        driver.set_page_load_timeout(timeout)
-        
-        logger.info(f"Loading page: {url}")
-        driver.get(url)
-        
-        # Wait for the page to be interactive
-        WebDriverWait(driver, timeout).until(
-            lambda d: d.execute_script('return document.readyState') == 'complete'
-        )
-        
-        # Wait for body to be present and visible
-        WebDriverWait(driver, timeout).until(
-            EC.visibility_of_element_located((By.TAG_NAME, "body"))
-        )
-        
-        # Additional wait for dynamic content
-        time.sleep(3)
-        
-        # Scroll to load dynamic content
-        driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-        time.sleep(2)
-        
-        # Get page source and visible text
-        html = driver.page_source
-        try:
-            visible_text = driver.find_element(By.TAG_NAME, "body").text
-        except NoSuchElementException:
-            logger.warning("Could not find body element, using page source as text")
-            visible_text = html
+        html, visible_text = load_page(driver, url, timeout)
             
-        # Take screenshot
+        # Take screenshot, with the layout of the same viewport
         screenshot_path = "screenshot.png"
+        layout = collect_layout(driver)
         try:
             driver.save_screenshot(screenshot_path)
         except Exception as e:
@@ -79,17 +140,17 @@ def render_page(url, timeout=60):
             screenshot_path = ""
             
         logger.info("Page loaded successfully")
-        return html, visible_text, screenshot_path
+        return html, visible_text, screenshot_path, layout
         
     except TimeoutException:
         logger.error(f"Timeout while loading {url}")
-        return "", "", ""
+        return "", "", "", None
     except WebDriverException as e:
         logger.error(f"WebDriver error while loading {url}: {e}")
-        return "", "", ""
+        return "", "", "", None
     except Exception as e:
         logger.error(f"Unexpected error while loading {url}: {e}")
-        return "", "", ""
+        return "", "", "", None
     finally:
         if driver:
             try:
@@ -0,0 +1,170 @@
+"""
+OCR of detected card regions.
+
+The page screenshot is decoded once. Card crops are NumPy views into that
+single array; when there are several cards the array is placed in shared
+memory and a persistent process pool preprocesses and OCRs the crops in
+parallel, each worker reading its crop straight from the shared buffer.
+Results come back in box order.
+
+Preprocessing is adaptive (see adaptive_ocr). Crops already seen (same
+pixels, see ocr_cache) are answered from the cache in the parent and never
+sent to the pool. This module only imports OpenCV, NumPy and the
+OCR modules so that pool workers start quickly.
+"""
+import logging
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context, shared_memory
+
+import numpy as np
+
+from . import adaptive_ocr
+from .ocr_cache import MISS, lookup, ocr_cache
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+PADDING = 10
+OCR_CONFIG = '--oem 3 --psm 6'
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def crop_with_padding(image, box, padding=PADDING):
+    """Return a view of the box region, padded and clipped to the image."""
+    x1, y1, x2, y2 = map(int, box)
+    y1 = max(0, y1 - padding)
+    y2 = min(image.shape[0], y2 + padding)
+    x1 = max(0, x1 - padding)
+    x2 = min(image.shape[1], x2 + padding)
+    return image[y1:y2, x1:x2]
+
+
+def _read_card(card_region, lang):
+    """Adaptive OCR of one crop; returns (single-line text or None, stage report)."""
+    text, report = adaptive_ocr.run(card_region, lang=lang, config=OCR_CONFIG)
+    # Remove empty lines and join with single spaces
+    lines = [line.strip() for line in text.strip().split('\n') if line.strip()]
+    return ' '.join(lines) or None, report
+
+
+def _cache_namespace(lang):
+    return f"card|{lang}|{OCR_CONFIG}"
+
+
+def ocr_card_region(card_region, lang='ara+fra+eng'):
+    """Preprocess one card crop and OCR it; returns single-line text or None."""
+    key, text = lookup(card_region, _cache_namespace(lang))
+    if text is not MISS:
+        return text
+    text, report = _read_card(card_region, lang)
+    adaptive_ocr.record(report)
+    ocr_cache.put(key, text)
+    return text
+
+
+def _ocr_box_in_worker(shm_name, shape, dtype, box, lang):
+    # Attaching is just an mmap; the crop below is a view, not a copy
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        image = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+        result = _read_card(crop_with_padding(image, box), lang)
+        del image
+        return result
+    except Exception as e:
+        logger.error(f"Error extracting text: {e}")
+        return None, None
+    finally:
+        try:
+            shm.close()
+        except BufferError:
+            pass
+
+
+def _get_pool(max_workers=None):
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            workers = max_workers or max(1, (os.cpu_count() or 2) - 1)
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn"))
+            logger.info(f"Started card OCR pool with {workers} workers")
+        return _pool
+
+
+def _ocr_serial(image, boxes, lang):
+    texts = []
+    for box in boxes:
+        try:
+            text, report = _read_card(crop_with_padding(image, box), lang)
+            adaptive_ocr.record(report)
+            texts.append(text)
+        except Exception as e:
+            logger.error(f"Error extracting text: {e}")
+            texts.append(None)
+    return texts
+
+
+def ocr_card_regions(image, boxes, lang='ara+fra+eng', parallel=True):
+    """
+    OCR every box of a decoded screenshot.
+
+    Args:
+        image (np.ndarray): Decoded BGR screenshot
+        boxes: Iterable of (x1, y1, x2, y2)
+        lang (str): Tesseract language string
+        parallel (bool): Use the process pool when there is more than one box
+
+    Returns:
+        list: Text (or None) per box, in box order
+    """
+    boxes = [tuple(float(v) for v in box) for box in boxes]
+    texts = [None] * len(boxes)
+    pending = []  # (index, cache key, box) of crops not in the cache
+    for i, box in enumerate(boxes):
+        key, text = lookup(crop_with_padding(image, box), _cache_namespace(lang))
+        if text is MISS:
+            pending.append((i, key, box))
+        else:
+            texts[i] = text
+    if pending:
+        results = _ocr_uncached(image, [box for _, _, box in pending], lang, parallel)
+        for (i, key, _), text in zip(pending, results):
+            texts[i] = text
+            ocr_cache.put(key, text)
+    return texts
+
+
+def _ocr_uncached(image, boxes, lang, parallel):
+    if not parallel or len(boxes) < 2:
+        return _ocr_serial(image, boxes, lang)
+
+    shm = None
+    shared = None
+    try:
+        shm = shared_memory.SharedMemory(create=True, size=image.nbytes)
+        shared = np.ndarray(image.shape, dtype=image.dtype, buffer=shm.buf)
+        shared[:] = image
+        pool = _get_pool()
+        futures = [
+            pool.submit(_ocr_box_in_worker, shm.name, image.shape, image.dtype.str, box, lang)
+            for box in boxes
+        ]
+        texts = []
+        for future in futures:
+            # Stage reports are produced in the workers and aggregated here
+            text, report = future.result()
+            adaptive_ocr.record(report)
+            texts.append(text)
+        return texts
+    except Exception as e:
+        logger.warning(f"Parallel card OCR failed, running serially: {e}")
+        return _ocr_serial(image, boxes, lang)
+    finally:
+        shared = None
+        if shm is not None:
+            shm.close()
+            shm.unlink()
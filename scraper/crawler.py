@@ -1,18 +1,17 @@
 import re
 import time
 import cv2
-import pytesseract
 from PIL import Image
 from bs4 import BeautifulSoup
 from urllib.parse import urljoin
-from langdetect import detect
-import spacy
 import logging
-from transformers import pipeline as hf_pipeline
-from . import browser, qa_model
+from . import browser, ocr_engine, ocr_gate, tiling
+from .ocr_cache import cached_ocr, for_site
+from .models import registry
+from . import snapshot
+from .language import detect_language, ocr_languages
+from .prompt_compiler import compile_prompt, interpret_prompt_with_llm, question_for
 from .utils import is_internal
-import requests
-import json
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -21,164 +20,80 @@ logger = logging.getLogger(__name__)
 ############################
 # 1) spaCy Model Caching   #
 ############################
-_MODELS = {}
+_SPACY_PACKAGES = {
+    "fr": "fr_core_news_lg",
+    "en": "en_core_web_lg",
+    "xx": "xx_ent_wiki_sm",  # Multilingual model, also used for Arabic
+}
+
+def _load_spacy(key):
+    if snapshot.snapshot_path("spacy", key):
+        return snapshot.load_spacy(key)
+
+    import spacy
+    package = _SPACY_PACKAGES[key]
+    try:
+        return spacy.load(package)
+    except OSError:
+        logger.info(f"Downloading spaCy model {package}...")
+        spacy.cli.download(package)
+        return spacy.load(package)
+
+for _key in _SPACY_PACKAGES:
+    registry.register(f"spacy_{_key}", lambda key=_key: _load_spacy(key))
 
 def get_model(lang_code):
-    global _MODELS
+    if lang_code.startswith("fr"):
+        key = "fr"
+    elif lang_code.startswith("en"):
+        key = "en"
+    else:
+        key = "xx"
     try:
-        if lang_code.startswith("fr"):
-            if "fr" not in _MODELS:
-                try:
-                    _MODELS["fr"] = spacy.load("fr_core_news_lg")
-                except OSError:
-                    logger.info("Downloading French language model...")
-                    spacy.cli.download("fr_core_news_lg")
-                    _MODELS["fr"] = spacy.load("fr_core_news_lg")
-            return _MODELS["fr"]
-        elif lang_code.startswith("ar"):
-            if "ar" not in _MODELS:
-                try:
-                    _MODELS["ar"] = spacy.load("xx_ent_wiki_sm")  # Using multilingual model for Arabic
-                except OSError:
-                    logger.info("Downloading multilingual model for Arabic...")
-                    spacy.cli.download("xx_ent_wiki_sm")
-                    _MODELS["ar"] = spacy.load("xx_ent_wiki_sm")
-            return _MODELS["ar"]
-        elif lang_code.startswith("en"):
-            if "en" not in _MODELS:
-                try:
-                    _MODELS["en"] = spacy.load("en_core_web_lg")
-                except OSError:
-                    logger.info("Downloading English language model...")
-                    spacy.cli.download("en_core_web_lg")
-                    _MODELS["en"] = spacy.load("en_core_web_lg")
-            return _MODELS["en"]
-        else:
-            if "multi" not in _MODELS:
-                try:
-                    _MODELS["multi"] = spacy.load("xx_ent_wiki_sm")
-                except OSError:
-                    logger.info("Downloading multilingual model...")
-                    spacy.cli.download("xx_ent_wiki_sm")
-                    _MODELS["multi"] = spacy.load("xx_ent_wiki_sm")
-            return _MODELS["multi"]
+        return registry.get(f"spacy_{key}")
     except Exception as e:
         logger.error(f"Error loading language model: {e}")
         # Fallback to multilingual model
-        if "multi" not in _MODELS:
-            try:
-                _MODELS["multi"] = spacy.load("xx_ent_wiki_sm")
-            except OSError:
-                spacy.cli.download("xx_ent_wiki_sm")
-                _MODELS["multi"] = spacy.load("xx_ent_wiki_sm")
-        return _MODELS["multi"]
-
-############################
-# 2) Prompt Field Parsing  #
-############################
-_field_extractor = hf_pipeline("text2text-generation", model="t5-small")
+        return registry.get("spacy_xx")
 
-def interpret_prompt_with_llm(prompt):
+def find_org_names(texts, lang_code, qa_pipe=None):
     """
-    Use local Qwen2.5 model through Ollama to interpret the user's prompt
-    and extract relevant fields in a structured way.
+    Return the subset of texts that spaCy tags as an ORG entity.
+    Runs as one batch, in the shared inference worker when qa_pipe is its client.
     """
-    try:
-        # Prepare the prompt for the LLM
-        system_prompt = """You are a helpful assistant that extracts contact information fields from user prompts.
-        Identify which fields the user wants to extract (name, phone, email, address, domain, poste).
-        Return a JSON object with the fields as keys and boolean values indicating if they should be extracted.
-        Example output: {"name": true, "phone": true, "email": true, "address": false, "domain": false, "poste": false}"""
-        
-        logger.info(f"Sending prompt to LLM: {prompt}")
-        
-        # Call Ollama API
-        response = requests.post(
-            'http://localhost:11434/api/generate',
-            json={
-                "model": "qwen2.5",
-                "prompt": f"{system_prompt}\n\nUser prompt: {prompt}",
-                "stream": False
-            }
-        )
-        
-        logger.info(f"LLM Response status: {response.status_code}")
-        logger.info(f"LLM Response content: {response.text}")
-        
-        if response.status_code == 200:
-            result = response.json()
-            # Extract the JSON response from the LLM's output
-            try:
-                # The response might be in the 'response' field
-                llm_output = result.get('response', '')
-                logger.info(f"LLM raw output: {llm_output}")
-                
-                # Find JSON in the output
-                json_start = llm_output.find('{')
-                json_end = llm_output.rfind('}') + 1
-                if json_start != -1 and json_end != -1:
-                    json_str = llm_output[json_start:json_end]
-                    logger.info(f"Extracted JSON: {json_str}")
-                    fields = json.loads(json_str)
-                    # Convert to list of field names
-                    extracted_fields = [field for field, include in fields.items() if include]
-                    logger.info(f"Extracted fields: {extracted_fields}")
-                    return extracted_fields
-                else:
-                    logger.warning("No JSON found in LLM output")
-            except (json.JSONDecodeError, AttributeError) as e:
-                logger.error(f"Error parsing LLM response: {e}")
-                logger.error(f"Failed to parse: {llm_output}")
-        
-        # Fallback to basic field detection if LLM fails
-        logger.warning("Falling back to basic field detection")
-        return parse_prompt_for_fields(prompt)
-    except Exception as e:
-        logger.error(f"Error in LLM interpretation: {e}")
-        logger.error(f"Error type: {type(e)}")
-        logger.error(f"Error details: {e.__dict__ if hasattr(e, '__dict__') else 'No details available'}")
-        # Fallback to basic field detection
-        return parse_prompt_for_fields(prompt)
+    texts = list(dict.fromkeys(texts))
+    if not texts:
+        return set()
+    if hasattr(qa_pipe, "named_entities"):
+        try:
+            entities = qa_pipe.named_entities(texts, lang_code)
+            return {text for text, ents in zip(texts, entities) if any(label == "ORG" for _, label in ents)}
+        except Exception as e:
+            logger.warning(f"Inference worker NER failed, running locally: {e}")
+    model = get_model(lang_code)
+    return {text for text, doc in zip(texts, model.pipe(texts)) if any(ent.label_ == "ORG" for ent in doc.ents)}
 
+############################
+# 2) Prompt Field Parsing  #
+############################
 def parse_prompt_for_fields(prompt):
     """
     Parse the prompt to determine which fields to extract.
-    First tries LLM interpretation, falls back to basic keyword matching.
+    Uses the cached prompt plan: keyword matching first, the LLM only when no
+    keyword matches.
     """
-    # Try LLM interpretation first
-    fields = interpret_prompt_with_llm(prompt)
-    if fields:
-        return fields
-    
-    # Fallback to basic keyword matching
-    plower = prompt.lower()
-    fields = []
-    if "name" in plower or "nom" in plower or "association" in plower:
-        fields.append("name")
-    if "phone" in plower or "telephone" in plower or "tel" in plower or "numéro" in plower:
-        fields.append("phone")
-    if "email" in plower or "mail" in plower or "courriel" in plower:
-        fields.append("email")
-    if "address" in plower or "adresse" in plower or "location" in plower:
-        fields.append("address")
-    if "domain" in plower or "website" in plower or "site" in plower:
-        fields.append("domain")
-    if "poste" in plower or "job" in plower or "title" in plower or "fonction" in plower:
-        fields.append("poste")
-    
-    # Always include name if no fields were detected
-    if not fields:
-        fields.append("name")
-    
-    return fields
+    return compile_prompt(prompt)["fields"]
 
 ############################
 # 3) OCR Functionality     #
 ############################
-def do_ocr_screenshot(screenshot_path):
+def do_ocr_screenshot(screenshot_path, lang=None):
     try:
         img = cv2.imread(screenshot_path)
-        text = pytesseract.image_to_string(img)
+        lang = lang or 'eng'
+        # Tall screenshots are read in parallel bands cut at blank rows
+        text = cached_ocr(img, f"page|{lang}", lambda image: tiling.ocr_tall_image(
+            image, lambda band: ocr_engine.image_to_string(band, lang=lang)))
         return text
     except Exception as e:
         print(f"OCR error: {e}")
@@ -516,14 +431,14 @@ def _extract_table_data(html, fields):
 ############################
 # 6) Detail Page Processing#
 ############################
-def process_detail_page(detail_url, qa_pipe, fields):
+def process_detail_page(detail_url, qa_pipe, fields, plan=None):
     """
     Processes a detail page independently.
     Loads the detail page and extracts its HTML, visible text, and screenshot,
     then performs line-by-line scanning plus QA extraction for each requested field.
     """
     try:
-        dhtml, dvis, dscreenshot = browser.render_page(detail_url)
+        dhtml, dvis, dscreenshot, dlayout = browser.render_page_with_layout(detail_url)
     except Exception as e:
         print(f"Error loading detail page {detail_url}: {e}")
         return {}
@@ -533,7 +448,9 @@ def process_detail_page(detail_url, qa_pipe, fields):
     try:
         soup = BeautifulSoup(dhtml, "html.parser")
         context = dvis
-        ocr_text = do_ocr_screenshot(dscreenshot)
+        # OCR only what the DOM text does not already cover
+        ocr_text = ocr_gate.run(dscreenshot, dvis, dlayout, do_ocr_screenshot,
+                                ocr_languages(dvis), page=detail_url)
         combined_context = context + "\n" + ocr_text
         lines = [l.strip() for l in combined_context.splitlines() if l.strip()]
         address_tag = soup.find("address")
@@ -567,7 +484,7 @@ def process_detail_page(detail_url, qa_pipe, fields):
                     if line_addr:
                         detail["address"] = line_addr
                     else:
-                        ans = extract_field_by_qa("What is the address of this association?", combined_context, qa_pipe)
+                        ans = extract_field_by_qa(question_for("address", plan), combined_context, qa_pipe)
                         detail["address"] = ans
             elif f == "domain":
                 # Extract both industry and website
@@ -578,7 +495,7 @@ def process_detail_page(detail_url, qa_pipe, fields):
                     if website:
                         break
                 if not website:
-                    website = extract_field_by_qa("What is the website or URL of this organization?", combined_context, qa_pipe)
+                    website = extract_field_by_qa(question_for("website", plan), combined_context, qa_pipe)
                 detail["domain"] = industry  # Store industry in domain field
                 detail["website"] = website  # Add website as a new field
             elif f == "poste":
@@ -589,11 +506,10 @@ def process_detail_page(detail_url, qa_pipe, fields):
                         poste_found = line
                         break
                 if not poste_found:
-                    poste_found = extract_field_by_qa("What is the job title or poste of the contact person?", combined_context, qa_pipe)
+                    poste_found = extract_field_by_qa(question_for("poste", plan), combined_context, qa_pipe)
                 detail["poste"] = poste_found
             else:
-                question = f"What is the {f}?"
-                detail[f] = extract_field_by_qa(question, combined_context, qa_pipe)
+                detail[f] = extract_field_by_qa(question_for(f, plan), combined_context, qa_pipe)
         return detail
     except Exception as e:
         print(f"Error processing detail page {detail_url}: {e}")
@@ -602,7 +518,8 @@ def process_detail_page(detail_url, qa_pipe, fields):
 ############################
 # 7) Main Crawl Logic      #
 ############################
-def crawl_site(start_url, prompt, depth, max_pages, qa_pipe, crawl_detail=False):
+def crawl_site(start_url, prompt, depth, max_pages, qa_pipe, crawl_detail=False, render=None,
+               detail_gate=None):
     """
     1) Parse fields from the prompt.
     2) Load the main page; if table-based, extract data and return.
@@ -610,16 +527,30 @@ def crawl_site(start_url, prompt, depth, max_pages, qa_pipe, crawl_detail=False)
     4) For each candidate anchor, create one item. If crawl_detail is enabled,
        process its detail page independently via process_detail_page().
     5) Return a list of dictionaries with the extracted fields.
+    render is a page_render.PageRender of start_url to reuse instead of loading it again.
+    detail_gate, if given, has allows(name, url); candidates it rejects are
+    skipped before any detail page is loaded.
     """
-    fields = parse_prompt_for_fields(prompt)
+    # OCR cache hits and misses during the crawl are counted for this site
+    with for_site(start_url):
+        return _crawl_site(start_url, prompt, depth, max_pages, qa_pipe, crawl_detail, render, detail_gate)
+
+def _crawl_site(start_url, prompt, depth, max_pages, qa_pipe, crawl_detail=False, render=None,
+                detail_gate=None):
+    plan = compile_prompt(prompt)
+    fields = plan["fields"]
     print("Parsed fields from prompt:", fields)
 
-    print(f"Loading main page: {start_url}")
-    try:
-        html, visible_text, screenshot_path = browser.render_page(start_url)
-    except Exception as e:
-        print(f"Error loading main page: {e}")
-        return []
+    if render is not None:
+        html, visible_text = render.html, render.visible_text
+        screenshot_path, layout = render.screenshot_path, render.layout
+    else:
+        print(f"Loading main page: {start_url}")
+        try:
+            html, visible_text, screenshot_path, layout = browser.render_page_with_layout(start_url)
+        except Exception as e:
+            print(f"Error loading main page: {e}")
+            return []
     if not html:
         return []
 
@@ -641,23 +572,24 @@ def crawl_site(start_url, prompt, depth, max_pages, qa_pipe, crawl_detail=False)
     try:
         lang_code = soup.find("html")["lang"].lower()
     except Exception:
-        try:
-            lang_code = detect(visible_text)
-        except Exception:
-            lang_code = "en"
-    model = get_model(lang_code)
+        lang_code = detect_language(visible_text)
 
+    candidates = []
     for a in anchors:
-        try:
-            candidate_text = a.get_text(strip=True)
-            if not candidate_text or len(candidate_text) < 3:
-                continue
-            lower_text = candidate_text.lower()
-            if lower_text in ["login", "signup", "home", "about", "contact", "connexion", "inscription", "accueil", "à propos"]:
-                continue
+        candidate_text = a.get_text(strip=True)
+        if not candidate_text or len(candidate_text) < 3:
+            continue
+        lower_text = candidate_text.lower()
+        if lower_text in ["login", "signup", "home", "about", "contact", "connexion", "inscription", "accueil", "à propos"]:
+            continue
+        candidates.append((a, candidate_text))
+    ocr_lang = ocr_languages(visible_text)
+    main_ocr = None  # gated OCR of the main page, computed on first use
+    org_names = find_org_names([text for _, text in candidates], lang_code, qa_pipe)
 
-            doc = model(candidate_text)
-            is_org = any(ent.label_ == "ORG" for ent in doc.ents)
+    for a, candidate_text in candidates:
+        try:
+            is_org = candidate_text in org_names
             tokens = candidate_text.split()
             capital_count = sum(1 for t in tokens if t and t[0].isupper())
             is_capitalized = (len(tokens) >= 2 and capital_count >= len(tokens)/2)
@@ -666,13 +598,16 @@ def crawl_site(start_url, prompt, depth, max_pages, qa_pipe, crawl_detail=False)
 
             item = {"name": candidate_text}
             detail_href = a.get("href")
+            if detail_gate is not None and not detail_gate.allows(
+                    candidate_text, urljoin(start_url, detail_href) if detail_href else None):
+                continue
             if crawl_detail and detail_href:
                 detail_url = urljoin(start_url, detail_href)
                 try:
                     if detail_url not in visited and (max_pages is None or len(visited) < max_pages):
                         visited.add(detail_url)
                         print(f"Processing detail page for '{candidate_text}': {detail_url}")
-                        detail_info = process_detail_page(detail_url, qa_pipe, fields)
+                        detail_info = process_detail_page(detail_url, qa_pipe, fields, plan)
                         if detail_info:
                             item.update(detail_info)
                         time.sleep(1)  # slight delay to avoid overloading
@@ -681,7 +616,9 @@ def crawl_site(start_url, prompt, depth, max_pages, qa_pipe, crawl_detail=False)
             else:
                 parent = a.find_parent()
                 parent_text = parent.get_text(" ", strip=True) if parent else ""
-                main_ocr = do_ocr_screenshot(screenshot_path)
+                if main_ocr is None:
+                    main_ocr = ocr_gate.run(screenshot_path, visible_text, layout, do_ocr_screenshot,
+                                            ocr_lang, page=start_url)
                 combined_text = parent_text + "\n" + main_ocr
                 lines = [l.strip() for l in combined_text.splitlines() if l.strip()]
                 if "phone" in fields:
@@ -707,7 +644,7 @@ def crawl_site(start_url, prompt, depth, max_pages, qa_pipe, crawl_detail=False)
                             addr = line
                             break
                     if not addr:
-                        addr = extract_field_by_qa("What is the address of this association?", combined_text, qa_pipe)
+                        addr = extract_field_by_qa(question_for("address", plan), combined_text, qa_pipe)
                     item["address"] = addr
                 if "domain" in fields:
                     # Extract both industry and website
@@ -718,7 +655,7 @@ def crawl_site(start_url, prompt, depth, max_pages, qa_pipe, crawl_detail=False)
                         if website:
                             break
                     if not website:
-                        website = extract_field_by_qa("What is the website or URL of this organization?", combined_text, qa_pipe)
+                        website = extract_field_by_qa(question_for("website", plan), combined_text, qa_pipe)
                     item["domain"] = industry  # Store industry in domain field
                     item["website"] = website  # Add website as a new field
                 if "poste" in fields:
@@ -729,7 +666,7 @@ def crawl_site(start_url, prompt, depth, max_pages, qa_pipe, crawl_detail=False)
                             poste_found = line
                             break
                     if not poste_found:
-                        poste_found = extract_field_by_qa("What is the job title or poste of the contact person?", combined_text, qa_pipe)
+                        poste_found = extract_field_by_qa(question_for("poste", plan), combined_text, qa_pipe)
                     item["poste"] = poste_found
             results.append(item)
         except Exception as e:
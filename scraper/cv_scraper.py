@@ -1,8 +1,5 @@
-import torch
-from ultralytics import YOLO
-from PIL import Image, ImageDraw
 import io
-import requests
+from concurrent.futures import ThreadPoolExecutor
 from bs4 import BeautifulSoup
 from .crawler import (
     process_detail_page,
@@ -10,17 +7,13 @@ from .crawler import (
     parse_prompt_for_fields,
     crawl_site
 )
+from .detector import card_detector
+from .language import ocr_languages
+from . import card_ocr, page_render, tiling
+from .ocr_cache import for_site
+from .name_index import NameIndex
 import logging
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-import os
-import time
-from datetime import datetime
 import numpy as np
-import pytesseract
 import cv2
 from difflib import SequenceMatcher
 
@@ -28,154 +21,122 @@ from difflib import SequenceMatcher
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def setup_browser():
-    """Setup headless browser for screenshots"""
-    chrome_options = Options()
-    chrome_options.add_argument('--headless')
-    chrome_options.add_argument('--no-sandbox')
-    chrome_options.add_argument('--disable-dev-shm-usage')
-    chrome_options.add_argument('--start-maximized')
-    return webdriver.Chrome(options=chrome_options)
+def detect_cards_in_tile(tile, ocr_lang, annotated_prefix=None, dom_index=None):
+    """
+    Run YOLO on one tile and resolve each card to its DOM text and link.
+    Cards without DOM text are OCRed instead.
 
-def capture_full_page_screenshot(url):
-    """Capture a full page screenshot of the webpage"""
-    browser = None
-    try:
-        logger.info(f"Capturing full page screenshot of {url}")
-        browser = setup_browser()
-        browser.get(url)
-        
-        # Wait for page load
-        wait = WebDriverWait(browser, 20)
-        wait.until(EC.presence_of_element_located((By.TAG_NAME, "body")))
-        time.sleep(3)
-        
-        # Get page height
-        total_height = browser.execute_script("""
-            return Math.max(
-                document.body.scrollHeight,
-                document.documentElement.scrollHeight,
-                document.body.offsetHeight,
-                document.documentElement.offsetHeight
-            );
-        """)
-        
-        # Set viewport size
-        browser.set_window_size(1920, total_height)
-        
-        # Scroll through page
-        current_height = 0
-        while current_height < total_height:
-            browser.execute_script(f"window.scrollTo(0, {current_height});")
-            time.sleep(0.5)
-            current_height += 500
-        
-        browser.execute_script("window.scrollTo(0, 0);")
-        time.sleep(2)
-        
-        # Save screenshot
-        os.makedirs('screenshots', exist_ok=True)
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        screenshot_path = f'screenshots/screenshot_{timestamp}.png'
-        browser.save_screenshot(screenshot_path)
-        
-        # Get card links if needed for deep crawling
-        links = {}
-        elements = browser.find_elements(By.TAG_NAME, 'a')
-        for element in elements:
-            try:
-                link = element.get_attribute('href')
-                text = element.text.strip()
-                if link and text:
-                    links[text] = link
-            except Exception as e:
-                continue
-                
-        return screenshot_path, links
-        
-    except Exception as e:
-        logger.error(f"Error capturing screenshot: {str(e)}")
-        return None, {}
-    finally:
-        if browser:
-            browser.quit()
+    Returns:
+        list: {"box": page-coordinate box, "name", "detail_url"} for cards
+        resolved from the DOM, {"box", "text": OCR text or None} for the others
+    """
+    # Batched with the other tiles in flight
+    boxes = card_detector.detect(tile.image)
+    if not len(boxes):
+        return []
+    
+    cards, unresolved = [], []
+    for x1, y1, x2, y2 in boxes:
+        page_box = (float(x1), float(y1) + tile.top, float(x2), float(y2) + tile.top)
+        card = dom_index.resolve(page_box) if dom_index else None
+        if card:
+            cards.append(dict(card, box=page_box))
+        else:
+            unresolved.append(((x1, y1, x2, y2), page_box))
+    
+    # OCR only as a fallback for cards with no DOM text (images, canvas)
+    if unresolved:
+        texts = card_ocr.ocr_card_regions(tile.image, [box for box, _ in unresolved], ocr_lang)
+        cards.extend({"box": page_box, "text": text} for (_, page_box), text in zip(unresolved, texts))
+    
+    if annotated_prefix:
+        annotated = tile.image.copy()
+        for box in boxes:
+            x1, y1, x2, y2 = map(int, box)
+            cv2.rectangle(annotated, (x1, y1), (x2, y2), (0, 0, 255), 2)
+        cv2.imwrite(f"{annotated_prefix}_tile{tile.index}_annotated.png", annotated)
+    
+    return cards
+
+def build_link_index(page_links):
+    """Word sets of each link text (with page order) and an inverted word -> link texts index."""
+    link_words, word_index = {}, {}
+    for order, link_text in enumerate(page_links):
+        words = set(link_text.split())
+        link_words[link_text] = (order, words)
+        for word in words:
+            word_index.setdefault(word, []).append(link_text)
+    return link_words, word_index
+
+def match_link_by_words(text, page_links, link_index):
+    """
+    Link for OCR text: an exact link text match, else the link with the best
+    word overlap above 50%. Only links sharing a word with the text are scored.
+    """
+    if text in page_links:
+        return page_links[text]
+    link_words, word_index = link_index
+    ocr_words = set(text.split())
+    candidates = set()
+    for word in ocr_words:
+        candidates.update(word_index.get(word, ()))
+    best_match, best_match_ratio = None, 0
+    # Page order, so ties resolve to the first link
+    for link_text in sorted(candidates, key=lambda t: link_words[t][0]):
+        words = link_words[link_text][1]
+        ratio = len(ocr_words & words) / max(len(ocr_words), len(words))
+        if ratio > best_match_ratio:
+            best_match_ratio = ratio
+            best_match = page_links[link_text]
+    if best_match and best_match_ratio > 0.5:  # At least 50% word match
+        return best_match
+    return None
 
-def extract_text_from_image_region(image_path, box):
-    """Extract text from a specific region of an image using OCR"""
+def extract_text_from_image_region(image, box, lang='ara+fra+eng'):
+    """Extract text from a specific region of an image (decoded array or path) using OCR"""
     try:
-        img = cv2.imread(image_path)
+        img = cv2.imread(image) if isinstance(image, str) else image
         if img is None:
             return None
-            
-        # Extract region with padding
-        x1, y1, x2, y2 = map(int, box)
-        # Add padding to capture full text
-        padding = 10
-        y1 = max(0, y1 - padding)
-        y2 = min(img.shape[0], y2 + padding)
-        x1 = max(0, x1 - padding)
-        x2 = min(img.shape[1], x2 + padding)
-        
-        card_region = img[y1:y2, x1:x2]
-        
-        # Image preprocessing
-        # Convert to grayscale
-        gray = cv2.cvtColor(card_region, cv2.COLOR_BGR2GRAY)
-        # Increase contrast
-        clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8,8))
-        enhanced = clahe.apply(gray)
-        # Denoise
-        denoised = cv2.fastNlMeansDenoising(enhanced)
-        
-        # Convert back to RGB for Tesseract
-        rgb = cv2.cvtColor(denoised, cv2.COLOR_GRAY2RGB)
-        pil_image = Image.fromarray(rgb)
-        
-        # Configure Tesseract parameters
-        custom_config = r'--oem 3 --psm 6 -l ara+fra+eng'
-        text = pytesseract.image_to_string(pil_image, config=custom_config)
-        
-        # Clean up the text
-        lines = text.strip().split('\n')
-        # Remove empty lines and clean each line
-        lines = [line.strip() for line in lines if line.strip()]
-        # Join with single spaces
-        text = ' '.join(lines)
-        
+        text = card_ocr.ocr_card_region(card_ocr.crop_with_padding(img, box), lang)
         if text:
             logger.info(f"Extracted text: {text[:100]}...")
-            return text
-        return None
-            
+        return text
     except Exception as e:
         logger.error(f"Error extracting text: {str(e)}")
         return None
 
-def process_page_with_cv(url, prompt=None, qa_pipe=None, crawl_detail=False):
-    """Process a single page using computer vision approach"""
+def process_page_with_cv(url, prompt=None, qa_pipe=None, crawl_detail=False, render=None):
+    """
+    Process a single page using computer vision approach.
+    render is a page_render.PageRender to reuse; the page is rendered if None.
+    """
+    with for_site(url):
+        return _process_page_with_cv(url, prompt, qa_pipe, crawl_detail, render)
+
+def _process_page_with_cv(url, prompt=None, qa_pipe=None, crawl_detail=False, render=None):
     try:
-        # Step 1: Get HTML content and capture screenshot
-        response = requests.get(url)
-        soup = BeautifulSoup(response.text, 'html.parser')
-        screenshot_path, _ = capture_full_page_screenshot(url)
-        if not screenshot_path:
+        # Step 1: Get HTML content and the full-page capture
+        if render is None:
+            render = page_render.render(url)
+        if not render or not render.tile_bands:
             return []
-            
-        # Step 2: Run YOLO detection
-        model = YOLO('best.pt')
-        results = model(screenshot_path)
+        soup = BeautifulSoup(render.html, 'html.parser')
+        ocr_lang = ocr_languages(render.visible_text)
         
-        if not len(results) or not len(results[0].boxes):
+        # Step 2: Run YOLO per tile; cards are named from the DOM, OCR is the fallback
+        dom_index = render.dom_index()
+        tile_cards = tiling.map_tiles(
+            render.tiles(), lambda tile: detect_cards_in_tile(tile, ocr_lang, render.prefix, dom_index)
+        )
+        
+        # Step 3: Merge cards seen in two overlapping tiles
+        detections = tiling.merge_boxes(card for cards in tile_cards for card in cards)
+        if not detections:
             logger.warning("No cards detected")
             return []
-            
-        # Step 3: Process each detected card
-        cards_data = []
-        boxes = results[0].boxes.xyxy.cpu().numpy()
         
-        # Save annotated image
-        img = Image.open(screenshot_path)
-        draw = ImageDraw.Draw(img)
+        cards_data = []
         
         # Extract all links from the page
         page_links = {}
@@ -193,13 +154,21 @@ def process_page_with_cv(url, prompt=None, qa_pipe=None, crawl_detail=False):
             if text:
                 page_links[text.strip().lower()] = href
         
-        for i, box in enumerate(boxes):
-            # Draw detection box
-            x1, y1, x2, y2 = map(int, box)
-            draw.rectangle([x1, y1, x2, y2], outline='red', width=2)
+        link_index = build_link_index(page_links)
+        from_dom = 0
+        
+        for i, detection in enumerate(detections):
+            if detection.get("name"):
+                # Resolved from the DOM by geometry
+                from_dom += 1
+                card_data = {'name': detection["name"]}
+                if detection.get("detail_url"):
+                    card_data['detail_url'] = detection["detail_url"]
+                cards_data.append(card_data)
+                logger.info(f"Processed card {i+1}: {card_data['name'][:100]}...")
+                continue
             
-            # Extract text with OCR
-            ocr_text = extract_text_from_image_region(screenshot_path, box)
+            ocr_text = detection.get("text")
             if not ocr_text:
                 continue
                 
@@ -207,31 +176,7 @@ def process_page_with_cv(url, prompt=None, qa_pipe=None, crawl_detail=False):
             clean_ocr = ' '.join(ocr_text.split())
             
             # Find matching link for this text
-            detail_url = None
-            ocr_lower = clean_ocr.lower()
-            best_match = None
-            best_match_ratio = 0
-            
-            for link_text, link_url in page_links.items():
-                # Try exact match first
-                if link_text == ocr_lower:
-                    detail_url = link_url
-                    break
-                    
-                # Try partial matching with word comparison
-                ocr_words = set(ocr_lower.split())
-                link_words = set(link_text.split())
-                
-                # Calculate word overlap ratio
-                common_words = ocr_words & link_words
-                if common_words:
-                    ratio = len(common_words) / max(len(ocr_words), len(link_words))
-                    if ratio > best_match_ratio:
-                        best_match_ratio = ratio
-                        best_match = link_url
-            
-            if not detail_url and best_match and best_match_ratio > 0.5:  # At least 50% word match
-                detail_url = best_match
+            detail_url = match_link_by_words(clean_ocr.lower(), page_links, link_index)
             
             # Create card data with just the essential information
             card_data = {'name': clean_ocr}
@@ -241,17 +186,38 @@ def process_page_with_cv(url, prompt=None, qa_pipe=None, crawl_detail=False):
             cards_data.append(card_data)
             logger.info(f"Processed card {i+1}: {clean_ocr[:100]}...")
         
-        # Save annotated image
-        annotated_path = screenshot_path.replace('.png', '_annotated.png')
-        img.save(annotated_path)
-        
-        logger.info(f"Processed {len(cards_data)} cards")
+        logger.info(f"Processed {len(cards_data)} cards ({from_dom} from DOM geometry, "
+                    f"{len(cards_data) - from_dom} from OCR)")
         return cards_data
         
     except Exception as e:
         logger.error(f"Error processing page: {str(e)}")
         return []
 
+class DetailGate:
+    def __init__(self, cv_results, similarity_threshold=0.6):
+        """
+        Allow-list for gated deep crawling: the card names and detail URLs
+        found by CV. A legacy candidate passes if its detail URL is one of
+        the cards' or its name validates against a card name the same way
+        combine_cv_and_legacy_results does.
+        """
+        self.names = NameIndex(item['name'] for item in cv_results if item.get('name'))
+        self.urls = {item['detail_url'].rstrip('/') for item in cv_results if item.get('detail_url')}
+        self.similarity_threshold = similarity_threshold
+        self.allowed = 0
+        self.skipped = 0
+
+    def allows(self, name, url=None):
+        ok = bool(url) and url.rstrip('/') in self.urls
+        if not ok:
+            ok = self.names.best_match(name, self.similarity_threshold)[0] > self.similarity_threshold
+        if ok:
+            self.allowed += 1
+        else:
+            self.skipped += 1
+        return ok
+
 def calculate_name_similarity(name1, name2):
     """Calculate similarity ratio between two names"""
     return SequenceMatcher(None, name1.lower(), name2.lower()).ratio()
@@ -264,8 +230,8 @@ def combine_cv_and_legacy_results(cv_results, legacy_results, similarity_thresho
     """
     matched_results = []
     
-    # Extract names detected by CV for validation
-    cv_names = {item.get('name', '').strip().lower() for item in cv_results if item.get('name')}
+    # Index names detected by CV for validation
+    cv_names = NameIndex(item['name'] for item in cv_results if item.get('name'))
     
     # Print header for visibility
     logger.info("\n" + "="*80)
@@ -279,11 +245,7 @@ def combine_cv_and_legacy_results(cv_results, legacy_results, similarity_thresho
             continue
             
         # Check if this name is validated by CV results
-        best_ratio = 0
-        for cv_name in cv_names:
-            ratio = calculate_name_similarity(legacy_name.lower(), cv_name)
-            if ratio > best_ratio:
-                best_ratio = ratio
+        best_ratio, _ = cv_names.best_match(legacy_name, similarity_threshold)
         
         # If name is validated by CV (similarity above threshold)
         if best_ratio > similarity_threshold:
@@ -304,28 +266,41 @@ def combine_cv_and_legacy_results(cv_results, legacy_results, similarity_thresho
     
     return matched_results
 
-def cv_crawl_site(start_url, prompt, qa_pipe, crawl_detail=False):
+def cv_crawl_site(start_url, prompt, qa_pipe, crawl_detail=False, gated=False):
     """
     Enhanced crawl function that uses CV for name validation only.
     The actual scraping and deep crawling is handled by the legacy method.
+    With gated=True, CV runs first and the legacy method only processes
+    (and deep-crawls) the candidates CV validated.
     """
     try:
         logger.info(f"Starting CV-validated crawl: {start_url}")
         
-        # Run CV method first to get validated names
-        logger.info("Running CV method for name detection...")
-        cv_results = process_page_with_cv(start_url, prompt, qa_pipe, False)
+        # Render the start page once for both methods
+        render = page_render.render(start_url)
+        if not render:
+            return []
         
-        # Run legacy method with deep crawling if requested
-        logger.info("Running legacy method for scraping and deep crawling...")
-        legacy_results = crawl_site(
-            start_url=start_url,
-            prompt=prompt,
-            depth=1,
-            max_pages=None,
-            qa_pipe=qa_pipe,
-            crawl_detail=crawl_detail  # Pass through the deep crawling flag
-        )
+        if gated:
+            return _gated_crawl(start_url, prompt, qa_pipe, crawl_detail, render)
+        
+        # Run CV name detection and the legacy method (with deep crawling if
+        # requested) concurrently on the same render
+        logger.info("Running CV method and legacy method concurrently...")
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            cv_future = pool.submit(process_page_with_cv, start_url, prompt, qa_pipe, False, render)
+            legacy_future = pool.submit(
+                crawl_site,
+                start_url=start_url,
+                prompt=prompt,
+                depth=1,
+                max_pages=None,
+                qa_pipe=qa_pipe,
+                crawl_detail=crawl_detail,  # Pass through the deep crawling flag
+                render=render
+            )
+            cv_results = cv_future.result()
+            legacy_results = legacy_future.result()
         
         logger.info(f"\nFound {len(cv_results)} names from CV and {len(legacy_results)} from legacy method")
         
@@ -336,4 +311,27 @@ def cv_crawl_site(start_url, prompt, qa_pipe, crawl_detail=False):
         
     except Exception as e:
         logger.error(f"Error in CV-validated crawl: {str(e)}")
-        return [] 
\ No newline at end of file
+        return []
+
+def _gated_crawl(start_url, prompt, qa_pipe, crawl_detail, render):
+    """CV first; its cards are the allow-list for the legacy (deep) crawl."""
+    logger.info("Running CV method for name detection...")
+    cv_results = process_page_with_cv(start_url, prompt, qa_pipe, False, render)
+    gate = DetailGate(cv_results)
+    
+    logger.info("Running gated legacy method for scraping and deep crawling...")
+    legacy_results = crawl_site(
+        start_url=start_url,
+        prompt=prompt,
+        depth=1,
+        max_pages=None,
+        qa_pipe=qa_pipe,
+        crawl_detail=crawl_detail,
+        render=render,
+        detail_gate=gate
+    )
+    logger.info(f"CV gate allowed {gate.allowed} candidates and skipped {gate.skipped}"
+                f"{' detail pages' if crawl_detail else ''}")
+    
+    logger.info(f"\nFound {len(cv_results)} names from CV and {len(legacy_results)} from legacy method")
+    return combine_cv_and_legacy_results(cv_results, legacy_results)
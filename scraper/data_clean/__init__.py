@@ -2,14 +2,21 @@ from .cleaner import (
     has_valid_phone,
     has_valid_email,
     has_valid_address,
+    validity_masks,
     categorize_data,
     save_categorized_data
 )
+from .stream import StreamingCategorizer, stream_categorized_data
+from .columnar import write_records
 
 __all__ = [
     'has_valid_phone',
     'has_valid_email',
     'has_valid_address',
+    'validity_masks',
     'categorize_data',
-    'save_categorized_data'
+    'save_categorized_data',
+    'StreamingCategorizer',
+    'stream_categorized_data',
+    'write_records'
 ] 
\ No newline at end of file
@@ -6,6 +6,100 @@ import re
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Validation rules, built once and shared by the per-value validators and
+# validity_masks()
+EMAIL_PATTERN = re.compile(r'^[a-zA-Z0-9][a-zA-Z0-9._%+-]{0,63}@[a-zA-Z0-9][a-zA-Z0-9.-]*\.[a-zA-Z]{2,63}$')
+EMAIL_CONSECUTIVE_SPECIALS = re.compile(r'[._%+-]{2,}')
+EMAIL_NUMERIC_LOCAL = re.compile(r'^[0-9]+@')
+
+# Check for placeholder emails
+EMAIL_PLACEHOLDER_PATTERNS = [
+    "example", "exemple", "sample", "test", "demo",
+    "your.email", "your-email", "your_email",
+    "email@", "mail@", "contact@",
+    "info@", "support@", "admin@",
+    "user@", "username@", "name@",
+    "someone@", "someone@example.com",
+    "ton-email@", "votre-mail@", "votre-email@",
+    "votre.email@", "votre_mail@", "votre_email@",
+    "no-reply@", "noreply@", "no.reply@",
+    "donotreply@", "do-not-reply@", "do.not.reply@",
+    "postmaster@", "webmaster@", "hostmaster@",
+    "emailaddress@", "email.address@",
+    "myemail@", "my.email@", "my-email@",
+    "votreadresse@", "votre.adresse@",
+    "adresse.mail@", "adressemail@",
+    # Arabic placeholders
+    "بريد@", "بريدك@", "عنوان@", "عنوانك@"
+]
+
+# Check for placeholder domains
+EMAIL_PLACEHOLDER_DOMAINS = [
+    "example.com", "exemple.com", "sample.com", "test.com",
+    "domain.com", "domaine.com", "site.com", "website.com",
+    "email.com", "mail.com", "yoursite.com", "votresite.com"
+]
+
+# Check for temporary/disposable email services
+TEMP_EMAIL_SERVICES = [
+    "temp", "disposable", "throwaway", "tempmail",
+    "10minutemail", "mailinator", "guerrillamail", "yopmail"
+]
+
+# Common Tunisian address keywords and patterns
+ADDRESS_KEYWORDS = [
+    # French terms
+    'rue', 'avenue', 'boulevard', 'route', 'place', 'quartier',
+    'résidence', 'immeuble', 'appartement', 'étage', 'bloc',
+    'cité', 'zone', 'centre', 'complexe', 'lotissement',
+    
+    # Arabic transliterated terms
+    'nahj', 'charaa', 'hay', 'madina', 'borj',
+    
+    # Common abbreviations
+    'ave', 'blvd', 'rte', 'res', 'apt', 'ctr',
+    'lot', 'bp', 'cp', 'km',
+    
+    # Numbers (with variations)
+    'n°', 'numero', 'numéro', 'num',
+    
+    # Cities and regions
+    'tunis', 'sfax', 'sousse', 'kairouan', 'bizerte',
+    'gabes', 'ariana', 'gafsa', 'monastir', 'ben arous',
+    'kasserine', 'medenine', 'nabeul', 'hammamet', 'tataouine',
+    'beja', 'jendouba', 'siliana', 'zaghouan', 'kebili',
+    'mahdia', 'sidi bouzid', 'tozeur', 'manouba'
+]
+ADDRESS_DIGIT = re.compile(r'\d')
+ADDRESS_POSTAL_CODE = re.compile(r'\b\d{4}\b')
+ADDRESS_STREET = re.compile(r'rue .{3,}')
+ADDRESS_POSTAL_PREFIX = re.compile(r'(?:cp|code postal|bp)\s*\d{4}')
+
+
+def _any_of(words):
+    """One regex matching any of words as a plain substring."""
+    return re.compile('|'.join(re.escape(word) for word in words))
+
+
+# Every rejection rule of has_valid_email after the format check, in one
+# pattern; a valid format has a single '@', so "@.*" reaches into the domain
+EMAIL_REJECT_RE = re.compile('|'.join([
+    EMAIL_CONSECUTIVE_SPECIALS.pattern,
+    EMAIL_NUMERIC_LOCAL.pattern,
+    _any_of(EMAIL_PLACEHOLDER_PATTERNS).pattern,
+    '@.*(?:' + _any_of(EMAIL_PLACEHOLDER_DOMAINS + TEMP_EMAIL_SERVICES).pattern + ')',
+]))
+
+# Overlapping scan for address keywords: at each position the longest keyword
+# starting there; the shorter keywords starting there are its prefixes
+ADDRESS_KEYWORD_SCAN = re.compile(
+    '(?=(' + _any_of(sorted(ADDRESS_KEYWORDS, key=len, reverse=True)).pattern + '))'
+)
+ADDRESS_KEYWORD_PREFIXES = {
+    keyword: frozenset(other for other in ADDRESS_KEYWORDS if keyword.startswith(other))
+    for keyword in ADDRESS_KEYWORDS
+}
+
 def has_valid_phone(phone):
     """
     Check if the phone number is valid (not empty and has digits).
@@ -29,7 +123,7 @@ def has_valid_email(email):
     email = str(email).strip().lower()
     
     # Basic format validation with stricter rules
-    if not re.match(r'^[a-zA-Z0-9][a-zA-Z0-9._%+-]{0,63}@[a-zA-Z0-9][a-zA-Z0-9.-]*\.[a-zA-Z]{2,63}$', email):
+    if not EMAIL_PATTERN.match(email):
         return False
     
     # Check for valid TLD length
@@ -38,7 +132,7 @@ def has_valid_email(email):
         return False
     
     # Check for consecutive special characters
-    if re.search(r'[._%+-]{2,}', email):
+    if EMAIL_CONSECUTIVE_SPECIALS.search(email):
         return False
     
     # Check for valid local part length
@@ -46,53 +140,21 @@ def has_valid_email(email):
     if len(local_part) > 64:
         return False
     
-    # Check for placeholder emails
-    placeholder_patterns = [
-        "example", "exemple", "sample", "test", "demo",
-        "your.email", "your-email", "your_email",
-        "email@", "mail@", "contact@",
-        "info@", "support@", "admin@",
-        "user@", "username@", "name@",
-        "someone@", "someone@example.com",
-        "ton-email@", "votre-mail@", "votre-email@",
-        "votre.email@", "votre_mail@", "votre_email@",
-        "no-reply@", "noreply@", "no.reply@",
-        "donotreply@", "do-not-reply@", "do.not.reply@",
-        "postmaster@", "webmaster@", "hostmaster@",
-        "emailaddress@", "email.address@",
-        "myemail@", "my.email@", "my-email@",
-        "votreadresse@", "votre.adresse@",
-        "adresse.mail@", "adressemail@",
-        # Arabic placeholders
-        "بريد@", "بريدك@", "عنوان@", "عنوانك@"
-    ]
-    
-    # Check for placeholder domains
-    placeholder_domains = [
-        "example.com", "exemple.com", "sample.com", "test.com",
-        "domain.com", "domaine.com", "site.com", "website.com",
-        "email.com", "mail.com", "yoursite.com", "votresite.com"
-    ]
-    
     # Check if email contains any placeholder pattern
-    if any(p in email for p in placeholder_patterns):
+    if any(p in email for p in EMAIL_PLACEHOLDER_PATTERNS):
         return False
     
     # Check domain
     domain = email.split('@')[-1]
-    if any(d in domain for d in placeholder_domains):
+    if any(d in domain for d in EMAIL_PLACEHOLDER_DOMAINS):
         return False
     
     # Check for temporary/disposable email services
-    temp_email_services = [
-        "temp", "disposable", "throwaway", "tempmail",
-        "10minutemail", "mailinator", "guerrillamail", "yopmail"
-    ]
-    if any(service in domain for service in temp_email_services):
+    if any(service in domain for service in TEMP_EMAIL_SERVICES):
         return False
     
     # Additional validation for common patterns
-    if re.match(r'^[0-9]+@', email):  # Emails starting with numbers are often fake
+    if EMAIL_NUMERIC_LOCAL.match(email):  # Emails starting with numbers are often fake
         return False
     
     if len(re.findall(r'[0-9]', local_part)) > len(local_part) / 2:  # Too many numbers in local part
@@ -114,40 +176,15 @@ def has_valid_address(address):
     if len(address) < 5:
         return False
         
-    # Common Tunisian address keywords and patterns
-    address_keywords = [
-        # French terms
-        'rue', 'avenue', 'boulevard', 'route', 'place', 'quartier',
-        'résidence', 'immeuble', 'appartement', 'étage', 'bloc',
-        'cité', 'zone', 'centre', 'complexe', 'lotissement',
-        
-        # Arabic transliterated terms
-        'nahj', 'charaa', 'hay', 'madina', 'borj',
-        
-        # Common abbreviations
-        'ave', 'blvd', 'rte', 'res', 'apt', 'ctr',
-        'lot', 'bp', 'cp', 'km',
-        
-        # Numbers (with variations)
-        'n°', 'numero', 'numéro', 'num',
-        
-        # Cities and regions
-        'tunis', 'sfax', 'sousse', 'kairouan', 'bizerte',
-        'gabes', 'ariana', 'gafsa', 'monastir', 'ben arous',
-        'kasserine', 'medenine', 'nabeul', 'hammamet', 'tataouine',
-        'beja', 'jendouba', 'siliana', 'zaghouan', 'kebili',
-        'mahdia', 'sidi bouzid', 'tozeur', 'manouba'
-    ]
-    
     # Check for presence of address keywords
-    if not any(keyword in address for keyword in address_keywords):
+    if not any(keyword in address for keyword in ADDRESS_KEYWORDS):
         return False
     
     # Check for number patterns (building numbers, postal codes, etc.)
-    has_numbers = bool(re.search(r'\d', address))
+    has_numbers = bool(ADDRESS_DIGIT.search(address))
     
     # Check for postal code pattern (common in Tunisia)
-    has_postal_code = bool(re.search(r'\b\d{4}\b', address))
+    has_postal_code = bool(ADDRESS_POSTAL_CODE.search(address))
     
     # Scoring system
     score = 0
@@ -161,18 +198,99 @@ def has_valid_address(address):
         score += 1
     
     # Keyword checks
-    keyword_count = sum(1 for keyword in address_keywords if keyword in address)
+    keyword_count = sum(1 for keyword in ADDRESS_KEYWORDS if keyword in address)
     score += min(keyword_count, 3)  # Cap at 3 to avoid over-counting
     
     # Check for common Tunisian address patterns
-    if re.search(r'rue .{3,}', address):  # Street name pattern
+    if ADDRESS_STREET.search(address):  # Street name pattern
         score += 1
-    if re.search(r'(cp|code postal|bp)\s*\d{4}', address):  # Postal code pattern
+    if ADDRESS_POSTAL_PREFIX.search(address):  # Postal code pattern
         score += 1
     
     # Consider valid if score is high enough
     return score >= 3  # Adjust threshold as needed
 
+def _unique_text(series):
+    """
+    str() of every distinct value as an object-dtype Series (so .str methods use
+    Python's str and re, like the per-value validators), and the position of each
+    row's value in it. Missing values become "", which no validator accepts.
+    """
+    text = series.where(series.notna(), "").astype(str).astype(object)
+    codes, uniques = pd.factorize(text)
+    return pd.Series(uniques, dtype=object), codes
+
+def phone_mask(phones):
+    """Vectorized has_valid_phone over a Series."""
+    text, codes = _unique_text(phones)
+    valid = text.str.count(ADDRESS_DIGIT.pattern) >= 5
+    return pd.Series(valid.to_numpy()[codes], index=phones.index)
+
+def email_mask(emails):
+    """Vectorized has_valid_email over a Series."""
+    text, codes = _unique_text(emails)
+    email = text.str.strip().str.lower()
+    valid = email.str.match(EMAIL_PATTERN.pattern).astype(bool)
+
+    # The format check already bounds the TLD and local part lengths and
+    # allows a single '@', so only the remaining checks run on the candidates
+    candidates = email[valid]
+    if not candidates.empty:
+        local_part = candidates.str.split('@', n=1).str[0]
+        rejected = (
+            candidates.str.contains(EMAIL_REJECT_RE.pattern)
+            | (local_part.str.count(r'[0-9]') > local_part.str.len() / 2)
+        )
+        valid[rejected[rejected].index] = False
+    return pd.Series(valid.to_numpy()[codes], index=emails.index)
+
+def _keyword_count(matches):
+    """Number of distinct ADDRESS_KEYWORDS found by ADDRESS_KEYWORD_SCAN."""
+    found = set()
+    for match in matches:
+        found |= ADDRESS_KEYWORD_PREFIXES[match]
+    return len(found)
+
+def address_mask(addresses):
+    """Vectorized has_valid_address over a Series."""
+    text, codes = _unique_text(addresses)
+    address = text.str.strip().str.lower()
+    length = address.str.len()
+    valid = length >= 5
+
+    candidates = address[valid]
+    if not candidates.empty:
+        keyword_count = candidates.str.findall(ADDRESS_KEYWORD_SCAN.pattern).map(_keyword_count)
+        score = (
+            candidates.str.contains(ADDRESS_DIGIT.pattern).astype(int)
+            + 2 * candidates.str.contains(ADDRESS_POSTAL_CODE.pattern).astype(int)
+            + (length[valid] > 20).astype(int)
+            + keyword_count.clip(upper=3)
+            + candidates.str.contains(ADDRESS_STREET.pattern).astype(int)
+            + candidates.str.contains(ADDRESS_POSTAL_PREFIX.pattern).astype(int)
+        )
+        rejected = (keyword_count == 0) | (score < 3)
+        valid[rejected[rejected].index] = False
+    return pd.Series(valid.to_numpy()[codes], index=addresses.index)
+
+def validity_masks(df):
+    """
+    Validity flags of every row, computed in one pass over each column.
+    Result-identical to applying has_valid_phone, has_valid_email and
+    has_valid_address row by row; each distinct value is validated once.
+    
+    Args:
+        df (pd.DataFrame): Dataframe with phone, email and address columns
+        
+    Returns:
+        dict: Boolean Series keyed by 'phone', 'email' and 'address'
+    """
+    return {
+        'phone': phone_mask(df['phone']),
+        'email': email_mask(df['email']),
+        'address': address_mask(df['address'])
+    }
+
 def categorize_data(df):
     """
     Categorize the dataframe into three types:
@@ -190,28 +308,15 @@ def categorize_data(df):
         logger.warning("Empty dataframe provided to categorize_data")
         return df, df, df
     
-    # Create copies to avoid modifying the original
-    raw_df = df.copy()
-    contact_df = df.copy()
-    location_df = df.copy()
-    
-    # Add validation columns
-    contact_df['has_valid_phone'] = contact_df['phone'].apply(has_valid_phone)
-    contact_df['has_valid_email'] = contact_df['email'].apply(has_valid_email)
-    location_df['has_valid_phone'] = location_df['phone'].apply(has_valid_phone)
-    location_df['has_valid_address'] = location_df['address'].apply(has_valid_address)
+    # Validate each column once; the views are selected by mask
+    masks = validity_masks(df)
+    raw_df = df
     
     # Filter contact data (has phone OR email)
-    contact_df = contact_df[
-        (contact_df['has_valid_phone']) | 
-        (contact_df['has_valid_email'])
-    ].drop(['has_valid_phone', 'has_valid_email'], axis=1).reset_index(drop=True)
+    contact_df = df[(masks['phone'] | masks['email']).to_numpy()].reset_index(drop=True)
     
     # Filter location data (has phone AND address)
-    location_df = location_df[
-        (location_df['has_valid_phone']) & 
-        (location_df['has_valid_address'])
-    ].drop(['has_valid_phone', 'has_valid_address'], axis=1).reset_index(drop=True)
+    location_df = df[(masks['phone'] & masks['address']).to_numpy()].reset_index(drop=True)
     
     logger.info(f"Total rows: {len(raw_df)}")
     logger.info(f"Rows with contact info: {len(contact_df)}")
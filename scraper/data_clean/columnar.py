@@ -0,0 +1,132 @@
+import logging
+import mmap
+import os
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+PARQUET_COMPRESSION = "zstd"
+FLOAT_COLUMNS = {"latitude", "longitude"}
+# Filled in by geocoding; the location outputs always have them
+LOCATION_COLUMNS = ["latitude", "longitude", "geocode_precision"]
+
+MAPPED_CHUNK_SIZE = 1 << 20
+
+FORMATS = {
+    "parquet": (".parquet", "application/vnd.apache.parquet"),
+    "arrow": (".arrow", "application/vnd.apache.arrow.file"),
+}
+
+
+def available():
+    """Whether pyarrow is installed."""
+    return pa is not None
+
+
+def schema_for(columns):
+    """Arrow schema of columns: floats for coordinates, strings for everything else."""
+    return pa.schema([
+        pa.field(column, pa.float64() if column in FLOAT_COLUMNS else pa.string())
+        for column in columns
+    ])
+
+
+def to_table(df, schema):
+    """Typed Arrow table of df; missing columns are null, other values become str."""
+    arrays = []
+    for field in schema:
+        values = df[field.name] if field.name in df.columns else pd.Series([None] * len(df), dtype=object)
+        if pa.types.is_floating(field.type):
+            arrays.append(pa.array(pd.to_numeric(values, errors="coerce").to_numpy(dtype=float),
+                                   type=field.type, from_pandas=True))
+        else:
+            arrays.append(pa.array([None if pd.isna(value) else str(value) for value in values],
+                                   type=field.type))
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+
+class ColumnarWriter:
+    def __init__(self, path_base, columns):
+        """
+        Append tables to <path_base>.parquet and <path_base>.arrow (Arrow IPC file).
+        Both are written under temporary names and moved into place by close(),
+        so readers never see a partial file.
+        """
+        self.path_base = path_base
+        self.schema = schema_for(columns)
+        self._parquet = pq.ParquetWriter(f"{path_base}.parquet.tmp", self.schema,
+                                         compression=PARQUET_COMPRESSION)
+        self._sink = pa.OSFile(f"{path_base}.arrow.tmp", "wb")
+        self._ipc = pa.ipc.new_file(self._sink, self.schema)
+
+    def write(self, df):
+        table = to_table(df, self.schema)
+        self._parquet.write_table(table)
+        self._ipc.write_table(table)
+
+    def close(self):
+        self._parquet.close()
+        self._ipc.close()
+        self._sink.close()
+        for ext, _ in FORMATS.values():
+            os.replace(f"{self.path_base}{ext}.tmp", f"{self.path_base}{ext}")
+
+
+def write_records(records, path_base, columns=None):
+    """
+    Write records (dictionaries) to <path_base>.parquet and <path_base>.arrow.
+
+    Args:
+        records (list): Records to write
+        path_base (str): Output path without extension
+        columns (list, optional): Columns in order; defaults to the keys of the
+            records in first-seen order
+
+    Returns:
+        bool: False when pyarrow is not installed
+    """
+    if not available():
+        return False
+    if columns is None:
+        columns = list(dict.fromkeys(key for record in records for key in record))
+    writer = ColumnarWriter(path_base, columns)
+    try:
+        writer.write(pd.DataFrame(records, columns=columns))
+    finally:
+        writer.close()
+    return True
+
+
+def open_mapped(path):
+    """
+    Read-only memory map of path (empty bytes for an empty file). The map
+    keeps the file's current contents even if path is replaced afterwards,
+    so len() of it is the size of what iter_mapped() will send.
+    """
+    with open(path, "rb") as f:
+        if not os.fstat(f.fileno()).st_size:
+            return b""
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def iter_mapped(mapped, chunk_size=MAPPED_CHUNK_SIZE):
+    """Yield an open_mapped() map chunk_size bytes at a time, then close it."""
+    try:
+        view = memoryview(mapped)
+        try:
+            for start in range(0, len(view), chunk_size):
+                yield bytes(view[start:start + chunk_size])
+        finally:
+            view.release()
+    finally:
+        if isinstance(mapped, mmap.mmap):
+            mapped.close()
@@ -0,0 +1,159 @@
+import logging
+import os
+
+import pandas as pd
+
+from . import columnar
+from .cleaner import validity_masks
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 5000
+OUTPUT_FILES = {
+    "raw": "raw_data.csv",
+    "contact": "contact_data.csv",
+    "location": "location_data.csv",
+}
+
+
+class StreamingCategorizer:
+    def __init__(self, output_dir="output", columns=None, chunk_size=CHUNK_SIZE, keep_records=False,
+                 columnar_output=True):
+        """
+        Categorize records chunk by chunk into raw, contact and location CSV files.
+
+        Each output keeps one open handle; every chunk is appended to it and
+        fsynced, so memory stays bounded by chunk_size and finished chunks are
+        on disk. Categorization is the same as categorize_data.
+
+        Args:
+            output_dir (str): Directory of raw_data.csv, contact_data.csv and location_data.csv
+            columns (list, optional): CSV columns; defaults to the keys of the first
+                chunk, in first-seen order (keys first seen later are not written)
+            chunk_size (int): Records categorized and written at a time
+            keep_records (bool): Also keep the categorized records in memory
+                (raw_records, contact_records, location_records)
+            columnar_output (bool): Also write each output as Parquet and Arrow IPC
+                (see columnar.py) when pyarrow is installed
+        """
+        self.output_dir = output_dir
+        self.columns = list(columns) if columns is not None else None
+        self.chunk_size = max(1, chunk_size)
+        self.keep_records = keep_records
+        self.counts = {name: 0 for name in OUTPUT_FILES}
+        self.raw_records, self.contact_records, self.location_records = [], [], []
+        self._buffer = []
+        self._dropped_columns = set()
+        self._columnar = {}
+        if columnar_output and not columnar.available():
+            logger.warning("pyarrow is not installed; writing CSV only")
+        self.columnar_output = columnar_output and columnar.available()
+
+        os.makedirs(output_dir, exist_ok=True)
+        self._handles = {
+            name: open(os.path.join(output_dir, filename), "w", newline="", encoding="utf-8")
+            for name, filename in OUTPUT_FILES.items()
+        }
+        if self.columns is not None:
+            self._write_headers()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def path(self, name, fmt="csv"):
+        """Path of the raw, contact or location output in csv, parquet or arrow format."""
+        path = os.path.join(self.output_dir, OUTPUT_FILES[name])
+        return path if fmt == "csv" else os.path.splitext(path)[0] + columnar.FORMATS[fmt][0]
+
+    def _write_headers(self):
+        header = pd.DataFrame(columns=self.columns)
+        for handle in self._handles.values():
+            header.to_csv(handle, index=False)
+        if self.columnar_output:
+            for name in OUTPUT_FILES:
+                columns = self.columns
+                if name == "location":
+                    columns = columns + [c for c in columnar.LOCATION_COLUMNS if c not in columns]
+                self._columnar[name] = columnar.ColumnarWriter(os.path.splitext(self.path(name))[0], columns)
+
+    def add(self, records):
+        """Buffer records; every full chunk is categorized and written."""
+        for record in records:
+            self._buffer.append(record)
+            if len(self._buffer) >= self.chunk_size:
+                self._flush()
+
+    def _flush(self):
+        if not self._buffer:
+            return
+        # Object columns keep every value as scraped; inferring dtypes per chunk
+        # would print 71123456 as 71123456.0 only in chunks with a missing value
+        chunk, self._buffer = pd.DataFrame(self._buffer, dtype=object), []
+        if self.columns is None:
+            self.columns = list(chunk.columns)
+            self._write_headers()
+        extra = set(chunk.columns) - set(self.columns) - self._dropped_columns
+        if extra:
+            logger.warning(f"Columns not in the CSV header are not written: {sorted(extra)}")
+            self._dropped_columns |= extra
+        chunk = chunk.reindex(columns=self.columns)
+
+        masks = validity_masks(chunk)
+        views = {
+            "raw": chunk,
+            "contact": chunk[(masks['phone'] | masks['email']).to_numpy()],
+            "location": chunk[(masks['phone'] & masks['address']).to_numpy()],
+        }
+        for name, view in views.items():
+            handle = self._handles[name]
+            view.to_csv(handle, header=False, index=False)
+            handle.flush()
+            os.fsync(handle.fileno())
+            self.counts[name] += len(view)
+            if name in self._columnar:
+                self._columnar[name].write(view)
+        if self.keep_records:
+            self.raw_records.extend(views["raw"].to_dict(orient='records'))
+            self.contact_records.extend(views["contact"].to_dict(orient='records'))
+            self.location_records.extend(views["location"].to_dict(orient='records'))
+
+    def close(self):
+        """Write the last partial chunk and close the outputs."""
+        if not self._handles:
+            return
+        try:
+            self._flush()
+        finally:
+            for handle in self._handles.values():
+                handle.close()
+            self._handles = {}
+            for writer in self._columnar.values():
+                writer.close()
+            self._columnar = {}
+        logger.info(f"Total rows: {self.counts['raw']}")
+        logger.info(f"Rows with contact info: {self.counts['contact']}")
+        logger.info(f"Rows with location info: {self.counts['location']}")
+
+
+def stream_categorized_data(records, output_dir="output", columns=None, chunk_size=CHUNK_SIZE):
+    """
+    Categorize an iterable of records into the three CSV files without
+    building a DataFrame of all of them.
+
+    Args:
+        records (iterable): Scraped records (dictionaries), e.g. a generator
+        output_dir (str): Directory to save the files
+        columns (list, optional): CSV columns (see StreamingCategorizer)
+        chunk_size (int): Records categorized and written at a time
+
+    Returns:
+        dict: Rows written to each output, keyed by raw, contact and location
+    """
+    with StreamingCategorizer(output_dir, columns=columns, chunk_size=chunk_size) as categorizer:
+        categorizer.add(records)
+    return categorizer.counts
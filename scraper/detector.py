@@ -0,0 +1,180 @@
+"""
+Card detector service.
+
+The YOLO card detector is loaded once per process through the model
+registry ("yolo"). Callers submit decoded images (pages or tiles) and get a
+future back; a batcher thread coalesces whatever arrives within
+MAX_LATENCY seconds into one batched predict call of at most MAX_BATCH_SIZE
+images, so tiles processed concurrently share a forward pass.
+
+Inference runs at IMGSZ (default 640; lower is faster on CPU). When an
+exported model sits next to the weights (`best.onnx` or `best_openvino_model/`)
+and EZER_DETECTOR_FORMAT selects it, that is loaded instead of the PyTorch
+weights. Export with:
+
+    python -m scraper.detector --export onnx --imgsz 640
+"""
+import argparse
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .models import registry
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+WEIGHTS = os.environ.get("EZER_DETECTOR_WEIGHTS", "best.pt")
+FORMAT = os.environ.get("EZER_DETECTOR_FORMAT", "pt")  # pt | onnx | openvino
+IMGSZ = int(os.environ.get("EZER_DETECTOR_IMGSZ", "640"))
+MAX_BATCH_SIZE = 8
+MAX_LATENCY = 0.05  # seconds an image may wait for batch-mates
+LATENCY_WINDOW = 256  # batches kept for percentiles
+
+_EXPORT_SUFFIXES = {"onnx": ".onnx", "openvino": "_openvino_model"}
+
+
+def exported_path(fmt: str = FORMAT, weights: str = WEIGHTS) -> Optional[str]:
+    """Path of the exported model for fmt, or None for the PyTorch weights."""
+    if fmt not in _EXPORT_SUFFIXES:
+        return None
+    return os.path.splitext(weights)[0] + _EXPORT_SUFFIXES[fmt]
+
+
+def _load_card_detector():
+    from ultralytics import YOLO
+    path = exported_path()
+    if path and os.path.exists(path):
+        logger.info(f"Loading exported card detector {path}")
+        return YOLO(path, task="detect")
+    if path:
+        logger.warning(f"No exported {FORMAT} detector at {path}, using {WEIGHTS}")
+    return YOLO(WEIGHTS)
+
+registry.register("yolo", _load_card_detector)
+
+
+def export(fmt: str = "onnx", imgsz: int = IMGSZ, weights: str = WEIGHTS) -> str:
+    """Export the detector for CPU inference; returns the exported path."""
+    from ultralytics import YOLO
+    if fmt not in _EXPORT_SUFFIXES:
+        raise ValueError(f"Unsupported export format: {fmt}")
+    # Dynamic axes let the ONNX model take batches of any size
+    path = YOLO(weights).export(format=fmt, imgsz=imgsz, dynamic=(fmt == "onnx"))
+    logger.info(f"Exported card detector to {path}")
+    return str(path)
+
+
+class CardDetector:
+    def __init__(self, imgsz: int = IMGSZ, max_batch_size: int = MAX_BATCH_SIZE,
+                 max_latency: float = MAX_LATENCY):
+        """Batched access to the registry's YOLO model."""
+        self.imgsz = imgsz
+        self.max_batch_size = max_batch_size
+        self.max_latency = max_latency
+        self._queue = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._batches = 0
+        self._images = 0
+        self._latencies = []
+
+    def _ensure_started(self):
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._serve, name="card-detector", daemon=True)
+                self._thread.start()
+
+    def submit(self, image: np.ndarray) -> Future:
+        """Queue a decoded BGR image; the future resolves to an (N, 4) xyxy array."""
+        self._ensure_started()
+        future = Future()
+        self._queue.put((image, future))
+        return future
+
+    def detect(self, image: np.ndarray) -> np.ndarray:
+        """Card boxes (x1, y1, x2, y2) in image pixels."""
+        return self.submit(image).result()
+
+    def detect_many(self, images: List[np.ndarray]) -> List[np.ndarray]:
+        """Boxes per image; the images are batched together."""
+        futures = [self.submit(image) for image in images]
+        return [future.result() for future in futures]
+
+    def _serve(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_latency
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._run_batch(batch)
+
+    def _run_batch(self, batch):
+        images = [image for image, _ in batch]
+        try:
+            model = registry.get("yolo")
+            start = time.perf_counter()
+            results = model(images, imgsz=self.imgsz, verbose=False)
+            self._record(len(images), time.perf_counter() - start)
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        for (_, future), result in zip(batch, results):
+            if result.boxes is None or not len(result.boxes):
+                future.set_result(np.empty((0, 4), dtype=np.float32))
+            else:
+                future.set_result(result.boxes.xyxy.cpu().numpy())
+
+    def _record(self, size, seconds):
+        with self._stats_lock:
+            self._batches += 1
+            self._images += size
+            self._latencies.append((size, seconds))
+            del self._latencies[:-LATENCY_WINDOW]
+
+    def stats(self) -> Dict:
+        """Batch count, mean batch size and per-batch / per-image latency."""
+        with self._stats_lock:
+            latencies = sorted(seconds for _, seconds in self._latencies)
+            images = sum(size for size, _ in self._latencies)
+            return {
+                "format": FORMAT,
+                "imgsz": self.imgsz,
+                "loaded": registry.is_loaded("yolo"),
+                "batches": self._batches,
+                "images": self._images,
+                "mean_batch_size": round(self._images / self._batches, 2) if self._batches else 0.0,
+                "batch_ms": {
+                    "mean": round(sum(latencies) / len(latencies) * 1000, 1) if latencies else 0.0,
+                    "p95": round(latencies[int(0.95 * (len(latencies) - 1))] * 1000, 1) if latencies else 0.0
+                },
+                "per_image_ms": round(sum(latencies) / images * 1000, 1) if images else 0.0
+            }
+
+
+# Create a global instance
+card_detector = CardDetector()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export the card detector for CPU inference")
+    parser.add_argument("--export", choices=sorted(_EXPORT_SUFFIXES), default="onnx")
+    parser.add_argument("--imgsz", type=int, default=IMGSZ)
+    parser.add_argument("--weights", default=WEIGHTS)
+    args = parser.parse_args()
+    export(args.export, args.imgsz, args.weights)
@@ -0,0 +1,126 @@
+"""
+Resolve detected card boxes to DOM elements by geometry.
+
+The render records the page rect of every link and visible text node (see
+page_render.GEOMETRY_SCRIPT). DomIndex puts the text nodes and links in a
+uniform grid so a card box only looks at the cells it covers. A card's name
+is its most prominent text node (largest font, then boldest, then topmost);
+its detail URL is the link around that text, else the link most of the
+card's text belongs to, else a link covering the whole card.
+"""
+import logging
+from collections import Counter
+from typing import Dict, List, Optional
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+CELL_SIZE = 256  # CSS px
+MIN_NAME_CHARS = 3
+GENERIC_LINK_TEXTS = {
+    "read more", "more", "details", "view", "view more", "learn more", "see more",
+    "voir", "voir plus", "plus", "en savoir plus", "détails", "lire la suite"
+}
+
+
+class GridIndex:
+    def __init__(self, cell_size: int = CELL_SIZE):
+        """Uniform grid over page rects (x1, y1, x2, y2)."""
+        self.cell_size = cell_size
+        self._cells = {}
+        self._rects = []
+
+    def _cell_range(self, rect):
+        size = self.cell_size
+        return (range(int(rect[0] // size), int(rect[2] // size) + 1),
+                range(int(rect[1] // size), int(rect[3] // size) + 1))
+
+    def insert(self, rect, item_id: int):
+        self._rects.append((rect, item_id))
+        xs, ys = self._cell_range(rect)
+        for cx in xs:
+            for cy in ys:
+                self._cells.setdefault((cx, cy), []).append(len(self._rects) - 1)
+
+    def query(self, rect) -> List[int]:
+        """Ids of the items whose rect intersects rect."""
+        seen, found = set(), []
+        xs, ys = self._cell_range(rect)
+        for cx in xs:
+            for cy in ys:
+                for slot in self._cells.get((cx, cy), ()):
+                    if slot in seen:
+                        continue
+                    seen.add(slot)
+                    other, item_id = self._rects[slot]
+                    if other[0] < rect[2] and other[2] > rect[0] and other[1] < rect[3] and other[3] > rect[1]:
+                        found.append(item_id)
+        return found
+
+
+def _center_inside(rect, box):
+    cx, cy = (rect[0] + rect[2]) / 2, (rect[1] + rect[3]) / 2
+    return box[0] <= cx <= box[2] and box[1] <= cy <= box[3]
+
+
+def _contains(outer, inner):
+    return outer[0] <= inner[0] and outer[1] <= inner[1] and outer[2] >= inner[2] and outer[3] >= inner[3]
+
+
+class DomIndex:
+    def __init__(self, geometry: Optional[Dict], scale: float = 1.0):
+        """
+        Args:
+            geometry (dict): {"anchors": [...], "texts": [...]} from the render
+            scale (float): Image px per CSS px (device pixel ratio of the capture)
+        """
+        geometry = geometry or {}
+        self.anchors = geometry.get("anchors") or []
+        self.texts = geometry.get("texts") or []
+        self.scale = scale or 1.0
+        self._text_grid = GridIndex()
+        self._anchor_grid = GridIndex()
+        for i, node in enumerate(self.texts):
+            self._text_grid.insert(node["rect"], i)
+        for i, anchor in enumerate(self.anchors):
+            self._anchor_grid.insert(anchor["rect"], i)
+
+    def __bool__(self):
+        return bool(self.texts or self.anchors)
+
+    def resolve(self, box_px) -> Optional[Dict]:
+        """
+        Name and detail URL for a card box in capture pixels, or None when no
+        DOM text lies inside it.
+        """
+        box = tuple(v / self.scale for v in box_px)
+        nodes = [i for i in self._text_grid.query(box) if _center_inside(self.texts[i]["rect"], box)]
+        nodes = [i for i in nodes if len(self.texts[i]["text"].strip()) >= MIN_NAME_CHARS]
+        if not nodes:
+            return None
+
+        def prominence(i):
+            node = self.texts[i]
+            generic = node["text"].strip().lower() in GENERIC_LINK_TEXTS
+            return (not generic, node.get("font_size", 0), node.get("font_weight", 400), -node["rect"][1])
+
+        name_node = self.texts[max(nodes, key=prominence)]
+        card = {"name": " ".join(name_node["text"].split())}
+
+        anchor = name_node.get("anchor", -1)
+        if anchor < 0:
+            # The link most of the card's text belongs to
+            owners = Counter(self.texts[i].get("anchor", -1) for i in nodes)
+            owners.pop(-1, None)
+            if owners:
+                anchor = owners.most_common(1)[0][0]
+        if anchor < 0:
+            # A link wrapping the whole card
+            for i in self._anchor_grid.query(box):
+                if _contains(self.anchors[i]["rect"], box):
+                    anchor = i
+                    break
+        if anchor >= 0:
+            card["detail_url"] = self.anchors[anchor]["href"]
+        return card
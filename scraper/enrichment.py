@@ -0,0 +1,114 @@
+"""
+Background location enrichment.
+
+A workflow completes as soon as its records are categorized; geocoding its
+location rows runs afterwards as an EnrichmentJob on its own thread. The job
+keeps its own copy of the rows and writes coordinates into them as each
+address is resolved, so snapshot() can serve partial results while it runs.
+When every row has been tried, on_complete(job) is called (main.py sends the
+LOCATION_ENRICHED webhook from there).
+"""
+import copy
+import logging
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from .geocoder import GEOCODE_PRECISION, LocationGeocoder, apply_result
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class EnrichmentJob:
+    def __init__(self, workflow_id, locations: List[Dict], precision: Optional[str] = None,
+                 google_api_key: str = None, on_complete: Optional[Callable[["EnrichmentJob"], None]] = None):
+        """
+        Args:
+            workflow_id: Workflow whose location rows are enriched
+            locations (List[Dict]): Location rows; copied, the originals are not modified
+            precision (str, optional): Coarsest precision resolved offline
+            google_api_key (str, optional): Google Maps API key for better results
+            on_complete (Callable, optional): Called with the job once it has finished
+        """
+        self.workflow_id = workflow_id
+        self.rows = copy.deepcopy(locations)
+        self.precision = precision or GEOCODE_PRECISION
+        self.google_api_key = google_api_key
+        self.on_complete = on_complete
+        self.status = "pending"
+        self.error = None
+        self.done = 0
+        self.geocoded = 0
+        self.started_at = None
+        self.finished_at = None
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self) -> "EnrichmentJob":
+        self._thread = threading.Thread(target=self._run, name=f"enrich-{self.workflow_id}", daemon=True)
+        self._thread.start()
+        return self
+
+    def join(self, timeout: Optional[float] = None):
+        if self._thread:
+            self._thread.join(timeout)
+
+    def _apply(self, idx: int, result: Optional[Dict]):
+        with self._lock:
+            apply_result(self.rows[idx], result)
+            self.done += 1
+            if result:
+                self.geocoded += 1
+
+    def _run(self):
+        self.status = "running"
+        self.started_at = time.time()
+        logger.info(f"Enriching {len(self.rows)} location rows for workflow {self.workflow_id}")
+        try:
+            geocoder = LocationGeocoder(google_api_key=self.google_api_key, precision=self.precision)
+            # Rows without an address have nothing to geocode but still count as done
+            indices = [idx for idx, row in enumerate(self.rows) if row.get('address')]
+            with self._lock:
+                self.done = len(self.rows) - len(indices)
+            _, stats = geocoder.geocode_batch(
+                [self.rows[idx]['address'] for idx in indices],
+                on_result=lambda i, result: self._apply(indices[i], result)
+            )
+            geocoder.log_batch(stats, time.time() - self.started_at)
+            self.status = "completed"
+        except Exception as e:
+            logger.error(f"Location enrichment failed for workflow {self.workflow_id}: {e}")
+            self.status = "failed"
+            self.error = str(e)
+        self.finished_at = time.time()
+
+        if self.on_complete:
+            try:
+                self.on_complete(self)
+            except Exception as e:
+                logger.error(f"Enrichment callback failed for workflow {self.workflow_id}: {e}")
+
+    def snapshot(self) -> List[Dict]:
+        """Copy of the rows, with the coordinates resolved so far."""
+        with self._lock:
+            return [dict(row) for row in self.rows]
+
+    def progress(self) -> Dict:
+        with self._lock:
+            return {
+                "workflow_id": self.workflow_id,
+                "status": self.status,
+                "total": len(self.rows),
+                "done": self.done,
+                "geocoded": self.geocoded,
+                "elapsed": round((self.finished_at or time.time()) - self.started_at, 1) if self.started_at else 0.0,
+                "error": self.error,
+            }
+
+
+def start_enrichment(workflow_id, locations: List[Dict], precision: Optional[str] = None,
+                     on_complete: Optional[Callable[[EnrichmentJob], None]] = None) -> EnrichmentJob:
+    """Start geocoding locations in the background and return the running job."""
+    return EnrichmentJob(workflow_id, locations, precision=precision, on_complete=on_complete).start()
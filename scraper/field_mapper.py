@@ -1,12 +1,120 @@
-from typing import Dict, List, Optional, Set
+from typing import Dict, Iterable, List, Optional, Set
+from bisect import bisect_right
+from collections import deque
+import json
 import re
-from langdetect import detect
+from .language import detect_language
 import logging
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Fields suggested by each kind of context
+_CONTEXT_FIELDS = {
+    'contact_info': ['phone', 'email'],
+    'location_info': ['address'],
+    'personal_info': ['name', 'poste'],
+    'communication': ['phone', 'email'],
+    'business': ['domain', 'name'],
+    'industry': ['domain']
+}
+
+class SynonymMatcher:
+    """
+    Compiled matcher for one language's field synonyms.
+
+    Gives the same answer as checking, field by field in order, whether any
+    synonym is a substring of the text or the text a substring of a synonym:
+    - synonym-in-text uses an Aho-Corasick automaton whose nodes carry the
+      lowest field index among the synonyms ending there,
+    - text-in-synonym is one str.find() over all synonyms joined in field
+      order, so the first hit belongs to the lowest field index.
+    """
+    _NO_MATCH = float('inf')
+    _MEMO_SIZE = 4096  # the same few questions are asked for every page
+
+    def __init__(self, field_synonyms: Dict[str, Set[str]]):
+        self.fields = list(field_synonyms)
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [self._NO_MATCH]
+        self._memo = {}
+
+        joined_parts, starts, owners = [], [], []
+        position = 0
+        for idx, field in enumerate(self.fields):
+            for synonym in sorted(field_synonyms[field]):
+                self._add(synonym, idx)
+                starts.append(position)
+                owners.append(idx)
+                joined_parts.append(synonym)
+                position += len(synonym) + 1
+        self._joined = '\x00'.join(joined_parts)
+        self._starts = starts
+        self._owners = owners
+        self._build_failure_links()
+
+    def _add(self, synonym, field_idx):
+        node = 0
+        for ch in synonym:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(self._NO_MATCH)
+            node = nxt
+        self._out[node] = min(self._out[node], field_idx)
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(ch, 0)
+                self._fail[child] = target if target != child else 0
+                # A node also matches everything its failure node matches
+                self._out[child] = min(self._out[child], self._out[self._fail[child]])
+                queue.append(child)
+
+    def match(self, text: str) -> Optional[str]:
+        """Return the first field (in definition order) matching text, or None."""
+        cached = self._memo.get(text)
+        if cached is not None or text in self._memo:
+            return cached
+        field = self._match(text.replace('\x00', ''))
+        if len(self._memo) >= self._MEMO_SIZE:
+            self._memo.clear()
+        self._memo[text] = field
+        return field
+
+    def _match(self, text):
+        goto, fail, out = self._goto, self._fail, self._out
+        best = out[0]
+        node = 0
+        for ch in text:
+            nxt = goto[node].get(ch)
+            while nxt is None and node:
+                node = fail[node]
+                nxt = goto[node].get(ch)
+            node = nxt or 0
+            if out[node] < best:
+                best = out[node]
+                if best == 0:
+                    break
+
+        if best != 0 and self._starts:
+            pos = self._joined.find(text)
+            if pos != -1:
+                best = min(best, self._owners[bisect_right(self._starts, pos) - 1])
+
+        return self.fields[best] if best != self._NO_MATCH else None
+
 class FieldMapper:
     def __init__(self):
         # Define field mappings for different languages
@@ -28,6 +136,15 @@ class FieldMapper:
                 'domain': {'industrie', 'secteur', 'spécialité', 'domaine d\'activité', 'secteur d\'activité', 'métier'},
                 'website': {'site web', 'site', 'web', 'url', 'site de l\'entreprise', 'adresse web'},
                 'poste': {'poste', 'emploi', 'fonction', 'titre', 'rôle', 'occupation'}
+            },
+            'ar': {
+                'name': {'اسم', 'الاسم', 'الاسم الكامل', 'شخص'},
+                'phone': {'هاتف', 'الهاتف', 'رقم الهاتف', 'جوال', 'محمول', 'رقم'},
+                'email': {'بريد إلكتروني', 'البريد الإلكتروني', 'ايميل', 'بريد'},
+                'address': {'عنوان', 'العنوان', 'مكان', 'شارع', 'مقر'},
+                'domain': {'مجال', 'قطاع', 'نشاط', 'مجال النشاط', 'اختصاص'},
+                'website': {'موقع إلكتروني', 'الموقع الإلكتروني', 'موقع الويب', 'رابط'},
+                'poste': {'منصب', 'وظيفة', 'صفة', 'مهنة', 'دور'}
             }
         }
 
@@ -48,15 +165,54 @@ class FieldMapper:
                 'communication': r'(?:téléphone|appeler|email|message|contact)',
                 'business': r'(?:entreprise|société|organisation|firme)',
                 'industry': r'(?:industrie|domaine|secteur|spécialité|domaine d\'activité|métier)'
+            },
+            'ar': {
+                'contact_info': r'(?:اتصال|تواصل|الاتصال)',
+                'location_info': r'(?:أين|عنوان|موقع|مكان)',
+                'personal_info': r'(?:من هو|من هي|شخص|اسم)',
+                'communication': r'(?:هاتف|اتصل|بريد|رسالة)',
+                'business': r'(?:شركة|مؤسسة|منظمة|جمعية)',
+                'industry': r'(?:مجال|قطاع|نشاط|اختصاص)'
             }
         }
 
+        # Compile once per language; rebuilt when synonyms are added
+        self._matchers: Dict[str, SynonymMatcher] = {}
+        self._compiled_patterns: Dict[str, List] = {}
+        for language in self.field_mappings:
+            self._compile_language(language)
+        for language in self.context_patterns:
+            self._compiled_patterns[language] = [
+                (context_type, re.compile(pattern))
+                for context_type, pattern in self.context_patterns[language].items()
+            ]
+
+    def _compile_language(self, language: str):
+        self._matchers[language] = SynonymMatcher(self.field_mappings[language])
+
+    def add_synonyms(self, language: str, mappings: Dict[str, Iterable[str]]):
+        """
+        Extend the synonym vocabulary of a language and recompile its matcher.
+        New fields are matched after the existing ones.
+        """
+        language_mappings = self.field_mappings.setdefault(language, {})
+        for field, synonyms in mappings.items():
+            language_mappings.setdefault(field, set()).update(
+                syn.lower().strip() for syn in synonyms if syn and syn.strip()
+            )
+        self._compile_language(language)
+
+    def load_synonyms(self, path: str):
+        """Load a JSON vocabulary of the form {language: {field: [synonym, ...]}}."""
+        with open(path, encoding='utf-8') as f:
+            vocabulary = json.load(f)
+        for language, mappings in vocabulary.items():
+            self.add_synonyms(language, mappings)
+        logger.info(f"Loaded synonyms for {len(vocabulary)} languages from {path}")
+
     def detect_language(self, text: str) -> str:
-        """Detect the language of the given text."""
-        try:
-            return detect(text)
-        except:
-            return 'en'  # Default to English if detection fails
+        """Detect the language of the given text (memoized, defaults to English)."""
+        return detect_language(text, default='en')
 
     def get_field_mappings(self, language: str) -> Dict[str, Set[str]]:
         """Get field mappings for the specified language."""
@@ -75,18 +231,8 @@ class FieldMapper:
             language = self.detect_language(text)
         
         text = text.lower().strip()
-        mappings = self.get_field_mappings(language)
-        
-        for field, synonyms in mappings.items():
-            if text in synonyms:
-                return field
-            
-            # Check for partial matches
-            for synonym in synonyms:
-                if synonym in text or text in synonym:
-                    return field
-        
-        return None
+        matcher = self._matchers.get(language, self._matchers['en'])
+        return matcher.match(text)
 
     def understand_context(self, text: str, language: Optional[str] = None) -> List[str]:
         """
@@ -96,24 +242,13 @@ class FieldMapper:
             language = self.detect_language(text)
         
         text = text.lower().strip()
-        patterns = self.get_context_patterns(language)
+        patterns = self._compiled_patterns.get(language, self._compiled_patterns['en'])
         relevant_fields = set()
         
         # Check for context patterns
-        for context_type, pattern in patterns.items():
-            if re.search(pattern, text):
-                if context_type == 'contact_info':
-                    relevant_fields.update(['phone', 'email'])
-                elif context_type == 'location_info':
-                    relevant_fields.update(['address'])
-                elif context_type == 'personal_info':
-                    relevant_fields.update(['name', 'poste'])
-                elif context_type == 'communication':
-                    relevant_fields.update(['phone', 'email'])
-                elif context_type == 'business':
-                    relevant_fields.update(['domain', 'name'])
-                elif context_type == 'industry':
-                    relevant_fields.update(['domain'])
+        for context_type, pattern in patterns:
+            if pattern.search(text):
+                relevant_fields.update(_CONTEXT_FIELDS[context_type])
         
         # Also try direct field mapping
         mapped_field = self.map_field(text, language)
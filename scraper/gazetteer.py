@@ -0,0 +1,183 @@
+"""
+Offline gazetteer of Tunisian governorates, delegations and postal codes.
+
+Every place has a centroid (its main town) and a precision level:
+
+    governorate < delegation < postal_code < address
+
+Gazetteer.lookup(address) finds the most specific place an address names
+without any network call from the last place name in the address (addresses
+end with the town), preferring a delegation of that governorate named
+earlier. A known 4-digit postal code is more specific, but building and
+street numbers look the same ("Immeuble 2000, Sfax"), so a code is only
+used when it belongs to the governorate of that last named place. Names that follow a street
+word ("Rue de Sfax", "نهج قابس") are ignored, as they name a street, not
+the place. Names are compared after name_index.normalize_name, so accents,
+case and Arabic letter variants do not matter.
+"""
+import re
+from typing import Dict, List, NamedTuple, Optional
+
+from .name_index import normalize_name
+
+PRECISIONS = ("governorate", "delegation", "postal_code", "address")
+MAX_NAME_TOKENS = 3
+
+# Governorate: (centroid lat, lon, main postal code, aliases)
+GOVERNORATES = {
+    "Tunis": (36.8065, 10.1815, "1000", ["تونس"]),
+    "Ariana": (36.8625, 10.1956, "2080", ["أريانة", "ariana ville"]),
+    "Ben Arous": (36.7531, 10.2189, "2013", ["بن عروس"]),
+    "Manouba": (36.8101, 10.0956, "2010", ["منوبة", "la manouba"]),
+    "Nabeul": (36.4561, 10.7376, "8000", ["نابل"]),
+    "Zaghouan": (36.4029, 10.1429, "1100", ["زغوان"]),
+    "Bizerte": (37.2744, 9.8739, "7000", ["بنزرت", "binzart"]),
+    "Béja": (36.7256, 9.1817, "9000", ["باجة"]),
+    "Jendouba": (36.5011, 8.7802, "8100", ["جندوبة"]),
+    "Le Kef": (36.1741, 8.7049, "7100", ["الكاف", "kef", "el kef"]),
+    "Siliana": (36.0849, 9.3708, "6100", ["سليانة"]),
+    "Sousse": (35.8256, 10.6360, "4000", ["سوسة"]),
+    "Monastir": (35.7643, 10.8113, "5000", ["المنستير"]),
+    "Mahdia": (35.5047, 11.0622, "5100", ["المهدية"]),
+    "Sfax": (34.7406, 10.7603, "3000", ["صفاقس"]),
+    "Kairouan": (35.6781, 10.0963, "3100", ["القيروان"]),
+    "Kasserine": (35.1676, 8.8365, "1200", ["القصرين"]),
+    "Sidi Bouzid": (35.0382, 9.4849, "9100", ["سيدي بوزيد"]),
+    "Gabès": (33.8815, 10.0982, "6000", ["قابس"]),
+    "Médenine": (33.3549, 10.5055, "4100", ["مدنين"]),
+    "Tataouine": (32.9297, 10.4518, "3200", ["تطاوين"]),
+    "Gafsa": (34.4250, 8.7842, "2100", ["قفصة"]),
+    "Tozeur": (33.9197, 8.1335, "2200", ["توزر"]),
+    "Kébili": (33.7044, 8.9690, "4200", ["قبلي"]),
+}
+
+# Delegation: (governorate, centroid lat, lon, postal code, aliases)
+DELEGATIONS = {
+    "Le Bardo": ("Tunis", 36.8092, 10.1406, "2000", ["bardo", "باردو"]),
+    "Carthage": ("Tunis", 36.8528, 10.3233, "2016", ["قرطاج"]),
+    "La Goulette": ("Tunis", 36.8181, 10.3050, "2060", ["حلق الوادي"]),
+    "La Marsa": ("Tunis", 36.8782, 10.3247, "2070", ["marsa", "المرسى"]),
+    "La Soukra": ("Ariana", 36.8747, 10.2500, "2036", ["soukra", "سكرة"]),
+    "Ettadhamen": ("Ariana", 36.8394, 10.1036, "2041", ["التضامن"]),
+    "Raoued": ("Ariana", 36.9500, 10.1833, "2056", ["رواد"]),
+    "Hammam Lif": ("Ben Arous", 36.7297, 10.3411, "2050", ["حمام الأنف"]),
+    "Radès": ("Ben Arous", 36.7686, 10.2753, "2040", ["رادس"]),
+    "Ezzahra": ("Ben Arous", 36.7439, 10.3083, "2034", ["الزهراء"]),
+    "Mégrine": ("Ben Arous", 36.7686, 10.2336, "2033", ["مقرين"]),
+    "Oued Ellil": ("Manouba", 36.8333, 10.0417, "2021", ["وادي الليل"]),
+    "Tebourba": ("Manouba", 36.8292, 9.8417, "1130", ["طبربة"]),
+    "Hammamet": ("Nabeul", 36.4000, 10.6167, "8050", ["الحمامات"]),
+    "Kélibia": ("Nabeul", 36.8475, 11.0939, "8090", ["قليبية"]),
+    "Korba": ("Nabeul", 36.5786, 10.8586, "8070", ["قربة"]),
+    "Grombalia": ("Nabeul", 36.6000, 10.5000, "8030", ["قرمبالية"]),
+    "Menzel Temime": ("Nabeul", 36.7803, 10.9847, "8080", ["منزل تميم"]),
+    "Menzel Bourguiba": ("Bizerte", 37.1536, 9.7858, "7050", ["منزل بورقيبة"]),
+    "Mateur": ("Bizerte", 37.0400, 9.6650, "7030", ["ماطر"]),
+    "Medjez el Bab": ("Béja", 36.6500, 9.6167, "9070", ["مجاز الباب"]),
+    "Testour": ("Béja", 36.5500, 9.4500, "9060", ["تستور"]),
+    "Tabarka": ("Jendouba", 36.9544, 8.7581, "8110", ["طبرقة"]),
+    "Aïn Draham": ("Jendouba", 36.7833, 8.7000, "8130", ["عين دراهم"]),
+    "Bou Salem": ("Jendouba", 36.6111, 8.9706, "8170", ["بوسالم"]),
+    "Makthar": ("Siliana", 35.8500, 9.2000, "6140", ["مكثر"]),
+    "Hammam Sousse": ("Sousse", 35.8608, 10.5931, "4011", ["حمام سوسة"]),
+    "Msaken": ("Sousse", 35.7297, 10.5808, "4070", ["مساكن"]),
+    "Enfidha": ("Sousse", 36.1350, 10.3806, "4030", ["النفيضة"]),
+    "Moknine": ("Monastir", 35.6333, 10.9000, "5050", ["المكنين"]),
+    "Ksar Hellal": ("Monastir", 35.6475, 10.8911, "5070", ["قصر هلال"]),
+    "El Jem": ("Mahdia", 35.3000, 10.7167, "5160", ["الجم"]),
+    "Sakiet Ezzit": ("Sfax", 34.8000, 10.7667, "3021", ["ساقية الزيت"]),
+    "Mahrès": ("Sfax", 34.5333, 10.5000, "3060", ["المحرس"]),
+    "Sbeitla": ("Kasserine", 35.2333, 9.1333, "1250", ["سبيطلة"]),
+    "El Hamma": ("Gabès", 33.8833, 9.7833, "6020", ["الحامة"]),
+    "Mareth": ("Gabès", 33.6333, 10.3000, "6080", ["مارث"]),
+    "Djerba Houmt Souk": ("Médenine", 33.8758, 10.8575, "4180", ["djerba", "houmt souk", "جربة"]),
+    "Midoun": ("Médenine", 33.8078, 10.9925, "4116", ["ميدون"]),
+    "Zarzis": ("Médenine", 33.5036, 11.1122, "4170", ["جرجيس"]),
+    "Ben Gardane": ("Médenine", 33.1378, 11.2197, "4160", ["بن قردان"]),
+    "Metlaoui": ("Gafsa", 34.3206, 8.4014, "2130", ["المتلوي"]),
+    "Redeyef": ("Gafsa", 34.3833, 8.1500, "2120", ["الرديف"]),
+    "Nefta": ("Tozeur", 33.8731, 7.8778, "2240", ["نفطة"]),
+    "Douz": ("Kébili", 33.4667, 9.0167, "4260", ["دوز"]),
+}
+
+# Street words: a place name right after one of these (and an optional
+# article) names the street, not where the address is
+STREET_WORDS = {"rue", "avenue", "av", "ave", "boulevard", "bd", "blvd", "route", "rte", "place",
+                "impasse", "nahj", "charaa", "نهج", "شارع", "طريق"}
+ARTICLES = {"de", "du", "des", "la", "le", "d", "el", "l"}
+
+_POSTAL_CODE = re.compile(r"(?<!\d)(\d{4})(?!\d)")
+
+
+class Place(NamedTuple):
+    name: str
+    governorate: str
+    latitude: float
+    longitude: float
+    precision: str
+    postal_code: str
+
+
+class Gazetteer:
+    def __init__(self):
+        """Index the governorate and delegation tables by normalized name and postal code."""
+        self.by_name: Dict[str, Place] = {}
+        self.by_postal_code: Dict[str, Place] = {}
+        for name, (lat, lon, code, aliases) in GOVERNORATES.items():
+            place = Place(name, name, lat, lon, "governorate", code)
+            self._add(place, [name] + aliases)
+        for name, (governorate, lat, lon, code, aliases) in DELEGATIONS.items():
+            place = Place(name, governorate, lat, lon, "delegation", code)
+            self._add(place, [name] + aliases)
+
+    def _add(self, place: Place, names: List[str]):
+        for name in names:
+            self.by_name[normalize_name(name)] = place
+        # Postal codes resolve to their place with postal code precision
+        self.by_postal_code[place.postal_code] = place._replace(precision="postal_code")
+
+    def _named_places(self, tokens: List[str]) -> List[Place]:
+        """Places named in tokens, in order, longest name first at each position."""
+        places = []
+        i = 0
+        while i < len(tokens):
+            for size in range(min(MAX_NAME_TOKENS, len(tokens) - i), 0, -1):
+                place = self.by_name.get(" ".join(tokens[i:i + size]))
+                if place is None:
+                    continue
+                before = tokens[max(0, i - 2):i]
+                if before and before[-1] in ARTICLES:
+                    before = before[:-1]
+                if not (before and before[-1] in STREET_WORDS):
+                    places.append(place)
+                i += size - 1
+                break
+            i += 1
+        return places
+
+    def lookup(self, address: str) -> Optional[Place]:
+        """Most specific place named by address, or None."""
+        if not address:
+            return None
+        places = self._named_places(normalize_name(str(address)).split())
+        if not places:
+            return None
+        last = places[-1]
+        for code in _POSTAL_CODE.findall(str(address)):
+            place = self.by_postal_code.get(code)
+            if place and place.governorate == last.governorate:
+                return place
+        if last.precision == "governorate":
+            for place in reversed(places[:-1]):
+                if place.precision == "delegation" and place.governorate == last.governorate:
+                    return place
+        return last
+
+
+def precision_rank(precision: str) -> int:
+    """Position of precision in PRECISIONS (higher is more precise)."""
+    return PRECISIONS.index(precision)
+
+
+# Create a global instance
+gazetteer = Gazetteer()
@@ -0,0 +1,144 @@
+"""
+Persistent geocoding cache shared by all workflows and processes.
+
+Results are stored in one SQLite database (WAL mode, so several processes
+can read while one writes), keyed by a normalized form of the address:
+
+    key, address, provider, latitude, longitude, found, created_at
+
+Addresses no provider could resolve are stored too (found = 0), so they are
+not sent to the providers again until NEGATIVE_TTL has passed. Positive
+results expire after POSITIVE_TTL. Hits, negative hits, misses and expired
+entries are counted per process and reported by stats().
+"""
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from typing import Dict, Optional, Tuple
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+GEOCODE_CACHE_PATH = os.environ.get("EZER_GEOCODE_CACHE", os.path.join("cache", "geocode.sqlite3"))
+POSITIVE_TTL = 90 * 24 * 3600  # seconds
+NEGATIVE_TTL = 7 * 24 * 3600
+
+MISS = object()
+
+_NON_WORD = re.compile(r"[\W_]+")
+_COUNTRY = re.compile(r"\btunisie\b")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS geocodes (
+    key TEXT PRIMARY KEY,
+    address TEXT NOT NULL,
+    provider TEXT,
+    latitude REAL,
+    longitude REAL,
+    found INTEGER NOT NULL,
+    created_at REAL NOT NULL
+)
+"""
+
+
+def cache_key(address: str) -> str:
+    """Case-, punctuation- and country-name-insensitive key for an address."""
+    key = unicodedata.normalize("NFKC", str(address or "")).casefold()
+    key = _NON_WORD.sub(" ", key)
+    key = _COUNTRY.sub("tunisia", key)
+    return " ".join(key.split())
+
+
+class GeocodeCache:
+    def __init__(self, path: str = GEOCODE_CACHE_PATH, positive_ttl: int = POSITIVE_TTL,
+                 negative_ttl: int = NEGATIVE_TTL):
+        """SQLite-backed geocode cache; one connection per thread."""
+        self.path = path
+        self.positive_ttl = positive_ttl
+        self.negative_ttl = negative_ttl
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        self._stats = {"hits": 0, "negative_hits": 0, "misses": 0, "expired": 0, "writes": 0}
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        conn = getattr(self._local, "conn", None)
+        if conn is None and self.path:
+            try:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                conn = sqlite3.connect(self.path, timeout=30)
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+                conn.execute(_SCHEMA)
+                conn.commit()
+                self._local.conn = conn
+            except sqlite3.Error as e:
+                logger.warning(f"Geocode cache unavailable at {self.path}: {e}")
+                return None
+        return conn
+
+    def _count(self, name):
+        with self._stats_lock:
+            self._stats[name] += 1
+
+    def get(self, address: str):
+        """
+        Cached result for address: {"coords": (lat, lon) or None, "provider": str},
+        or MISS when nothing fresh is stored.
+        """
+        conn = self._connect()
+        if conn is None:
+            return MISS
+        try:
+            row = conn.execute(
+                "SELECT provider, latitude, longitude, found, created_at FROM geocodes WHERE key = ?",
+                (cache_key(address),)
+            ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"Geocode cache read failed: {e}")
+            return MISS
+        if row is None:
+            self._count("misses")
+            return MISS
+        provider, lat, lon, found, created_at = row
+        ttl = self.positive_ttl if found else self.negative_ttl
+        if time.time() - created_at > ttl:
+            self._count("expired")
+            return MISS
+        self._count("hits" if found else "negative_hits")
+        return {"coords": (lat, lon) if found else None, "provider": provider}
+
+    def put(self, address: str, coords: Optional[Tuple[float, float]], provider: Optional[str] = None):
+        """Store a result; coords=None records that no provider found the address."""
+        conn = self._connect()
+        if conn is None:
+            return
+        lat, lon = coords if coords else (None, None)
+        try:
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO geocodes "
+                    "(key, address, provider, latitude, longitude, found, created_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (cache_key(address), str(address), provider, lat, lon, int(coords is not None), time.time())
+                )
+            self._count("writes")
+        except sqlite3.Error as e:
+            logger.warning(f"Geocode cache write failed: {e}")
+
+    def stats(self) -> Dict:
+        """Lookup counters of this process and the hit rate (negative hits included)."""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        lookups = stats["hits"] + stats["negative_hits"] + stats["misses"] + stats["expired"]
+        stats["hit_rate"] = round((stats["hits"] + stats["negative_hits"]) / lookups, 3) if lookups else 0.0
+        stats["path"] = self.path
+        return stats
+
+
+# Create a global instance
+geocode_cache = GeocodeCache()
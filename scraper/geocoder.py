@@ -1,46 +1,164 @@
 from geopy.geocoders import Nominatim, GoogleV3, ArcGIS, Photon
-from geopy.extra.rate_limiter import RateLimiter
 from geopy.exc import GeocoderTimedOut, GeocoderUnavailable
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+from collections import Counter
+import os
+import threading
 import time
 import logging
-from typing import Dict, List, Optional, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
 import re
+from .geocode_cache import MISS, cache_key, geocode_cache
+from .gazetteer import PRECISIONS, gazetteer, precision_rank
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+GEOCODE_WORKERS = 8  # addresses geocoded concurrently
+HEDGE_AFTER = None   # seconds before a slow provider is hedged with the next one (None = off)
+# Coarsest precision accepted from the offline gazetteer before asking remote
+# providers: governorate, delegation, postal_code or address (always remote)
+GEOCODE_PRECISION = os.environ.get("EZER_GEOCODE_PRECISION", "address")
+HEDGE_POOL_WORKERS = GEOCODE_WORKERS * 2  # hedged provider calls, shared by every geocoder
+
+# Address preprocessing rules, compiled once
+_WHITESPACE = re.compile(r'\s+')
+_COUNTRY = re.compile(r'tunisi[ae]', re.IGNORECASE)
+_ABBREVIATIONS = [
+    (re.compile(rf'\b{re.escape(old)}\b', re.IGNORECASE), new)
+    for old, new in {
+        'ave ': 'avenue ',
+        'ave. ': 'avenue ',
+        'bd ': 'boulevard ',
+        'bd. ': 'boulevard ',
+        'st ': 'street ',
+        'st. ': 'street ',
+        'apt ': 'apartment ',
+        'apt. ': 'apartment ',
+        'n° ': 'number ',
+        'no. ': 'number ',
+    }.items()
+]
+
+# Rows and unique address keys seen by geocode_batch, for the dedup ratio
+_dedup_lock = threading.Lock()
+_dedup_totals = {"batches": 0, "rows": 0, "unique": 0}
+
+
+# Created on first use by a hedging geocoder; one pool for the whole process so
+# that a geocoder per enrichment job does not leave its own threads behind
+_hedge_pool = None
+_hedge_pool_lock = threading.Lock()
+
+
+def _get_hedge_pool() -> ThreadPoolExecutor:
+    global _hedge_pool
+    with _hedge_pool_lock:
+        if _hedge_pool is None:
+            _hedge_pool = ThreadPoolExecutor(max_workers=HEDGE_POOL_WORKERS, thread_name_prefix="geocode-hedge")
+        return _hedge_pool
+
+
+def dedup_stats() -> Dict:
+    """Rows and unique addresses geocoded in batches so far, and their ratio."""
+    with _dedup_lock:
+        stats = dict(_dedup_totals)
+    stats["dedup_ratio"] = round(stats["rows"] / stats["unique"], 3) if stats["unique"] else 0.0
+    return stats
+
+
+def apply_result(location: Dict, result: Optional[Dict]):
+    """Write a geocode() result into a location dictionary."""
+    if result:
+        location['latitude'], location['longitude'] = result["coords"]
+        location['geocode_precision'] = result["precision"]
+
+
+class RateBudget:
+    def __init__(self, min_delay: float):
+        """Minimum delay between two requests to one provider, shared by all threads."""
+        self.min_delay = min_delay
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+
+    def wait_time(self) -> float:
+        """Seconds until the next request could be sent."""
+        with self._lock:
+            return max(0.0, self._next_slot - time.monotonic())
+
+    def acquire(self):
+        """Reserve the next free slot and sleep until it comes."""
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.min_delay
+        if slot > now:
+            time.sleep(slot - now)
+
+
+# One budget per provider for the whole process, so concurrent workflows
+# together stay within each provider's limits
+RATE_BUDGETS = {
+    "Google": RateBudget(0.5),
+    "Nominatim": RateBudget(1.5),
+    "Photon": RateBudget(1.0),
+    "ArcGIS": RateBudget(1.0),
+}
+
+
+class Provider:
+    def __init__(self, name: str, geocode, budget: RateBudget):
+        """A geocoding function called within its rate budget."""
+        self.name = name
+        self.geocode = geocode
+        self.budget = budget
+
+    def __call__(self, address: str):
+        self.budget.acquire()
+        return self.geocode(address)
+
+
 class LocationGeocoder:
-    def __init__(self, user_agent: str = "ezerScraper", google_api_key: str = None):
+    def __init__(self, user_agent: str = "ezerScraper", google_api_key: str = None, cache=None,
+                 providers: Optional[List[Provider]] = None, max_workers: int = GEOCODE_WORKERS,
+                 hedge_after: Optional[float] = HEDGE_AFTER, precision: str = GEOCODE_PRECISION):
         """
         Initialize the geocoder with multiple providers for better reliability.
         
         Args:
             user_agent (str): Custom user agent string for the geocoding services
             google_api_key (str, optional): Google Maps API key for better results
+            cache (GeocodeCache, optional): Persistent cache, shared by default
+            providers (List[Provider], optional): Providers in order of preference,
+                replacing Google/Nominatim/Photon/ArcGIS
+            max_workers (int): Addresses geocoded concurrently
+            hedge_after (float, optional): Seconds after which a pending provider call
+                is raced against the next provider
+            precision (str): Coarsest precision resolved offline by the gazetteer
         """
-        # Initialize geocoders with rate limiting
-        self.nominatim = RateLimiter(
-            Nominatim(user_agent=user_agent).geocode,
-            min_delay_seconds=1.5
-        )
-        self.arcgis = RateLimiter(
-            ArcGIS().geocode,
-            min_delay_seconds=1.0
-        )
-        self.photon = RateLimiter(
-            Photon().geocode,
-            min_delay_seconds=1.0
-        )
-        if google_api_key:
-            self.google = RateLimiter(
-                GoogleV3(api_key=google_api_key).geocode,
-                min_delay_seconds=0.5
-            )
-        else:
-            self.google = None
-            
+        if precision not in PRECISIONS:
+            raise ValueError(f"Unknown geocode precision {precision!r}, expected one of {PRECISIONS}")
+        if providers is None:
+            providers = []
+            if google_api_key:
+                providers.append(Provider("Google", GoogleV3(api_key=google_api_key).geocode, RATE_BUDGETS["Google"]))
+            providers += [
+                Provider("Nominatim", Nominatim(user_agent=user_agent).geocode, RATE_BUDGETS["Nominatim"]),
+                Provider("Photon", Photon().geocode, RATE_BUDGETS["Photon"]),
+                Provider("ArcGIS", ArcGIS().geocode, RATE_BUDGETS["ArcGIS"]),
+            ]
+        self.providers = providers
+        self.max_workers = max(1, max_workers)
+        self.hedge_after = hedge_after
+        # Hedged calls run in the shared pool, apart from the address workers
+        self._hedge_pool = _get_hedge_pool() if hedge_after else None
+
+        self.precision = precision
+        self.gazetteer = gazetteer
+
         self.cache = {}  # Simple in-memory cache
+        self.persistent_cache = cache if cache is not None else geocode_cache
 
     def preprocess_address(self, address: str) -> str:
         """
@@ -53,31 +171,25 @@ class LocationGeocoder:
         address = str(address).strip()
         
         # Remove extra whitespace
-        address = re.sub(r'\s+', ' ', address)
+        address = _WHITESPACE.sub(' ', address)
         
         # Add Tunisia if not present (since we're working with Tunisian addresses)
-        if 'tunisia' not in address.lower() and 'tunisie' not in address.lower():
+        if not _COUNTRY.search(address):
             address += ', Tunisia'
             
         # Replace common abbreviations
-        replacements = {
-            'ave ': 'avenue ',
-            'ave. ': 'avenue ',
-            'bd ': 'boulevard ',
-            'bd. ': 'boulevard ',
-            'st ': 'street ',
-            'st. ': 'street ',
-            'apt ': 'apartment ',
-            'apt. ': 'apartment ',
-            'n° ': 'number ',
-            'no. ': 'number ',
-        }
-        
-        for old, new in replacements.items():
-            address = re.sub(rf'\b{old}\b', new, address, flags=re.IGNORECASE)
+        for pattern, new in _ABBREVIATIONS:
+            address = pattern.sub(new, address)
             
         return address
 
+    def address_key(self, address: str) -> str:
+        """
+        Grouping key of an address: the preprocessed address without case,
+        punctuation or the Tunisie/Tunisia difference.
+        """
+        return cache_key(self.preprocess_address(address))
+
     def validate_coordinates(self, lat: float, lon: float) -> bool:
         """
         Validate if coordinates are within valid ranges.
@@ -87,20 +199,89 @@ class LocationGeocoder:
     def geocode_with_provider(self, address: str, provider, provider_name: str) -> Optional[Tuple[float, float]]:
         """
         Try geocoding with a specific provider.
+        Provider errors are raised to the caller.
         """
-        try:
-            location = provider(address)
-            if location:
-                lat, lon = location.latitude, location.longitude
-                if self.validate_coordinates(lat, lon):
-                    logger.info(f"Successfully geocoded with {provider_name}: {address}")
-                    return (lat, lon)
-                else:
-                    logger.warning(f"{provider_name} returned invalid coordinates: {lat}, {lon}")
-        except Exception as e:
-            logger.warning(f"{provider_name} geocoding failed for {address}: {str(e)}")
+        location = provider(address)
+        if location:
+            lat, lon = location.latitude, location.longitude
+            if self.validate_coordinates(lat, lon):
+                logger.info(f"Successfully geocoded with {provider_name}: {address}")
+                return (lat, lon)
+            else:
+                logger.warning(f"{provider_name} returned invalid coordinates: {lat}, {lon}")
         return None
 
+    def try_provider(self, address: str, provider: Provider, max_retries: int) -> Tuple[Optional[Tuple[float, float]], bool]:
+        """
+        Geocode with one provider, retrying timeouts and unavailability.
+
+        Returns:
+            Tuple: (coordinates or None, whether the provider errored)
+        """
+        name = provider.name
+        for attempt in range(max_retries):
+            try:
+                return self.geocode_with_provider(address, provider, name), False
+            except (GeocoderTimedOut, GeocoderUnavailable) as e:
+                if attempt < max_retries - 1:
+                    wait_time = (attempt + 1) * 2
+                    logger.warning(f"{name} attempt {attempt + 1} failed: {e}. Retrying in {wait_time}s...")
+                    time.sleep(wait_time)
+                else:
+                    logger.error(f"Failed with {name} after {max_retries} attempts: {address}")
+            except Exception as e:
+                logger.warning(f"{name} geocoding failed for {address}: {str(e)}")
+                break
+        return None, True
+
+    def next_provider(self, remaining: List[Provider]) -> Provider:
+        """Preferred provider with a free slot now, else the one free soonest."""
+        waits = {id(provider): provider.budget.wait_time() for provider in remaining}
+        return min(remaining, key=lambda provider: (waits[id(provider)] > 0, waits[id(provider)]))
+
+    def resolve(self, address: str, max_retries: int) -> Tuple[Optional[Tuple[float, float]], Optional[str], bool]:
+        """
+        Try the providers until one finds the address.
+
+        Returns:
+            Tuple: (coordinates or None, provider name, whether any provider errored)
+        """
+        remaining = list(self.providers)
+        errored = False
+        if not self._hedge_pool:
+            while remaining:
+                provider = self.next_provider(remaining)
+                remaining.remove(provider)
+                coords, failed = self.try_provider(address, provider, max_retries)
+                if coords:
+                    return coords, provider.name, errored
+                errored = errored or failed
+            return None, None, errored
+
+        pending = {}
+        while remaining or pending:
+            if remaining and not pending:
+                provider = self.next_provider(remaining)
+                remaining.remove(provider)
+                pending[self._hedge_pool.submit(self.try_provider, address, provider, max_retries)] = provider
+            done, _ = wait(pending, timeout=self.hedge_after if remaining else None, return_when=FIRST_COMPLETED)
+            if not done:
+                # Slow provider: race it against the next one, but only with idle capacity
+                provider = self.next_provider(remaining)
+                if provider.budget.wait_time() > 0:
+                    continue
+                remaining.remove(provider)
+                logger.info(f"Hedging {address} with {provider.name}")
+                pending[self._hedge_pool.submit(self.try_provider, address, provider, max_retries)] = provider
+                continue
+            for future in done:
+                provider = pending.pop(future)
+                coords, failed = future.result()
+                if coords:
+                    return coords, provider.name, errored
+                errored = errored or failed
+        return None, None, errored
+
     def geocode_address(self, address: str, max_retries: int = 3) -> Optional[Tuple[float, float]]:
         """
         Try geocoding with multiple providers in sequence.
@@ -111,82 +292,147 @@ class LocationGeocoder:
         # Check cache first
         if address in self.cache:
             return self.cache[address]
+        cached = self.persistent_cache.get(address)
+        if cached is not MISS:
+            self.cache[address] = cached["coords"]
+            return cached["coords"]
 
         # Preprocess the address
         clean_address = self.preprocess_address(address)
         if not clean_address:
             return None
 
-        # Try each provider in sequence
-        providers = [
-            (self.google, "Google") if self.google else None,
-            (self.nominatim, "Nominatim"),
-            (self.photon, "Photon"),
-            (self.arcgis, "ArcGIS")
-        ]
-        
-        for provider_tuple in providers:
-            if not provider_tuple:
-                continue
-                
-            provider, name = provider_tuple
-            for attempt in range(max_retries):
-                try:
-                    coords = self.geocode_with_provider(clean_address, provider, name)
-                    if coords:
-                        self.cache[address] = coords
-                        return coords
-                    break  # If no location found, try next provider
-                except (GeocoderTimedOut, GeocoderUnavailable) as e:
-                    if attempt < max_retries - 1:
-                        wait_time = (attempt + 1) * 2
-                        logger.warning(f"{name} attempt {attempt + 1} failed: {e}. Retrying in {wait_time}s...")
-                        time.sleep(wait_time)
-                    else:
-                        logger.error(f"Failed with {name} after {max_retries} attempts: {address}")
+        coords, name, errored = self.resolve(clean_address, max_retries)
+        if coords:
+            self.cache[address] = coords
+            self.persistent_cache.put(address, coords, name)
+            return coords
 
         logger.warning(f"Could not geocode: {address}")
+        # Only a clean "not found" from every provider is cached as negative
+        if not errored:
+            self.persistent_cache.put(address, None)
+        return None
+
+    def geocode(self, address: str, max_retries: int = 3) -> Optional[Dict]:
+        """
+        Geocode offline when the gazetteer reaches the requested precision,
+        otherwise with the remote providers, falling back to the gazetteer.
+
+        Returns:
+            Dict: {"coords": (lat, lon), "precision": str, "source": str}, or None
+        """
+        place = self.gazetteer.lookup(address)
+        if place and precision_rank(place.precision) >= precision_rank(self.precision):
+            return {"coords": (place.latitude, place.longitude), "precision": place.precision, "source": "gazetteer"}
+
+        coords = self.geocode_address(address, max_retries)
+        if coords:
+            return {"coords": coords, "precision": "address", "source": "remote"}
+        if place:
+            logger.info(f"Using {place.precision} centroid of {place.name} for: {address}")
+            return {"coords": (place.latitude, place.longitude), "precision": place.precision, "source": "gazetteer"}
         return None
 
+    def geocode_batch(self, addresses: List[str],
+                      on_result: Optional[Callable[[int, Optional[Dict]], None]] = None
+                      ) -> Tuple[List[Optional[Dict]], Dict]:
+        """
+        Geocode a batch of addresses, each distinct address key once.
+
+        Args:
+            addresses (List[str]): Addresses, possibly repeated or differing
+                only by case, punctuation or country spelling
+            on_result (Callable, optional): Called with (index, result) for every
+                address as soon as its key is geocoded, from the calling thread
+                (never concurrently)
+
+        Returns:
+            Tuple: (one geocode() result or None per address, batch stats with
+                rows, unique and dedup_ratio)
+        """
+        keys = [self.address_key(address) if address else "" for address in addresses]
+        # First address seen for each key is the one sent to the geocoders
+        representatives = {}
+        rows_by_key = {}
+        for idx, (address, key) in enumerate(zip(addresses, keys)):
+            if key and key not in representatives:
+                representatives[key] = address
+            if key:
+                rows_by_key.setdefault(key, []).append(idx)
+        total = len(representatives)
+
+        def geocode(idx_key):
+            idx, key = idx_key
+            address = representatives[key]
+            logger.info(f"Geocoding address {idx}/{total}: {address}")
+            return key, self.geocode(address)
+
+        by_key = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            for future in as_completed([pool.submit(geocode, item) for item in enumerate(representatives, 1)]):
+                key, result = future.result()
+                by_key[key] = result
+                if on_result:
+                    for idx in rows_by_key[key]:
+                        on_result(idx, result)
+
+        rows = sum(1 for key in keys if key)
+        stats = {"rows": rows, "unique": total,
+                 "dedup_ratio": round(rows / total, 3) if total else 0.0}
+        with _dedup_lock:
+            _dedup_totals["batches"] += 1
+            _dedup_totals["rows"] += rows
+            _dedup_totals["unique"] += total
+        sources = Counter(result["source"] for result in by_key.values() if result)
+        stats.update(offline=sources["gazetteer"], remote=sources["remote"])
+        return [by_key.get(key) if key else None for key in keys], stats
+
     def geocode_locations(self, locations: List[Dict]) -> List[Dict]:
         """
-        Add geocoded coordinates to a list of location dictionaries.
+        Add geocoded coordinates and their precision to a list of location dictionaries.
+        Rows are geocoded through geocode_batch; order is preserved.
         """
+        located = [location for location in locations if location.get('address')]
+
+        start = time.perf_counter()
+        results, stats = self.geocode_batch([location['address'] for location in located])
+
         geocoded_locations = []
-        total = len(locations)
-        
-        for idx, location in enumerate(locations, 1):
-            address = location.get('address')
-            if not address:
-                continue
-                
-            logger.info(f"Geocoding address {idx}/{total}: {address}")
-            coords = self.geocode_address(address)
-            
-            if coords:
-                location['latitude'] = coords[0]
-                location['longitude'] = coords[1]
-                logger.info(f"Successfully geocoded: {address} -> {coords}")
+        for location, result in zip(located, results):
+            address = location['address']
+            apply_result(location, result)
+            if result:
+                logger.info(f"Successfully geocoded: {address} -> {result['coords']} ({result['precision']})")
             else:
                 logger.warning(f"Could not geocode: {address}")
-            
             geocoded_locations.append(location)
-            
-            # Add a small delay between requests
-            time.sleep(0.5)
-        
+
+        self.log_batch(stats, time.perf_counter() - start)
         return geocoded_locations
 
-def geocode_locations_data(locations: List[Dict], google_api_key: str = None) -> List[Dict]:
+    def log_batch(self, stats: Dict, elapsed: float):
+        """Log the dedup ratio, offline/remote split and cache hit rate of a batch."""
+        logger.info(f"Geocoded {stats['rows']} rows as {stats['unique']} unique addresses "
+                    f"(dedup ratio {stats['dedup_ratio']:.2f}) in {elapsed:.1f}s "
+                    f"({stats['offline']} offline, {stats['remote']} remote)")
+        cache_stats = self.persistent_cache.stats()
+        logger.info(f"Geocode cache hit rate: {cache_stats['hit_rate']:.1%} ({cache_stats['hits']} hits, "
+                    f"{cache_stats['negative_hits']} negative hits, {cache_stats['misses']} misses)")
+
+def geocode_locations_data(locations: List[Dict], google_api_key: str = None,
+                           precision: str = None) -> List[Dict]:
     """
     Convenience function to geocode a list of locations.
     
     Args:
         locations (List[Dict]): List of location dictionaries
         google_api_key (str, optional): Google Maps API key for better results
+        precision (str, optional): Coarsest precision resolved offline
+            (defaults to GEOCODE_PRECISION)
         
     Returns:
-        List[Dict]: List of location dictionaries with added coordinates
+        List[Dict]: List of location dictionaries with added coordinates and geocode_precision
     """
-    geocoder = LocationGeocoder(google_api_key=google_api_key)
+    geocoder = LocationGeocoder(google_api_key=google_api_key, precision=precision or GEOCODE_PRECISION)
     return geocoder.geocode_locations(locations) 
\ No newline at end of file
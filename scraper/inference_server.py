@@ -0,0 +1,283 @@
+"""
+Local inference service shared by every scraping workflow.
+
+A single worker process owns the QA pipeline (and the spaCy NER models when
+asked for them). Workflows submit requests through an ``InferenceClient``;
+the worker coalesces whatever arrives within ``max_latency`` seconds into one
+micro-batch per task and resolves the callers' futures as results come back.
+"""
+import itertools
+import logging
+import multiprocessing as mp
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Optional
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BATCH_SIZE = 16
+DEFAULT_MAX_LATENCY = 0.02  # seconds a request may wait for batch-mates
+DEFAULT_TIMEOUT = 300
+
+
+############################
+# Worker-side task loaders #
+############################
+def _load_qa_handler():
+    from . import qa_model
+    pipe = qa_model.load_model()
+
+    def run(payloads):
+        questions = [p["question"] for p in payloads]
+        contexts = [p["context"] for p in payloads]
+        results = pipe(question=questions, context=contexts, batch_size=len(payloads))
+        # The pipeline unwraps single-item batches
+        if isinstance(results, dict):
+            results = [results]
+        return results
+
+    return run
+
+
+def _load_ner_handler():
+    from .crawler import get_model
+
+    def run(payloads):
+        # Group by language so each spaCy model sees one nlp.pipe() call
+        results = [None] * len(payloads)
+        by_lang = {}
+        for idx, payload in enumerate(payloads):
+            by_lang.setdefault(payload.get("lang", "en"), []).append(idx)
+        for lang, indexes in by_lang.items():
+            nlp = get_model(lang)
+            texts = [payloads[i]["text"] for i in indexes]
+            for i, doc in zip(indexes, nlp.pipe(texts)):
+                results[i] = [(ent.text, ent.label_) for ent in doc.ents]
+        return results
+
+    return run
+
+
+def _load_registry_handler():
+    from .models import registry
+    from . import qa_model, crawler  # noqa: F401 -- importing registers their loaders
+
+    def run(payloads):
+        results = []
+        for payload in payloads:
+            if payload.get("action") == "warmup":
+                results.append(registry.warmup(payload.get("models")))
+            else:
+                results.append(registry.stats())
+        return results
+
+    return run
+
+
+_TASK_LOADERS = {
+    "qa": _load_qa_handler,
+    "ner": _load_ner_handler,
+    "registry": _load_registry_handler,
+}
+
+# Models that live in the worker process rather than in the web server
+WORKER_MODELS = ("qa", "spacy_en", "spacy_fr", "spacy_xx")
+
+
+def _run_batch(handlers, task, batch, response_queue):
+    request_ids = [req_id for req_id, _ in batch]
+    try:
+        if task not in handlers:
+            logger.info(f"Loading '{task}' handler in inference worker")
+            handlers[task] = _TASK_LOADERS[task]()
+        start = time.perf_counter()
+        results = handlers[task]([payload for _, payload in batch])
+        logger.debug(f"Ran {task} batch of {len(batch)} in {time.perf_counter() - start:.3f}s")
+        for req_id, result in zip(request_ids, results):
+            response_queue.put((req_id, True, result))
+    except Exception as e:
+        logger.error(f"Inference batch for '{task}' failed: {e}")
+        for req_id in request_ids:
+            response_queue.put((req_id, False, str(e)))
+
+
+def _serve(request_queue, response_queue, max_batch_size, max_latency, preload):
+    """Worker loop: gather a micro-batch under the latency deadline, then run it."""
+    handlers = {}
+    for task in preload:
+        handlers[task] = _TASK_LOADERS[task]()
+
+    running = True
+    while running:
+        item = request_queue.get()
+        if item is None:
+            break
+        batch = [item]
+        deadline = time.monotonic() + max_latency
+        while len(batch) < max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = request_queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                running = False
+                break
+            batch.append(item)
+
+        by_task = {}
+        for req_id, task, payload in batch:
+            by_task.setdefault(task, []).append((req_id, payload))
+        for task, task_batch in by_task.items():
+            _run_batch(handlers, task, task_batch, response_queue)
+
+    response_queue.put(None)
+
+
+############################
+# Client                   #
+############################
+class InferenceClient:
+    def __init__(self, max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+                 max_latency: float = DEFAULT_MAX_LATENCY, preload=("qa",),
+                 timeout: float = DEFAULT_TIMEOUT):
+        """
+        Client for the shared inference worker process.
+
+        Args:
+            max_batch_size (int): Largest micro-batch the worker will run
+            max_latency (float): Seconds the worker waits to fill a batch
+            preload (tuple): Tasks to load as soon as the worker starts
+            timeout (float): Seconds a blocking call waits for its result
+        """
+        self.max_batch_size = max_batch_size
+        self.max_latency = max_latency
+        self.preload = tuple(preload)
+        self.timeout = timeout
+
+        self._ids = itertools.count()
+        self._futures = {}
+        self._lock = threading.Lock()
+        self._process = None
+        self._requests = None
+        self._responses = None
+        self._reader = None
+
+    def start(self):
+        """Start the worker process and the thread that resolves futures."""
+        with self._lock:
+            if self._process is not None and self._process.is_alive():
+                return self
+            ctx = mp.get_context("spawn")
+            self._requests = ctx.Queue()
+            self._responses = ctx.Queue()
+            self._process = ctx.Process(
+                target=_serve,
+                args=(self._requests, self._responses, self.max_batch_size, self.max_latency, self.preload),
+                name="ezer-inference",
+                daemon=True
+            )
+            self._process.start()
+            self._reader = threading.Thread(target=self._read_responses, name="ezer-inference-reader", daemon=True)
+            self._reader.start()
+            logger.info(f"Started inference worker (pid {self._process.pid}, "
+                        f"batch<={self.max_batch_size}, latency<={self.max_latency * 1000:.0f}ms)")
+        return self
+
+    def stop(self):
+        """Ask the worker to finish its current batch and exit."""
+        with self._lock:
+            process = self._process
+            if process is None:
+                return
+            self._requests.put(None)
+        process.join(timeout=10)
+        if process.is_alive():
+            process.terminate()
+        with self._lock:
+            self._process = None
+
+    def _read_responses(self):
+        while True:
+            try:
+                message = self._responses.get(timeout=1.0)
+            except queue.Empty:
+                if self._process is None or not self._process.is_alive():
+                    self._fail_pending("Inference worker exited")
+                    return
+                continue
+            if message is None:
+                self._fail_pending("Inference worker stopped")
+                return
+            req_id, ok, result = message
+            with self._lock:
+                future = self._futures.pop(req_id, None)
+            if future is None:
+                continue
+            if ok:
+                future.set_result(result)
+            else:
+                future.set_exception(RuntimeError(result))
+
+    def _fail_pending(self, reason):
+        with self._lock:
+            pending, self._futures = self._futures, {}
+        for future in pending.values():
+            future.set_exception(RuntimeError(reason))
+
+    def submit(self, task: str, **payload) -> Future:
+        """Queue one request for the worker and return a future for its result."""
+        if task not in _TASK_LOADERS:
+            raise ValueError(f"Unknown inference task: {task}")
+        if self._process is None or not self._process.is_alive():
+            self.start()
+        future = Future()
+        req_id = next(self._ids)
+        with self._lock:
+            self._futures[req_id] = future
+        self._requests.put((req_id, task, payload))
+        return future
+
+    def answer_question(self, question: str, context: str) -> Future:
+        return self.submit("qa", question=question, context=context)
+
+    def named_entities(self, texts, lang: str = "en"):
+        """Return [(text, label), ...] for each text, batched in the worker."""
+        futures = [self.submit("ner", text=text, lang=lang) for text in texts]
+        return [f.result(timeout=self.timeout) for f in futures]
+
+    def warmup(self, models=None) -> dict:
+        """Load models inside the worker and return their registry stats."""
+        models = list(models) if models else list(WORKER_MODELS)
+        return self.submit("registry", action="warmup", models=models).result(timeout=self.timeout)
+
+    def model_stats(self) -> dict:
+        return self.submit("registry", action="stats").result(timeout=self.timeout)
+
+    def __call__(self, question: str, context: str, **kwargs) -> dict:
+        """Blocking QA call with the same signature as the transformers pipeline."""
+        return self.answer_question(question, context).result(timeout=self.timeout)
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client(**kwargs) -> InferenceClient:
+    """Return the process-wide client, starting the worker on first use."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = InferenceClient(**kwargs).start()
+        return _client
+
+
+def get_running_client() -> Optional[InferenceClient]:
+    """Return the process-wide client if it has been started, without starting it."""
+    return _client
@@ -0,0 +1,106 @@
+"""
+Shared language identification.
+
+Every caller (FieldMapper, crawl_site's spaCy model choice, OCR language
+selection) goes through detect_language(), which:
+- only looks at a bounded, whitespace-collapsed prefix of the text,
+- answers Arabic-script text directly from a script count,
+- uses langid.py's n-gram classifier when installed, else langdetect with a
+  fixed seed so results are deterministic,
+- memoizes results in an LRU cache keyed by a digest of the prefix.
+"""
+import hashlib
+import logging
+import re
+import threading
+from collections import OrderedDict
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+PREFIX_CHARS = 1000
+CACHE_SIZE = 4096
+
+_WHITESPACE_RE = re.compile(r'\s+')
+_ARABIC_RE = re.compile(r'[\u0600-\u06FF\u0750-\u077F\u08A0-\u08FF\uFB50-\uFDFF\uFE70-\uFEFF]')
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0}
+_classifier = None
+
+
+def _get_classifier():
+    """Pick the fastest available backend once."""
+    global _classifier
+    if _classifier is None:
+        try:
+            import langid
+            _classifier = lambda text: langid.classify(text)[0]
+            logger.info("Language identification using langid.py")
+        except ImportError:
+            from langdetect import DetectorFactory, detect
+            DetectorFactory.seed = 0
+            _classifier = detect
+            logger.info("Language identification using langdetect (seeded)")
+    return _classifier
+
+
+def _sample(text):
+    return _WHITESPACE_RE.sub(' ', str(text)[:PREFIX_CHARS * 2]).strip()[:PREFIX_CHARS]
+
+
+def arabic_ratio(text) -> float:
+    """Share of letters in the sample that are Arabic script."""
+    sample = _sample(text)
+    letters = sum(1 for c in sample if c.isalpha())
+    return len(_ARABIC_RE.findall(sample)) / letters if letters else 0.0
+
+
+def detect_language(text, default: str = 'en') -> str:
+    """Return an ISO 639-1 code for text, or default if it can't be detected."""
+    if not text:
+        return default
+    sample = _sample(text)
+    if not sample:
+        return default
+
+    key = hashlib.blake2b(sample.encode('utf-8'), digest_size=16).digest()
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            _stats["hits"] += 1
+            return _cache[key] or default
+        _stats["misses"] += 1
+
+    if arabic_ratio(sample) > 0.5:
+        lang = 'ar'
+    else:
+        try:
+            lang = _get_classifier()(sample)
+        except Exception:
+            lang = None
+
+    with _cache_lock:
+        _cache[key] = lang
+        if len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return lang or default
+
+
+def ocr_languages(text) -> str:
+    """Tesseract language string for a page, based on its DOM text."""
+    lang = detect_language(text, default='')
+    has_arabic = arabic_ratio(text) > 0.05
+    if lang == 'en' and not has_arabic:
+        return 'eng'
+    if lang == 'fr' and not has_arabic:
+        return 'fra+eng'
+    # Arabic, mixed or undetected pages keep the full Tunisian set
+    return 'ara+fra+eng'
+
+
+def cache_info() -> dict:
+    with _cache_lock:
+        return {"hits": _stats["hits"], "misses": _stats["misses"], "size": len(_cache)}
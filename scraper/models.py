@@ -0,0 +1,112 @@
+"""
+Lazy model registry.
+
+Modules register a loader for each heavy model they use; nothing is imported
+or loaded until the model is first requested (or explicitly warmed up).
+Each load records how long it took, including the import of the framework,
+and how much resident memory the process gained while loading it.
+"""
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, Iterable, Optional
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def current_rss_mb() -> Optional[float]:
+    """Resident set size of this process in MB, or None if it can't be read."""
+    try:
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE") / 1024 ** 2
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+        import sys
+        # ru_maxrss is a peak value: KB on Linux, bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 1024 ** 2 if sys.platform == "darwin" else peak / 1024
+    except Exception:
+        return None
+
+
+class ModelRegistry:
+    def __init__(self):
+        self._loaders: Dict[str, Callable] = {}
+        self._models = {}
+        self._stats = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, loader: Callable):
+        """Register a zero-argument loader under name. Nothing is loaded yet."""
+        with self._lock:
+            self._loaders[name] = loader
+            self._locks.setdefault(name, threading.Lock())
+
+    def names(self):
+        return list(self._loaders)
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._models
+
+    def get(self, name: str):
+        """Return the model, loading it on first use."""
+        if name in self._models:
+            return self._models[name]
+        if name not in self._loaders:
+            raise KeyError(f"No model registered under '{name}'")
+
+        # One lock per model so different models can load concurrently
+        with self._locks[name]:
+            if name in self._models:
+                return self._models[name]
+            logger.info(f"Loading model '{name}'...")
+            rss_before = current_rss_mb()
+            start = time.perf_counter()
+            model = self._loaders[name]()
+            elapsed = time.perf_counter() - start
+            rss_after = current_rss_mb()
+            rss_delta = rss_after - rss_before if rss_before is not None and rss_after is not None else None
+            self._stats[name] = {
+                "load_seconds": round(elapsed, 3),
+                "rss_delta_mb": round(rss_delta, 1) if rss_delta is not None else None,
+                "loaded_at": time.time()
+            }
+            self._models[name] = model
+            logger.info(f"Loaded model '{name}' in {elapsed:.2f}s"
+                        + (f" (+{rss_delta:.0f} MB resident)" if rss_delta is not None else ""))
+            return model
+
+    def warmup(self, names: Optional[Iterable[str]] = None) -> Dict[str, dict]:
+        """Load the given models (all registered ones by default) and return their stats."""
+        names = list(names) if names else self.names()
+        errors = {}
+        for name in names:
+            try:
+                self.get(name)
+            except Exception as e:
+                logger.error(f"Warmup failed for model '{name}': {e}")
+                errors[name] = str(e)
+        stats = self.stats()
+        for name, error in errors.items():
+            stats.setdefault(name, {})["error"] = error
+        return {name: stats.get(name, {}) for name in names}
+
+    def stats(self) -> Dict[str, dict]:
+        """Per-model load state, load time and resident memory delta."""
+        stats = {}
+        for name in self._loaders:
+            entry = {"loaded": name in self._models}
+            entry.update(self._stats.get(name, {}))
+            stats[name] = entry
+        return stats
+
+
+# Create a global instance
+registry = ModelRegistry()
@@ -0,0 +1,172 @@
+"""
+Fuzzy name matching with an n-gram index.
+
+Names are normalized before they are compared: Unicode compatibility
+decomposition, accents and Arabic diacritics (tashkeel, hamza marks) removed,
+common Arabic letter variants unified (alef forms, alef maqsura, teh
+marbuta), case folded and punctuation collapsed to single spaces.
+
+NameIndex blocks candidates by character trigrams and token prefixes, so a
+query only considers indexed names sharing a key with it. Keys shared by a
+large part of the index (e.g. "association") are skipped as long as the
+query has rarer ones. Candidates are visited by number of shared keys and
+scored with difflib's SequenceMatcher ratio, skipping those whose quick
+upper bounds cannot beat the best score so far.
+
+Blocking can miss pairs that share no key but still score well (acronyms
+such as "ATB" / "A.T.B", short names with one OCR error). When no blocked
+candidate beats the caller's threshold, every other indexed name whose
+character-count bound (SequenceMatcher.quick_ratio, computed for all names
+at once with NumPy) exceeds it is scored too. best_match(name, threshold)
+therefore reports a ratio above threshold exactly when the pairwise loop
+over all names would. Indexes of at most max_candidates names are always
+scored in full.
+"""
+import re
+import unicodedata
+from collections import Counter
+from difflib import SequenceMatcher
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+NGRAM = 3
+PREFIX = 3
+MAX_CANDIDATES = 64
+COMMON_KEY_SHARE = 0.05  # keys in more than this share of names are "stop" keys
+MIN_COMMON_KEY_NAMES = 100
+
+_ARABIC_VARIANTS = str.maketrans({
+    "ٱ": "ا",  # alef wasla
+    "ى": "ي",  # alef maqsura -> yeh
+    "ة": "ه",  # teh marbuta -> heh
+    "ـ": None,      # tatweel
+})
+_NON_WORD = re.compile(r"[\W_]+")
+
+
+def normalize_name(name: str) -> str:
+    """Accent-folded, Arabic-normalized, case-folded name with single spaces."""
+    decomposed = unicodedata.normalize("NFKD", name or "")
+    # Drops Latin accents, tashkeel and the hamza/madda marks of alef forms
+    stripped = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    stripped = stripped.translate(_ARABIC_VARIANTS).casefold()
+    return _NON_WORD.sub(" ", stripped).strip()
+
+
+def block_keys(normalized: str) -> set:
+    """Character trigrams of the padded name plus a prefix key per token."""
+    keys = set()
+    padded = f" {normalized} "
+    for i in range(len(padded) - NGRAM + 1):
+        keys.add(padded[i:i + NGRAM])
+    for token in normalized.split():
+        keys.add("^" + token[:PREFIX])
+    return keys
+
+
+class NameIndex:
+    def __init__(self, names: Iterable[str], max_candidates: int = MAX_CANDIDATES):
+        """Index names for best_match(); duplicates after normalization are merged."""
+        self.max_candidates = max_candidates
+        self._names: List[str] = []       # original form, first seen
+        self._normalized: List[str] = []
+        self._exact: Dict[str, int] = {}
+        self._postings: Dict[str, List[int]] = {}
+        for name in names:
+            normalized = normalize_name(name)
+            if not normalized or normalized in self._exact:
+                continue
+            idx = len(self._names)
+            self._exact[normalized] = idx
+            self._names.append(name)
+            self._normalized.append(normalized)
+            for key in block_keys(normalized):
+                self._postings.setdefault(key, []).append(idx)
+        self._common = max(MIN_COMMON_KEY_NAMES, int(COMMON_KEY_SHARE * len(self._names)))
+        self._alphabet: Optional[Dict[str, int]] = None
+        self._char_counts = None
+        self._lengths = None
+
+    def __len__(self):
+        return len(self._names)
+
+    def _build_char_counts(self):
+        """Per-name character counts, built on the first fallback scan."""
+        self._alphabet = {}
+        for normalized in self._normalized:
+            for ch in normalized:
+                self._alphabet.setdefault(ch, len(self._alphabet))
+        self._char_counts = np.zeros((len(self._names), len(self._alphabet)), dtype=np.int32)
+        for idx, normalized in enumerate(self._normalized):
+            for ch, count in Counter(normalized).items():
+                self._char_counts[idx, self._alphabet[ch]] = count
+        self._lengths = np.array([len(normalized) for normalized in self._normalized], dtype=np.int32)
+
+    def _quick_bounds(self, normalized: str):
+        """SequenceMatcher.quick_ratio of normalized against every indexed name."""
+        if self._char_counts is None:
+            self._build_char_counts()
+        columns, counts = [], []
+        for ch, count in Counter(normalized).items():
+            if ch in self._alphabet:
+                columns.append(self._alphabet[ch])
+                counts.append(count)
+        common = np.minimum(self._char_counts[:, columns], np.array(counts, dtype=np.int32)).sum(axis=1)
+        return 2.0 * common / (len(normalized) + self._lengths)
+
+    def _candidates(self, normalized: str) -> List[int]:
+        if len(self._names) <= self.max_candidates:
+            return list(range(len(self._names)))
+        keys = [key for key in block_keys(normalized) if key in self._postings]
+        rare = [key for key in keys if len(self._postings[key]) <= self._common]
+        if not rare:
+            # Only common keys: fall back to the least common few
+            rare = sorted(keys, key=lambda key: len(self._postings[key]))[:3]
+        shared = Counter()
+        for key in rare:
+            shared.update(self._postings[key])
+        return [idx for idx, _ in shared.most_common(self.max_candidates)]
+
+    def best_match(self, name: str, threshold: float = 0.0) -> Tuple[float, Optional[str]]:
+        """
+        (best SequenceMatcher ratio, indexed name) for name, or (0.0, None).
+
+        Args:
+            name (str): Name to look up
+            threshold (float): Ratio the caller compares against; when the best
+                ratio of all indexed names is above it, that ratio is returned
+        """
+        normalized = normalize_name(name)
+        if not normalized:
+            return 0.0, None
+        exact = self._exact.get(normalized)
+        if exact is not None:
+            return 1.0, self._names[exact]
+
+        # Same orientation as the pairwise comparison: query first, indexed name second
+        matcher = SequenceMatcher(None)
+        matcher.set_seq1(normalized)
+        best_ratio, best_idx = 0.0, None
+        candidates = self._candidates(normalized)
+        for idx in candidates:
+            matcher.set_seq2(self._normalized[idx])
+            if matcher.real_quick_ratio() <= best_ratio or matcher.quick_ratio() <= best_ratio:
+                continue
+            ratio = matcher.ratio()
+            if ratio > best_ratio:
+                best_ratio, best_idx = ratio, idx
+
+        if best_ratio <= threshold and len(candidates) < len(self._names):
+            # Blocking found nothing good enough: check the names it left out
+            bounds = self._quick_bounds(normalized)
+            bounds[candidates] = 0.0
+            order = np.flatnonzero(bounds > max(threshold, best_ratio))
+            for idx in order[np.argsort(-bounds[order], kind="stable")]:
+                if bounds[idx] <= best_ratio:
+                    break
+                matcher.set_seq2(self._normalized[idx])
+                ratio = matcher.ratio()
+                if ratio > best_ratio:
+                    best_ratio, best_idx = ratio, int(idx)
+        return best_ratio, (self._names[best_idx] if best_idx is not None else None)
@@ -1,20 +1,21 @@
-import pytesseract
 import cv2
-import os
 import logging
+from . import adaptive_ocr, ocr_engine, tiling
+from .ocr_cache import cached_ocr
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def do_ocr_screenshot(screenshot_path):
+def do_ocr_screenshot(screenshot_path, lang='eng'):
     """
     Perform OCR on a screenshot image.
+    lang is a Tesseract language string, see language.ocr_languages().
     Returns the extracted text or empty string if OCR fails.
     """
     try:
         # Check if Tesseract is installed
-        if not os.path.exists(pytesseract.pytesseract.tesseract_cmd):
+        if not ocr_engine.is_available():
             logger.error("Tesseract not found. Please install Tesseract OCR and add it to your PATH")
             return ""
 
@@ -24,21 +25,12 @@ def do_ocr_screenshot(screenshot_path):
             logger.error(f"Could not read image: {screenshot_path}")
             return ""
 
-        # Convert to grayscale
-        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-        
-        # Apply thresholding to preprocess the image
-        gray = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)[1]
-        
-        # Apply dilation to connect text components
-        kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (3,3))
-        gray = cv2.dilate(gray, kernel, iterations=1)
-        
-        # Perform OCR with improved configuration
-        text = pytesseract.image_to_string(
-            gray,
-            config='--psm 6 --oem 3 -c tessedit_char_whitelist=ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789@.-_ '
-        )
+        # Start from plain grayscale; binarization and heavier stages are
+        # only applied when Tesseract's confidence is low. Tall screenshots
+        # are read in parallel bands cut at blank rows.
+        config = '--psm 6 --oem 3 -c tessedit_char_whitelist=ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789@.-_ '
+        text = cached_ocr(img, f"screenshot|{lang}|{config}", lambda image: tiling.ocr_tall_image(
+            image, lambda band: adaptive_ocr.ocr(band, lang=lang, config=config)))
         
         return text.strip()
         
@@ -0,0 +1,165 @@
+"""
+OCR result cache keyed by an exact digest of the image.
+
+Sites repeat the same banners, logos and contact images on every page, and
+a repeated region is rendered to the same pixels. The key is a blake2b
+digest of the pixels, the image shape and the OCR language/config, so only
+an identical image hits. Perceptual (dHash) keys were dropped on purpose:
+images with the same size and layout share a dHash while their text
+differs (paginated listings, cards from one template that differ by a
+digit), and a hit on one of those returns another image's text.
+
+The cache is an in-memory LRU bounded to MAX_ENTRIES. Setting EZER_OCR_CACHE
+to a JSON path persists it: entries are loaded on first use and flushed
+every FLUSH_EVERY new entries and at exit. Hits and misses are counted per
+site; the site is set for a crawl with `with for_site(url):`.
+"""
+import atexit
+import contextvars
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional
+
+import numpy as np
+
+from .utils import get_domain
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+OCR_CACHE_PATH = os.environ.get("EZER_OCR_CACHE", "")
+MAX_ENTRIES = 4096
+FLUSH_EVERY = 64
+
+MISS = object()  # sentinel: a cached None means "no text in this region"
+_current_site = contextvars.ContextVar("ocr_cache_site", default="")
+
+
+def image_key(image, namespace: str = "") -> str:
+    """
+    Exact key of a decoded image (any NumPy array): its pixels, shape and dtype.
+
+    Args:
+        namespace (str): Anything else that changes the OCR result (language, config)
+    """
+    digest = hashlib.blake2b(np.ascontiguousarray(image).tobytes(), digest_size=16)
+    digest.update(f"{image.shape}|{image.dtype}|{namespace}".encode("utf-8"))
+    return digest.hexdigest()
+
+
+@contextmanager
+def for_site(url: str):
+    """Attribute cache hits and misses inside the block to url's site."""
+    token = _current_site.set(get_domain(url) or url)
+    try:
+        yield
+    finally:
+        _current_site.reset(token)
+
+
+class OCRCache:
+    def __init__(self, path: str = OCR_CACHE_PATH, max_entries: int = MAX_ENTRIES):
+        """Bounded LRU of OCR results, optionally persisted as one JSON file."""
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = None
+        self._unsaved = 0
+        self._sites = {}
+
+    def _load(self):
+        if self._entries is None:
+            self._entries = OrderedDict()
+            if self.path and os.path.exists(self.path):
+                try:
+                    with open(self.path, encoding="utf-8") as f:
+                        self._entries.update(json.load(f))
+                    logger.info(f"Loaded {len(self._entries)} cached OCR results from {self.path}")
+                except (OSError, ValueError) as e:
+                    logger.warning(f"Ignoring unreadable OCR cache {self.path}: {e}")
+        return self._entries
+
+    def _count(self, hit: bool):
+        site = _current_site.get() or "unknown"
+        counts = self._sites.setdefault(site, {"hits": 0, "misses": 0})
+        counts["hits" if hit else "misses"] += 1
+
+    def get(self, key: str, default=MISS):
+        """Cached text for key (may be None for regions without text), else default."""
+        with self._lock:
+            entries = self._load()
+            value = entries.get(key, MISS)
+            self._count(value is not MISS)
+            if value is MISS:
+                return default
+            entries.move_to_end(key)
+            return value
+
+    def put(self, key: str, text: Optional[str]):
+        with self._lock:
+            entries = self._load()
+            entries[key] = text
+            entries.move_to_end(key)
+            while len(entries) > self.max_entries:
+                entries.popitem(last=False)
+            self._unsaved += 1
+            if self.path and self._unsaved >= FLUSH_EVERY:
+                self._save_locked()
+
+    def save(self):
+        """Write the cache to its JSON file (no-op without a path)."""
+        with self._lock:
+            if self._entries is not None and self._unsaved:
+                self._save_locked()
+
+    def _save_locked(self):
+        if not self.path:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._entries, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+            self._unsaved = 0
+        except OSError as e:
+            logger.warning(f"Could not persist OCR cache: {e}")
+
+    def stats(self) -> Dict:
+        """Entry count and hit rate per site."""
+        with self._lock:
+            sites = {}
+            for site, counts in self._sites.items():
+                total = counts["hits"] + counts["misses"]
+                sites[site] = dict(counts, hit_rate=round(counts["hits"] / total, 3) if total else 0.0)
+            return {
+                "entries": len(self._entries or {}),
+                "max_entries": self.max_entries,
+                "persisted": bool(self.path),
+                "sites": sites
+            }
+
+
+ocr_cache = OCRCache()
+atexit.register(ocr_cache.save)
+
+
+def cached_ocr(image, namespace: str, compute: Callable):
+    """Return the cached result for image, or compute(image) and cache it."""
+    key, text = lookup(image, namespace)
+    if text is MISS:
+        text = compute(image)
+        ocr_cache.put(key, text)
+    return text
+
+
+def lookup(image, namespace: str):
+    """(key, cached result or MISS) for callers that batch their misses."""
+    key = image_key(image, namespace)
+    return key, ocr_cache.get(key)
@@ -0,0 +1,210 @@
+"""
+Pooled Tesseract engines.
+
+pytesseract forks a `tesseract` process and reloads the traineddata on every
+call. When the tesserocr binding is installed, this module instead keeps one
+initialized TessBaseAPI per worker thread and per (language, psm, oem,
+variables) combination and reuses it. Images can be passed as NumPy arrays
+(grayscale or OpenCV BGR) or PIL images. Without tesserocr, calls fall back
+to pytesseract with the same arguments.
+"""
+import logging
+import shlex
+import shutil
+import threading
+import time
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pytesseract
+from PIL import Image
+
+try:
+    import tesserocr
+except ImportError:
+    tesserocr = None
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+_local = threading.local()
+_stats_lock = threading.Lock()
+_stats = {}
+
+
+def backend() -> str:
+    return "tesserocr" if tesserocr is not None else "pytesseract"
+
+
+def is_available() -> bool:
+    """True if either the binding or the tesseract binary can be used."""
+    if tesserocr is not None:
+        return True
+    return shutil.which(pytesseract.pytesseract.tesseract_cmd) is not None
+
+
+def parse_config(config: str) -> Tuple[int, int, Dict[str, str], str]:
+    """Split a tesseract CLI config string into (psm, oem, variables, lang)."""
+    psm, oem, variables, lang = 3, 3, {}, None
+    tokens = shlex.split(config or "")
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        value = tokens[i + 1] if i + 1 < len(tokens) else None
+        if token == "--psm" and value is not None:
+            psm = int(value)
+            i += 1
+        elif token == "--oem" and value is not None:
+            oem = int(value)
+            i += 1
+        elif token == "-l" and value is not None:
+            lang = value
+            i += 1
+        elif token == "-c" and value is not None and "=" in value:
+            key, val = value.split("=", 1)
+            variables[key] = val
+            i += 1
+        i += 1
+    return psm, oem, variables, lang
+
+
+def to_pil(image) -> Image.Image:
+    """Accept PIL images or NumPy arrays (grayscale, BGR or BGRA from OpenCV)."""
+    if isinstance(image, Image.Image):
+        return image
+    array = np.ascontiguousarray(image)
+    if array.ndim == 3 and array.shape[2] == 3:
+        array = array[:, :, ::-1]
+    elif array.ndim == 3 and array.shape[2] == 4:
+        array = array[:, :, [2, 1, 0, 3]]
+    return Image.fromarray(np.ascontiguousarray(array))
+
+
+def _get_api(lang, psm, oem, variables):
+    apis = getattr(_local, "apis", None)
+    if apis is None:
+        apis = _local.apis = {}
+    key = (lang, psm, oem, tuple(sorted(variables.items())))
+    api = apis.get(key)
+    if api is None:
+        start = time.perf_counter()
+        api = tesserocr.PyTessBaseAPI(lang=lang, psm=psm, oem=oem)
+        for name, value in variables.items():
+            api.SetVariable(name, value)
+        apis[key] = api
+        logger.info(f"Initialized Tesseract engine lang={lang} psm={psm} "
+                    f"in {time.perf_counter() - start:.2f}s ({threading.current_thread().name})")
+    return api
+
+
+def _record(name, elapsed):
+    with _stats_lock:
+        entry = _stats.setdefault(name, {"calls": 0, "seconds": 0.0})
+        entry["calls"] += 1
+        entry["seconds"] += elapsed
+
+
+def image_to_string(image, lang: str = "eng", config: str = "") -> str:
+    """OCR an image with a pooled engine, or pytesseract as a fallback."""
+    psm, oem, variables, config_lang = parse_config(config)
+    lang = config_lang or lang
+    start = time.perf_counter()
+    if tesserocr is not None:
+        api = _get_api(lang, psm, oem, variables)
+        api.SetImage(to_pil(image))
+        text = api.GetUTF8Text()
+        api.Clear()
+    else:
+        if config_lang:
+            # pytesseract passes lang separately
+            config = config.replace(f"-l {config_lang}", "")
+        text = pytesseract.image_to_string(to_pil(image), lang=lang, config=config)
+    _record(backend(), time.perf_counter() - start)
+    return text
+
+
+def image_to_data(image, lang: str = "eng", config: str = "") -> Tuple[str, List[float]]:
+    """OCR an image and return (text, word confidences 0-100)."""
+    psm, oem, variables, config_lang = parse_config(config)
+    lang = config_lang or lang
+    start = time.perf_counter()
+    if tesserocr is not None:
+        api = _get_api(lang, psm, oem, variables)
+        api.SetImage(to_pil(image))
+        text = api.GetUTF8Text()
+        confidences = [float(c) for c in api.AllWordConfidences()]
+        api.Clear()
+    else:
+        if config_lang:
+            config = config.replace(f"-l {config_lang}", "")
+        data = pytesseract.image_to_data(to_pil(image), lang=lang, config=config,
+                                         output_type=pytesseract.Output.DICT)
+        lines, confidences = {}, []
+        for i, word in enumerate(data["text"]):
+            conf = float(data["conf"][i])
+            if conf < 0 or not word.strip():
+                continue
+            confidences.append(conf)
+            key = (data["block_num"][i], data["par_num"][i], data["line_num"][i])
+            lines.setdefault(key, []).append(word)
+        text = "\n".join(" ".join(words) for words in lines.values())
+    _record(backend(), time.perf_counter() - start)
+    return text, confidences
+
+
+def image_to_lines(image, lang: str = "eng", config: str = "") -> List[Tuple[str, float, Tuple[int, int, int, int]]]:
+    """
+    OCR an image and return its text lines in reading order.
+
+    Returns:
+        list: (text, mean word confidence 0-100, (x1, y1, x2, y2)) per line
+    """
+    psm, oem, variables, config_lang = parse_config(config)
+    lang = config_lang or lang
+    start = time.perf_counter()
+    lines = []
+    if tesserocr is not None:
+        api = _get_api(lang, psm, oem, variables)
+        api.SetImage(to_pil(image))
+        api.Recognize()
+        level = tesserocr.RIL.TEXTLINE
+        for result in tesserocr.iterate_level(api.GetIterator(), level):
+            text = result.GetUTF8Text(level)
+            box = result.BoundingBox(level)
+            if text and text.strip() and box:
+                lines.append((text.strip(), float(result.Confidence(level)), tuple(box)))
+        api.Clear()
+    else:
+        if config_lang:
+            config = config.replace(f"-l {config_lang}", "")
+        data = pytesseract.image_to_data(to_pil(image), lang=lang, config=config,
+                                         output_type=pytesseract.Output.DICT)
+        grouped = {}
+        for i, word in enumerate(data["text"]):
+            conf = float(data["conf"][i])
+            if conf < 0 or not word.strip():
+                continue
+            key = (data["block_num"][i], data["par_num"][i], data["line_num"][i])
+            x1, y1 = data["left"][i], data["top"][i]
+            x2, y2 = x1 + data["width"][i], y1 + data["height"][i]
+            words, confidences, box = grouped.setdefault(key, ([], [], [x1, y1, x2, y2]))
+            words.append(word)
+            confidences.append(conf)
+            box[:] = [min(box[0], x1), min(box[1], y1), max(box[2], x2), max(box[3], y2)]
+        for words, confidences, box in grouped.values():
+            lines.append((" ".join(words), sum(confidences) / len(confidences), tuple(box)))
+    _record(backend(), time.perf_counter() - start)
+    return lines
+
+
+def latency_stats() -> Dict[str, dict]:
+    """Call count and mean latency per backend."""
+    with _stats_lock:
+        return {
+            name: {
+                "calls": entry["calls"],
+                "mean_ms": round(entry["seconds"] / entry["calls"] * 1000, 1) if entry["calls"] else 0.0
+            }
+            for name, entry in _stats.items()
+        }
@@ -0,0 +1,128 @@
+"""
+Decide how much of a page screenshot needs OCR.
+
+The DOM already gives us the page text. OCR is only worth running on what
+the DOM cannot provide:
+
+    skip     enough DOM text and no image-like region left uncovered
+    regions  OCR only the image, canvas, svg and background-image regions
+             that no DOM text is drawn over (logos, contact images, charts)
+    full     the DOM text is nearly empty (text rendered into images or
+             canvas), or no layout was captured
+
+The layout comes from browser.collect_layout(), taken for the same viewport
+as the screenshot, in CSS pixels.
+"""
+import logging
+from typing import Dict, List, Optional
+
+import cv2
+
+from . import card_ocr
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+MIN_DOM_CHARS = 200     # below this the DOM text is considered nearly empty
+MIN_REGION_SIDE = 24    # CSS px; smaller images are icons and bullets
+MIN_REGION_AREA = 2500  # CSS px^2
+TEXT_COVERAGE = 0.5     # share of a region covered by DOM text to consider it read
+
+
+def _area(rect):
+    return max(0.0, rect[2] - rect[0]) * max(0.0, rect[3] - rect[1])
+
+
+def _intersection(a, b):
+    return (max(a[0], b[0]), max(a[1], b[1]), min(a[2], b[2]), min(a[3], b[3]))
+
+
+def _text_coverage(region, text_rects):
+    """Share of the region's area overlapped by DOM text rects (capped at 1)."""
+    area = _area(region)
+    if not area:
+        return 1.0
+    covered = sum(_area(_intersection(region, rect)) for rect in text_rects)
+    return min(1.0, covered / area)
+
+
+def _clip(rect, viewport):
+    return (max(0.0, rect[0]), max(0.0, rect[1]), min(viewport[0], rect[2]), min(viewport[1], rect[3]))
+
+
+def plan_ocr(dom_text: str, layout: Optional[Dict]) -> Dict:
+    """
+    Decide whether and where to OCR a page.
+
+    Args:
+        dom_text (str): Visible text extracted from the DOM
+        layout (dict): Output of browser.collect_layout() or None
+
+    Returns:
+        dict: {"mode": "skip" | "regions" | "full",
+               "regions": [(x1, y1, x2, y2) in screenshot pixels],
+               "reason": str}
+    """
+    dom_chars = len((dom_text or "").strip())
+    if not layout:
+        return {"mode": "full", "regions": [], "reason": "no layout captured"}
+    if dom_chars < MIN_DOM_CHARS:
+        return {"mode": "full", "regions": [],
+                "reason": f"DOM text nearly empty ({dom_chars} chars)"}
+
+    viewport = layout.get("viewport") or [0, 0]
+    scale = float(layout.get("dpr") or 1)
+    text_rects = layout.get("text_rects") or []
+
+    regions: List[tuple] = []
+    covered = 0
+    for media in layout.get("media_rects") or []:
+        rect = _clip(media["rect"], viewport)
+        width, height = rect[2] - rect[0], rect[3] - rect[1]
+        if min(width, height) < MIN_REGION_SIDE or width * height < MIN_REGION_AREA:
+            continue
+        if _text_coverage(rect, text_rects) >= TEXT_COVERAGE:
+            covered += 1
+            continue
+        regions.append(tuple(v * scale for v in rect))
+
+    if not regions:
+        return {"mode": "skip", "regions": [],
+                "reason": f"DOM text covers the page ({dom_chars} chars, "
+                          f"{covered} image regions overlaid by text)"}
+    return {"mode": "regions", "regions": regions,
+            "reason": f"{len(regions)} image-rendered regions not covered by DOM text"}
+
+
+def ocr_regions(screenshot_path: str, regions, lang: str = "eng") -> str:
+    """OCR the given screenshot regions; returns their text, one region per line."""
+    img = cv2.imread(screenshot_path)
+    if img is None:
+        logger.error(f"Could not read screenshot: {screenshot_path}")
+        return ""
+    texts = card_ocr.ocr_card_regions(img, regions, lang)
+    return "\n".join(text for text in texts if text)
+
+
+def run(screenshot_path: str, dom_text: str, layout: Optional[Dict], ocr_full, lang: str = "eng",
+        page: str = "") -> str:
+    """
+    Apply the gate to one page and return the OCR text it allows.
+
+    Args:
+        ocr_full: Callable (screenshot_path, lang) -> str used in "full" mode
+        page (str): Page label for the log line
+    """
+    if not screenshot_path:
+        logger.info(f"OCR skipped for {page}: no screenshot")
+        return ""
+    decision = plan_ocr(dom_text, layout)
+    if decision["mode"] == "skip":
+        logger.info(f"OCR skipped for {page}: {decision['reason']}")
+        return ""
+    if decision["mode"] == "regions":
+        logger.info(f"OCR on regions for {page}: {decision['reason']}")
+        return ocr_regions(screenshot_path, decision["regions"], lang)
+    logger.info(f"Full-page OCR for {page}: {decision['reason']}")
+    return ocr_full(screenshot_path, lang)
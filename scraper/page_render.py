@@ -0,0 +1,146 @@
+"""
+One render of a page, shared by the CV and legacy pipelines.
+
+render() opens a single browser, loads the page once and records everything
+both pipelines need:
+
+    html, visible_text   page source and body text after dynamic content loaded
+    screenshot_path      viewport screenshot, with `layout` (see browser.collect_layout)
+    anchors, texts       every visible link (text, absolute href, page rect) and
+                         text node (text, page rect, font, enclosing link)
+    tile_bands           full-page capture as overlapping PNG bands on disk
+                         (see tiling.save_bands / tiles())
+
+The artifact is read-only once built, so pipelines can consume it from
+different threads.
+"""
+import logging
+import os
+import uuid
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from selenium.common.exceptions import TimeoutException, WebDriverException
+
+from . import browser, tiling
+from .dom_geometry import DomIndex
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SCREENSHOT_DIR = "screenshots"
+
+# Page-coordinate rects (CSS px) of links and visible text nodes, in one script call
+GEOMETRY_SCRIPT = """
+const sx = window.scrollX, sy = window.scrollY;
+const pageRect = r => [r.left + sx, r.top + sy, r.right + sx, r.bottom + sy];
+const anchors = [];
+const anchorIndex = new Map();
+for (const a of document.querySelectorAll('a[href]')) {
+    const r = a.getBoundingClientRect();
+    if (r.width <= 0 || r.height <= 0) continue;
+    anchorIndex.set(a, anchors.length);
+    anchors.push({text: (a.innerText || '').trim(), href: a.href, rect: pageRect(r)});
+}
+const texts = [];
+const walker = document.createTreeWalker(document.body, NodeFilter.SHOW_TEXT);
+const range = document.createRange();
+while (walker.nextNode()) {
+    const node = walker.currentNode;
+    const content = node.textContent.trim();
+    const parent = node.parentElement;
+    if (!content || !parent || ['SCRIPT', 'STYLE', 'NOSCRIPT'].includes(parent.tagName)) continue;
+    range.selectNodeContents(node);
+    const r = range.getBoundingClientRect();
+    if (r.width <= 0 || r.height <= 0) continue;
+    const style = getComputedStyle(parent);
+    const link = parent.closest('a[href]');
+    texts.push({text: content, rect: pageRect(r),
+                font_size: parseFloat(style.fontSize) || 0,
+                font_weight: parseInt(style.fontWeight) || 400,
+                anchor: link && anchorIndex.has(link) ? anchorIndex.get(link) : -1});
+}
+return {anchors: anchors, texts: texts};
+"""
+
+
+class PageRender:
+    def __init__(self, url: str, html: str = "", visible_text: str = "", screenshot_path: str = "",
+                 layout: Optional[Dict] = None, anchors: Optional[List[Dict]] = None,
+                 texts: Optional[List[Dict]] = None, tile_bands: Optional[list] = None,
+                 prefix: str = ""):
+        self.url = url
+        self.html = html
+        self.visible_text = visible_text
+        self.screenshot_path = screenshot_path
+        self.layout = layout
+        self.anchors = anchors or []
+        self.texts = texts or []
+        self.tile_bands = tile_bands or []
+        self.prefix = prefix
+
+    def __bool__(self):
+        return bool(self.html)
+
+    def tiles(self):
+        """Decode the full-page capture one tile at a time (tiling.Tile objects)."""
+        return tiling.decode_tiles(tiling.read_bands(self.tile_bands))
+
+    def dom_index(self) -> DomIndex:
+        """Spatial index of the links and text nodes, in capture pixels."""
+        scale = (self.layout or {}).get("dpr") or 1.0
+        return DomIndex({"anchors": self.anchors, "texts": self.texts}, scale)
+
+
+def render(url: str, timeout: int = 60, full_page: bool = True) -> PageRender:
+    """
+    Load url once and build its PageRender; returns an empty (falsy) render
+    when the page cannot be loaded.
+    """
+    os.makedirs(SCREENSHOT_DIR, exist_ok=True)
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    prefix = os.path.join(SCREENSHOT_DIR, f"render_{timestamp}_{uuid.uuid4().hex[:8]}")
+
+    driver = None
+    try:
+        driver = browser.init_driver()
+        html, visible_text = browser.load_page(driver, url, timeout)
+
+        # Same viewport as render_page: the layout and screenshot after scrolling down
+        screenshot_path = f"{prefix}_viewport.png"
+        layout = browser.collect_layout(driver)
+        try:
+            driver.save_screenshot(screenshot_path)
+        except Exception as e:
+            logger.error(f"Error saving screenshot: {e}")
+            screenshot_path = ""
+
+        geometry = driver.execute_script(GEOMETRY_SCRIPT) or {}
+        anchors, texts = geometry.get("anchors") or [], geometry.get("texts") or []
+
+        tile_bands = []
+        if full_page:
+            try:
+                # load_page only jumps to the bottom; step through so lazy content renders
+                tiling.scroll_through(driver)
+                tile_bands = tiling.save_bands(tiling.capture_bands(driver), prefix)
+            except Exception as e:
+                logger.error(f"Error capturing full page of {url}: {e}")
+
+        logger.info(f"Rendered {url}: {len(anchors)} links, {len(texts)} text nodes, {len(tile_bands)} tiles")
+        return PageRender(url, html, visible_text, screenshot_path, layout, anchors, texts, tile_bands, prefix)
+
+    except TimeoutException:
+        logger.error(f"Timeout while loading {url}")
+    except WebDriverException as e:
+        logger.error(f"WebDriver error while loading {url}: {e}")
+    except Exception as e:
+        logger.error(f"Unexpected error while loading {url}: {e}")
+    finally:
+        if driver:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+    return PageRender(url, prefix=prefix)
@@ -0,0 +1,205 @@
+"""
+Prompt-to-plan compilation.
+
+A user prompt is normalized and compiled once into an extraction plan:
+
+    {
+        "fields": ["name", "phone", ...],
+        "questions": {"address": ["What is the address of this association?", ...], ...},
+        "source": "keywords" | "llm" | "default"
+    }
+
+The keyword matcher is the fast local path. The local LLM (Ollama) is only
+asked, with a bounded timeout, when no keyword matches. Compiled plans are
+kept in a persistent JSON cache keyed by the normalized prompt, so a prompt
+is never re-sent to the LLM by later workflows.
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import unicodedata
+from typing import Dict, List, Optional
+
+import requests
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+PLAN_VERSION = 1
+PLAN_CACHE_PATH = os.environ.get("EZER_PLAN_CACHE", os.path.join("cache", "prompt_plans.json"))
+LLM_URL = os.environ.get("EZER_LLM_URL", "http://localhost:11434/api/generate")
+LLM_MODEL = "qwen2.5"
+LLM_TIMEOUT = 10  # seconds
+
+KNOWN_FIELDS = ["name", "phone", "email", "address", "domain", "poste"]
+
+# Keyword -> field, checked in KNOWN_FIELDS order
+FIELD_KEYWORDS = {
+    "name": ["name", "nom", "association"],
+    "phone": ["phone", "telephone", "tel", "numéro"],
+    "email": ["email", "mail", "courriel"],
+    "address": ["address", "adresse", "location"],
+    "domain": ["domain", "website", "site"],
+    "poste": ["poste", "job", "title", "fonction"],
+}
+
+# Question variants per field, best first
+FIELD_QUESTIONS = {
+    "name": ["What is the name of this organization?"],
+    "phone": ["What is the phone number?", "What is the contact number of this organization?"],
+    "email": ["What is the email address?", "What is the contact email of this organization?"],
+    "address": ["What is the address of this association?", "Where is this organization located?"],
+    "domain": [
+        "What is the industry, sector, or field of activity of this organization?",
+        "What sector does this organization operate in?",
+        "What is the main business area or specialty of this organization?",
+        "What is the organization's domain of expertise?"
+    ],
+    "website": ["What is the website or URL of this organization?"],
+    "poste": ["What is the job title or poste of the contact person?", "What is the role of the contact person?"],
+}
+
+_SYSTEM_PROMPT = """You are a helpful assistant that extracts contact information fields from user prompts.
+        Identify which fields the user wants to extract (name, phone, email, address, domain, poste).
+        Return a JSON object with the fields as keys and boolean values indicating if they should be extracted.
+        Example output: {"name": true, "phone": true, "email": true, "address": false, "domain": false, "poste": false}"""
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Unicode-normalize, case-fold and collapse whitespace."""
+    prompt = unicodedata.normalize("NFKC", prompt or "")
+    return re.sub(r"\s+", " ", prompt.casefold()).strip()
+
+
+def match_prompt_keywords(prompt: str) -> List[str]:
+    """Fast local field detection from keywords in the prompt."""
+    plower = prompt.lower()
+    return [field for field in KNOWN_FIELDS if any(kw in plower for kw in FIELD_KEYWORDS[field])]
+
+
+def interpret_prompt_with_llm(prompt: str, timeout: float = LLM_TIMEOUT) -> List[str]:
+    """
+    Use local Qwen2.5 model through Ollama to interpret the user's prompt
+    and extract relevant fields in a structured way.
+    Returns an empty list if the LLM is unreachable, slow or unparseable.
+    """
+    try:
+        logger.info(f"Sending prompt to LLM: {prompt}")
+        response = requests.post(
+            LLM_URL,
+            json={
+                "model": LLM_MODEL,
+                "prompt": f"{_SYSTEM_PROMPT}\n\nUser prompt: {prompt}",
+                "stream": False
+            },
+            timeout=timeout
+        )
+        logger.info(f"LLM Response status: {response.status_code}")
+        if response.status_code != 200:
+            return []
+
+        llm_output = response.json().get('response', '')
+        logger.debug(f"LLM raw output: {llm_output}")
+
+        # Find JSON in the output
+        json_start = llm_output.find('{')
+        json_end = llm_output.rfind('}') + 1
+        if json_start == -1 or json_end <= json_start:
+            logger.warning("No JSON found in LLM output")
+            return []
+        fields = json.loads(llm_output[json_start:json_end])
+        extracted_fields = [field for field in KNOWN_FIELDS if fields.get(field)]
+        logger.info(f"Extracted fields: {extracted_fields}")
+        return extracted_fields
+    except requests.Timeout:
+        logger.warning(f"LLM did not answer within {timeout}s")
+    except (requests.RequestException, ValueError, AttributeError) as e:
+        logger.error(f"Error in LLM interpretation: {e}")
+    return []
+
+
+class PlanCache:
+    def __init__(self, path: str = PLAN_CACHE_PATH):
+        """Persistent prompt-plan cache stored as one JSON file."""
+        self.path = path
+        self._lock = threading.Lock()
+        self._plans = None
+
+    def _load(self):
+        if self._plans is None:
+            self._plans = {}
+            if self.path and os.path.exists(self.path):
+                try:
+                    with open(self.path, encoding="utf-8") as f:
+                        self._plans = json.load(f)
+                except (OSError, ValueError) as e:
+                    logger.warning(f"Ignoring unreadable plan cache {self.path}: {e}")
+        return self._plans
+
+    def get(self, key: str) -> Optional[dict]:
+        with self._lock:
+            plan = self._load().get(key)
+            return json.loads(json.dumps(plan)) if plan else None
+
+    def put(self, key: str, plan: dict):
+        with self._lock:
+            self._load()[key] = plan
+            if not self.path:
+                return
+            try:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                tmp_path = f"{self.path}.{os.getpid()}.tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(self._plans, f, ensure_ascii=False, indent=2)
+                os.replace(tmp_path, self.path)
+            except OSError as e:
+                logger.warning(f"Could not persist plan cache: {e}")
+
+
+plan_cache = PlanCache()
+
+
+def build_plan(fields: List[str], source: str) -> Dict:
+    return {
+        "version": PLAN_VERSION,
+        "fields": list(fields),
+        "questions": {field: list(FIELD_QUESTIONS.get(field, [f"What is the {field}?"])) for field in fields},
+        "source": source
+    }
+
+
+def compile_prompt(prompt: str, use_llm: bool = True, cache: Optional[PlanCache] = None) -> Dict:
+    """Return the extraction plan for a prompt, compiling and caching it on first sight."""
+    cache = plan_cache if cache is None else cache
+    normalized = normalize_prompt(prompt)
+    key = hashlib.sha1(f"{PLAN_VERSION}:{normalized}".encode("utf-8")).hexdigest()
+
+    plan = cache.get(key)
+    if plan:
+        logger.info(f"Prompt plan cache hit ({plan['source']}): {plan['fields']}")
+        return plan
+
+    fields = match_prompt_keywords(normalized)
+    source = "keywords"
+    if not fields and use_llm:
+        fields = interpret_prompt_with_llm(prompt)
+        source = "llm"
+    if not fields:
+        # Always include name if no fields were detected; not cached so a
+        # recovered LLM gets another chance at this prompt
+        return build_plan(["name"], "default")
+
+    plan = build_plan(fields, source)
+    cache.put(key, plan)
+    logger.info(f"Compiled prompt plan ({source}): {fields}")
+    return plan
+
+
+def question_for(field: str, plan: Optional[Dict] = None) -> str:
+    """Best question for a field, from the plan when one is given."""
+    questions = (plan or {}).get("questions", {}).get(field) or FIELD_QUESTIONS.get(field)
+    return questions[0] if questions else f"What is the {field}?"
@@ -1,44 +1,50 @@
-from transformers import pipeline
-import torch
 import logging
 import os
 from .field_mapper import field_mapper
+from .models import registry
+from . import snapshot
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-_qa_pipeline = None
+def _build_qa_pipeline():
+    import torch
+    from transformers import pipeline
 
-def load_model():
-    global _qa_pipeline
-    if _qa_pipeline is not None:
-        return _qa_pipeline
+    # Force CUDA if available
+    if torch.cuda.is_available():
+        # Set CUDA device
+        os.environ['CUDA_VISIBLE_DEVICES'] = '0'
+        device = torch.device('cuda:0')
+        logger.info(f"CUDA version: {torch.version.cuda}")
+        logger.info(f"Using GPU: {torch.cuda.get_device_name(0)}")
+        logger.info(f"GPU Memory: {torch.cuda.get_device_properties(0).total_memory / 1024**3:.2f} GB")
+    else:
+        device = torch.device('cpu')
+        logger.warning("CUDA not available, falling back to CPU")
+
+    if snapshot.snapshot_path("qa"):
+        logger.info("Loading QA model from snapshot")
+        return snapshot.load_qa_pipeline(device)
+
+    # Load the QA pipeline with CUDA if available
+    qa_pipeline = pipeline(
+        "question-answering",
+        model="deepset/roberta-base-squad2",
+        device=device,
+        torch_dtype=torch.float16 if device.type == 'cuda' else torch.float32
+    )
+
+    # Verify device
+    logger.info(f"Model loaded on device: {next(qa_pipeline.model.parameters()).device}")
+    return qa_pipeline
+
+registry.register("qa", _build_qa_pipeline)
 
+def load_model():
     try:
-        # Force CUDA if available
-        if torch.cuda.is_available():
-            # Set CUDA device
-            os.environ['CUDA_VISIBLE_DEVICES'] = '0'
-            device = torch.device('cuda:0')
-            logger.info(f"CUDA version: {torch.version.cuda}")
-            logger.info(f"Using GPU: {torch.cuda.get_device_name(0)}")
-            logger.info(f"GPU Memory: {torch.cuda.get_device_properties(0).total_memory / 1024**3:.2f} GB")
-        else:
-            device = torch.device('cpu')
-            logger.warning("CUDA not available, falling back to CPU")
-
-        # Load the QA pipeline with CUDA if available
-        _qa_pipeline = pipeline(
-            "question-answering",
-            model="deepset/roberta-base-squad2",
-            device=device,
-            torch_dtype=torch.float16 if device.type == 'cuda' else torch.float32
-        )
-        
-        # Verify device
-        logger.info(f"Model loaded on device: {next(_qa_pipeline.model.parameters()).device}")
-        return _qa_pipeline
+        return registry.get("qa")
     except Exception as e:
         logger.error(f"Error loading model: {e}")
         raise
@@ -49,16 +55,18 @@ def answer_question(question: str, context: str) -> dict:
     Returns the result dictionary with answer, score, and positions.
     """
     try:
-        if _qa_pipeline is None:
-            _qa_pipeline = load_model()
+        qa_pipe = load_model()
+
+        # Detect the question language once for every step below
+        language = field_mapper.detect_language(question)
 
         # Enhance the question with better context understanding
-        enhanced_question = field_mapper.enhance_question(question)
+        enhanced_question = field_mapper.enhance_question(question, language)
         logger.info(f"Original question: {question}")
         logger.info(f"Enhanced question: {enhanced_question}")
 
         # Get relevant fields based on context
-        relevant_fields = field_mapper.understand_context(question)
+        relevant_fields = field_mapper.understand_context(question, language)
         logger.info(f"Relevant fields detected: {relevant_fields}")
 
         # Special handling for industry/domain questions
@@ -71,28 +79,26 @@ def answer_question(question: str, context: str) -> dict:
             ]
             best_result = None
             for q in industry_questions:
-                result = _qa_pipeline(question=q, context=context)
+                result = qa_pipe(question=q, context=context)
                 if result['score'] > 0.3 and (not best_result or result['score'] > best_result['score']):
                     best_result = result
             if best_result:
                 return best_result
 
         # Get the answer from the QA model
-        result = _qa_pipeline(question=enhanced_question, context=context)
+        result = qa_pipe(question=enhanced_question, context=context)
         
         # If the answer is empty or score is low, try with the original question
         if not result['answer'] or result['score'] < 0.3:
             logger.info("Low confidence answer, trying with original question")
-            result = _qa_pipeline(question=question, context=context)
+            result = qa_pipe(question=question, context=context)
 
         # If we have relevant fields, try to validate the answer
         if relevant_fields and result['answer']:
             # Check if the answer matches any of the expected field patterns
-            for field in relevant_fields:
-                mapped_field = field_mapper.map_field(result['answer'])
-                if mapped_field and mapped_field in relevant_fields:
-                    logger.info(f"Answer validated as {mapped_field}")
-                    break
+            mapped_field = field_mapper.map_field(result['answer'])
+            if mapped_field and mapped_field in relevant_fields:
+                logger.info(f"Answer validated as {mapped_field}")
 
         return result
     except Exception as e:
@@ -0,0 +1,200 @@
+"""
+Pre-serialized model snapshots for fast worker start.
+
+`python -m scraper.snapshot` loads the models once through the registry and
+writes them to a local snapshot directory:
+
+    <snapshot_dir>/
+        manifest.json
+        qa/            config, tokenizer and model.safetensors
+        spacy/<key>/   spaCy pipelines saved with nlp.to_disk()
+
+When a snapshot exists the registry loaders use it. QA weights are mapped
+straight from model.safetensors with a private mmap, so every worker process
+reads them through the same OS page cache instead of holding its own copy.
+"""
+import argparse
+import json
+import logging
+import os
+import time
+from typing import Dict, Iterable, Optional
+
+from .models import registry
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# An empty EZER_SNAPSHOT_DIR disables snapshot loading
+SNAPSHOT_DIR = os.environ.get("EZER_SNAPSHOT_DIR", "model_snapshot")
+
+_SAFETENSORS_DTYPES = {
+    "F64": "float64",
+    "F32": "float32",
+    "F16": "float16",
+    "BF16": "bfloat16",
+    "I64": "int64",
+    "I32": "int32",
+    "I16": "int16",
+    "I8": "int8",
+    "U8": "uint8",
+    "BOOL": "bool",
+}
+
+
+def snapshot_path(*parts, snapshot_dir: Optional[str] = None) -> Optional[str]:
+    """Return the path of a snapshot entry, or None if it doesn't exist."""
+    base = SNAPSHOT_DIR if snapshot_dir is None else snapshot_dir
+    if not base:
+        return None
+    path = os.path.join(base, *parts)
+    return path if os.path.exists(path) else None
+
+
+############################
+# Writing snapshots        #
+############################
+def create_snapshot(snapshot_dir: str = SNAPSHOT_DIR, models: Optional[Iterable[str]] = None) -> Dict[str, dict]:
+    """
+    Load the requested models (QA and every spaCy pipeline by default) and
+    serialize them into snapshot_dir.
+
+    Returns:
+        Dict[str, dict]: Per-model path and size written
+    """
+    from . import qa_model, crawler  # noqa: F401 -- importing registers their loaders
+
+    models = list(models) if models else ["qa"] + [f"spacy_{key}" for key in crawler._SPACY_PACKAGES]
+    os.makedirs(snapshot_dir, exist_ok=True)
+    written = {}
+
+    for name in models:
+        if name == "qa":
+            import torch
+            pipe = registry.get("qa")
+            target = os.path.join(snapshot_dir, "qa")
+            # Store float32 CPU weights so any worker can map them
+            state_dict = {k: v.detach().to("cpu", torch.float32) for k, v in pipe.model.state_dict().items()}
+            pipe.model.save_pretrained(target, state_dict=state_dict, safe_serialization=True)
+            pipe.tokenizer.save_pretrained(target)
+        elif name.startswith("spacy_"):
+            nlp = registry.get(name)
+            target = os.path.join(snapshot_dir, "spacy", name[len("spacy_"):])
+            nlp.to_disk(target)
+        else:
+            logger.warning(f"Model '{name}' has no snapshot format, skipping")
+            continue
+        written[name] = {"path": target, "size_mb": round(_dir_size(target) / 1024 ** 2, 1)}
+        logger.info(f"Snapshot of '{name}' written to {target} ({written[name]['size_mb']} MB)")
+
+    manifest_path = os.path.join(snapshot_dir, "manifest.json")
+    manifest = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path, encoding="utf-8") as f:
+            manifest = json.load(f)
+    manifest.setdefault("models", {}).update(written)
+    manifest["created_at"] = time.time()
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return written
+
+
+def _dir_size(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            total += os.path.getsize(os.path.join(root, name))
+    return total
+
+
+############################
+# Loading snapshots        #
+############################
+def mmap_safetensors(path: str) -> dict:
+    """
+    Map a .safetensors file and return {name: tensor} views into the mapping.
+    Pages are only read on first touch and are shared with other processes
+    mapping the same file.
+    """
+    import torch
+
+    with open(path, "rb") as f:
+        header_len = int.from_bytes(f.read(8), "little")
+        header = json.loads(f.read(header_len))
+    data_start = 8 + header_len
+    nbytes = os.path.getsize(path)
+
+    storage = torch.UntypedStorage.from_file(path, False, nbytes)
+    buffer = torch.empty(0, dtype=torch.uint8).set_(storage)
+
+    tensors = {}
+    for name, info in header.items():
+        if name == "__metadata__":
+            continue
+        dtype = getattr(torch, _SAFETENSORS_DTYPES[info["dtype"]])
+        begin, end = info["data_offsets"]
+        raw = buffer[data_start + begin:data_start + end]
+        itemsize = torch.empty(0, dtype=dtype).element_size()
+        if (data_start + begin) % itemsize:
+            # Misaligned for this dtype; fall back to a private copy
+            raw = raw.clone()
+        tensors[name] = raw.view(dtype).reshape(info["shape"])
+    return tensors
+
+
+def _check_state_dict(model, state_dict, result, path):
+    """
+    Raise if loading left parameters uninitialized or ignored snapshot tensors.
+    Tied weights are stored once, so keys missing from the snapshot are fine
+    when tie_weights() made them share a loaded tensor.
+    """
+    params = model.state_dict()
+    loaded = {params[key].data_ptr() for key in state_dict if key in params}
+    missing = [key for key in result.missing_keys if params[key].data_ptr() not in loaded]
+    unexpected = list(result.unexpected_keys)
+    if missing or unexpected:
+        raise RuntimeError(
+            f"QA snapshot {path} does not match its config (missing: {missing[:10]}, "
+            f"unexpected: {unexpected[:10]}); re-create it with python -m scraper.snapshot"
+        )
+
+
+def load_qa_pipeline(device, snapshot_dir: Optional[str] = None):
+    """Build the question-answering pipeline from a snapshot with mmapped weights."""
+    import torch
+    from transformers import AutoConfig, AutoModelForQuestionAnswering, AutoTokenizer, pipeline
+    from transformers.modeling_utils import no_init_weights
+
+    path = snapshot_path("qa", snapshot_dir=snapshot_dir)
+    config = AutoConfig.from_pretrained(path)
+    tokenizer = AutoTokenizer.from_pretrained(path)
+    with no_init_weights():
+        model = AutoModelForQuestionAnswering.from_config(config)
+    state_dict = mmap_safetensors(os.path.join(path, "model.safetensors"))
+    # strict=False only so tied weights can be checked after tie_weights()
+    result = model.load_state_dict(state_dict, strict=False, assign=True)
+    model.tie_weights()
+    _check_state_dict(model, state_dict, result, path)
+    model.eval()
+
+    if device.type == "cuda":
+        model = model.to(device, dtype=torch.float16)
+    return pipeline("question-answering", model=model, tokenizer=tokenizer, device=device)
+
+
+def load_spacy(key: str, snapshot_dir: Optional[str] = None):
+    import spacy
+    return spacy.load(snapshot_path("spacy", key, snapshot_dir=snapshot_dir))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serialize loaded models into a snapshot directory")
+    parser.add_argument("--dir", default=SNAPSHOT_DIR or "model_snapshot", help="Snapshot directory")
+    parser.add_argument("--models", nargs="*", help="Registry names to snapshot (default: qa and all spaCy pipelines)")
+    args = parser.parse_args()
+    create_snapshot(args.dir, args.models)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+"""
+Full-page captures as overlapping horizontal tiles.
+
+Instead of resizing the window to the whole page height and saving one huge
+PNG, capture_bands() asks Chrome (DevTools Page.captureScreenshot with a
+clip) for one band of the page at a time. decode_tiles() turns bands into
+NumPy arrays one by one, either straight from the browser (capture_tiles)
+or from the PNGs written by save_bands(). map_tiles() hands tiles to a small thread pool while the next
+one is being captured, keeping at most `max_in_flight` tiles alive, so peak
+memory does not grow with page length.
+
+Consecutive tiles overlap, so a card cut by one tile's edge is whole in the
+next. Detections are mapped to page coordinates and de-duplicated with
+merge_boxes(). Tall images that are already decoded (screenshot files) are
+OCRed by ocr_tall_image() in bands cut at seams, the most uniform pixel row
+near each nominal cut (find_seam), so no line is cut in half and the text is
+the concatenation of the bands.
+"""
+import base64
+import contextvars
+import logging
+import time
+from collections import deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+TILE_HEIGHT = 2400   # CSS px
+TILE_OVERLAP = 600   # CSS px; cards shorter than this are whole in some tile
+MAX_IN_FLIGHT = 2
+DUPLICATE_OVERLAP = 0.6  # share of the smaller box covered by the larger one
+SCROLL_STEP = 500    # CSS px
+SCROLL_PAUSE = 0.5   # seconds per step
+SCROLL_SETTLE = 2    # seconds back at the top before capturing
+
+# top: page y of row 0 (image px)
+Tile = namedtuple("Tile", ["index", "top", "image", "last"])
+
+PAGE_HEIGHT_SCRIPT = """
+    return Math.max(
+        document.body.scrollHeight,
+        document.documentElement.scrollHeight,
+        document.body.offsetHeight,
+        document.documentElement.offsetHeight
+    );
+"""
+
+
+def find_seam(image, start, end):
+    """Row in [start, end) with the least ink, preferring the middle of the range."""
+    start, end = max(0, start), min(image.shape[0], end)
+    if end - start <= 1:
+        return start
+    rows = image[start:end]
+    if rows.ndim == 3:
+        rows = cv2.cvtColor(rows, cv2.COLOR_BGR2GRAY)
+    ink = np.ptp(rows, axis=1).astype(np.float64) + rows.std(axis=1)
+    center = (end - start) / 2
+    ink += np.abs(np.arange(end - start) - center) / (end - start)
+    return start + int(np.argmin(ink))
+
+
+def _capture_band(driver, top, width, height):
+    """PNG bytes of one band of the page, in CSS px page coordinates."""
+    shot = driver.execute_cdp_cmd("Page.captureScreenshot", {
+        "format": "png",
+        "captureBeyondViewport": True,
+        "clip": {"x": 0, "y": top, "width": width, "height": height, "scale": 1},
+    })
+    return base64.b64decode(shot["data"])
+
+
+def scroll_through(driver, step=SCROLL_STEP, pause=SCROLL_PAUSE, settle=SCROLL_SETTLE):
+    """
+    Scroll the loaded page top to bottom in steps, pausing at each, so lazy-loaded
+    images and cards render before capture_bands() grabs them, then back to the top.
+    """
+    total = int(driver.execute_script(PAGE_HEIGHT_SCRIPT))
+    position = 0
+    while position < total:
+        driver.execute_script(f"window.scrollTo(0, {position});")
+        time.sleep(pause)
+        position += step
+    driver.execute_script("window.scrollTo(0, 0);")
+    time.sleep(settle)
+
+
+def capture_bands(driver, width=None, tile_height=TILE_HEIGHT, overlap=TILE_OVERLAP):
+    """
+    Yield (top, height, png_bytes) for overlapping bands of the loaded page,
+    top to bottom, in CSS px.
+
+    Args:
+        driver: Selenium Chrome driver with the page loaded
+        width (int): Capture width in CSS px (defaults to the document width)
+        tile_height (int): Tile height in CSS px
+        overlap (int): Overlap between consecutive tiles in CSS px
+    """
+    total = int(driver.execute_script(PAGE_HEIGHT_SCRIPT))
+    width = width or int(driver.execute_script("return document.documentElement.clientWidth;"))
+    driver.execute_script("window.scrollTo(0, 0);")
+    top = 0
+    while True:
+        height = min(tile_height, total - top)
+        yield top, height, _capture_band(driver, top, width, height)
+        if top + height >= total:
+            return
+        top += tile_height - overlap
+
+
+def decode_tiles(bands):
+    """Decode (top, height, png_bytes) bands one at a time into Tile objects."""
+    bands = iter(bands)
+    current = next(bands, None)
+    index = 0
+    while current is not None:
+        top, height, data = current
+        following = next(bands, None)
+        image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+        if image is None:
+            logger.error(f"Could not decode tile {index} at y={top}")
+            return
+        # Device pixel ratio: image px per CSS px
+        scale = image.shape[0] / height if height else 1.0
+        yield Tile(index, int(round(top * scale)), image, following is None)
+        current = following
+        index += 1
+
+
+def capture_tiles(driver, width=None, tile_height=TILE_HEIGHT, overlap=TILE_OVERLAP):
+    """Yield the loaded page in driver as Tile objects, top to bottom (see capture_bands)."""
+    return decode_tiles(capture_bands(driver, width, tile_height, overlap))
+
+
+def save_bands(bands, prefix):
+    """
+    Write captured bands to disk as they arrive (no re-encoding).
+
+    Returns:
+        list: (top, height, path) per band, readable with read_bands()
+    """
+    saved = []
+    for index, (top, height, data) in enumerate(bands):
+        path = f"{prefix}_tile{index}.png"
+        with open(path, "wb") as f:
+            f.write(data)
+        saved.append((top, height, path))
+    return saved
+
+
+def read_bands(saved):
+    """Yield (top, height, png_bytes) from save_bands() output, one file at a time."""
+    for top, height, path in saved:
+        with open(path, "rb") as f:
+            yield top, height, f.read()
+
+
+def map_tiles(tiles, process_tile, max_in_flight=MAX_IN_FLIGHT):
+    """
+    Apply process_tile to each tile in a thread pool while tiles are still
+    being produced; at most max_in_flight tiles are processed at once.
+
+    Returns:
+        list: process_tile results in tile order
+    """
+    results = []
+    pending = deque()
+    with ThreadPoolExecutor(max_workers=max_in_flight) as pool:
+        for tile in tiles:
+            if len(pending) >= max_in_flight:
+                results.append(pending.popleft().result())
+            # Carry context variables (e.g. the OCR cache's current site) into the pool
+            pending.append(pool.submit(contextvars.copy_context().run, process_tile, tile))
+        while pending:
+            results.append(pending.popleft().result())
+    return results
+
+
+def merge_boxes(detections, min_overlap=DUPLICATE_OVERLAP):
+    """
+    De-duplicate detections found in more than one tile.
+
+    Args:
+        detections: Iterable of dicts with a page-coordinate "box" (x1, y1, x2, y2)
+
+    Returns:
+        list: Kept detections, top to bottom. Of two duplicates the larger box
+        wins, i.e. the copy that was not cut by a tile edge.
+    """
+    def area(box):
+        return max(0.0, box[2] - box[0]) * max(0.0, box[3] - box[1])
+
+    kept = []
+    for det in sorted(detections, key=lambda d: area(d["box"]), reverse=True):
+        box = det["box"]
+        duplicate = False
+        for other in kept:
+            ob = other["box"]
+            inter = area((max(box[0], ob[0]), max(box[1], ob[1]), min(box[2], ob[2]), min(box[3], ob[3])))
+            if inter and inter / max(1e-6, min(area(box), area(ob))) >= min_overlap:
+                duplicate = True
+                break
+        if not duplicate:
+            kept.append(det)
+    kept.sort(key=lambda d: (d["box"][1], d["box"][0]))
+    return kept
+
+
+def split_bands(image, tile_height=TILE_HEIGHT, overlap=TILE_OVERLAP):
+    """Row ranges covering a tall decoded image, cut at low-ink seams."""
+    height = image.shape[0]
+    bands, start = [], 0
+    while height - start > tile_height + overlap:
+        nominal = start + tile_height
+        seam = find_seam(image, nominal - overlap // 2, nominal + overlap // 2)
+        bands.append((start, seam))
+        start = seam
+    bands.append((start, height))
+    return bands
+
+
+def ocr_tall_image(image, ocr_band, tile_height=TILE_HEIGHT, overlap=TILE_OVERLAP,
+                   max_workers=MAX_IN_FLIGHT):
+    """
+    OCR an already decoded image; images taller than a tile are read band by
+    band in parallel (bands are views, not copies).
+
+    Args:
+        ocr_band: Callable(image) -> str
+    """
+    bands = split_bands(image, tile_height, overlap)
+    if len(bands) == 1:
+        return ocr_band(image)
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        texts = list(pool.map(lambda band: ocr_band(image[band[0]:band[1]]), bands))
+    return "\n".join(text.strip() for text in texts if text and text.strip())